@@ -0,0 +1,112 @@
+"""
+Add statement layout fingerprints to existing file uploads
+Run: python add_layout_fingerprints.py
+"""
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from database.models import db, FileUpload
+
+BATCH_SIZE = 1000
+
+
+def add_column(inspector):
+    """Add the layout_fingerprint column and index if missing"""
+    from sqlalchemy import text
+    
+    columns = [col['name'] for col in inspector.get_columns('file_uploads')]
+    if 'layout_fingerprint' not in columns:
+        print("✓ Adding file_uploads.layout_fingerprint column...")
+        db.session.execute(text("ALTER TABLE file_uploads ADD COLUMN layout_fingerprint VARCHAR(64)"))
+    else:
+        print("✓ file_uploads.layout_fingerprint column already exists")
+    
+    indexes = [idx['name'] for idx in inspector.get_indexes('file_uploads')]
+    if 'ix_file_uploads_user_layout' not in indexes:
+        print("✓ Adding index ix_file_uploads_user_layout...")
+        db.session.execute(text(
+            "CREATE INDEX ix_file_uploads_user_layout ON file_uploads (user_id, layout_fingerprint)"
+        ))
+    
+    db.session.commit()
+
+
+def layout_fingerprint(details):
+    """Layout fingerprint recorded in an upload's processing details"""
+    if not isinstance(details, dict):
+        return None
+    # Completed uploads nest the extraction details under 'processing'
+    details = details.get('processing', details)
+    layout = details.get('layout') if isinstance(details, dict) else None
+    return layout.get('fingerprint') if isinstance(layout, dict) else None
+
+
+def backfill_layout_fingerprints():
+    """Copy layout fingerprints out of processing_details for uploads without one"""
+    from sqlalchemy import update, bindparam
+    total = 0
+    last_id = 0
+    
+    while True:
+        rows = db.session.query(FileUpload.id, FileUpload.processing_details).filter(
+            FileUpload.layout_fingerprint.is_(None),
+            FileUpload.processing_details.isnot(None),
+            FileUpload.id > last_id
+        ).order_by(FileUpload.id).limit(BATCH_SIZE).all()
+        
+        if not rows:
+            break
+        
+        values = [
+            {'row_id': row.id, 'row_fingerprint': layout_fingerprint(row.processing_details)}
+            for row in rows
+        ]
+        values = [v for v in values if v['row_fingerprint']]
+        if values:
+            db.session.execute(
+                update(FileUpload.__table__)
+                .where(FileUpload.__table__.c.id == bindparam('row_id'))
+                .values(layout_fingerprint=bindparam('row_fingerprint')),
+                values
+            )
+        db.session.commit()
+        
+        total += len(values)
+        last_id = rows[-1].id
+        print(f"  {total} uploads updated...")
+    
+    return total
+
+
+def add_layout_fingerprints():
+    """Add the layout_fingerprint column and backfill it"""
+    
+    print("=" * 60)
+    print("Adding Upload Layout Fingerprints")
+    print("=" * 60)
+    
+    app = create_app()
+    
+    with app.app_context():
+        try:
+            from sqlalchemy import inspect
+            add_column(inspect(db.engine))
+            
+            print("\n✓ Backfilling layout fingerprints...")
+            total = backfill_layout_fingerprints()
+            
+            print("\n" + "=" * 60)
+            print(f"✅ SUCCESS! {total} uploads linked to their layout")
+            print("=" * 60)
+            print()
+        
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n❌ Error: {e}")
+
+if __name__ == "__main__":
+    add_layout_fingerprints()
@@ -0,0 +1,116 @@
+"""
+Resolve existing transactions to canonical merchants
+Run: python add_merchant_ids.py
+"""
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from database.models import db, Transaction
+from services.merchant_resolver import merchant_resolver
+
+BATCH_SIZE = 1000
+
+# (table, column, definition) added if missing
+NEW_COLUMNS = [
+    ('transactions', 'merchant_id', 'INTEGER REFERENCES merchants(id)'),
+    ('staged_transactions', 'merchant_id', 'INTEGER REFERENCES merchants(id)'),
+]
+
+
+def add_columns(inspector):
+    """Add merchant_id columns and index if missing"""
+    from sqlalchemy import text
+    tables = inspector.get_table_names()
+    
+    for table, column, definition in NEW_COLUMNS:
+        if table not in tables:
+            continue
+        columns = [col['name'] for col in inspector.get_columns(table)]
+        if column not in columns:
+            print(f"✓ Adding {table}.{column} column...")
+            db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+        else:
+            print(f"✓ {table}.{column} column already exists")
+    
+    indexes = [idx['name'] for idx in inspector.get_indexes('transactions')]
+    if 'ix_transactions_merchant_id' not in indexes:
+        print("✓ Adding index ix_transactions_merchant_id...")
+        db.session.execute(text("CREATE INDEX ix_transactions_merchant_id ON transactions (merchant_id)"))
+    
+    db.session.commit()
+
+
+def backfill_merchant_ids():
+    """Resolve the distinct merchant strings of transactions without a merchant_id"""
+    from sqlalchemy import update, bindparam
+    total = 0
+    last_merchant = ''
+    
+    while True:
+        merchants = [
+            row.merchant for row in db.session.query(Transaction.merchant).filter(
+                Transaction.merchant_id.is_(None),
+                Transaction.merchant > last_merchant
+            ).distinct().order_by(Transaction.merchant).limit(BATCH_SIZE).all()
+        ]
+        
+        if not merchants:
+            break
+        
+        merchant_ids = merchant_resolver.resolve_many(merchants)
+        params = [
+            {'raw_merchant': merchant, 'resolved_id': merchant_id}
+            for merchant, merchant_id in zip(merchants, merchant_ids)
+            if merchant_id is not None
+        ]
+        if params:
+            total += db.session.execute(
+                update(Transaction.__table__)
+                .where(
+                    Transaction.__table__.c.merchant == bindparam('raw_merchant'),
+                    Transaction.__table__.c.merchant_id.is_(None)
+                )
+                .values(merchant_id=bindparam('resolved_id')),
+                params
+            ).rowcount
+        db.session.commit()
+        
+        last_merchant = merchants[-1]
+        print(f"  {total} transactions updated...")
+    
+    return total
+
+
+def add_merchant_ids():
+    """Add merchant_id columns and backfill them"""
+    
+    print("=" * 60)
+    print("Adding Canonical Merchants")
+    print("=" * 60)
+    
+    app = create_app()
+    
+    with app.app_context():
+        try:
+            from sqlalchemy import inspect
+            add_columns(inspect(db.engine))
+            
+            print("\n✓ Resolving merchants...")
+            total = backfill_merchant_ids()
+            
+            print("\n" + "=" * 60)
+            print(f"✅ SUCCESS! {total} transactions linked to "
+                  f"{merchant_resolver.stats()['merchants']} merchants")
+            print("=" * 60)
+            print()
+        
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n❌ Error: {e}")
+
+if __name__ == "__main__":
+    add_merchant_ids()
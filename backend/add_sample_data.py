@@ -11,7 +11,8 @@ from decimal import Decimal
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import create_app
-from database.models import db, Transaction, Category, User
+from database.models import db, Transaction, User
+from services.category_directory import category_directory
 
 def add_sample_data(user_email):
     """Add sample transactions for a user"""
@@ -29,11 +30,11 @@ def add_sample_data(user_email):
         print(f"✅ Found user: {user.email}")
         
         # Get categories
-        food_cat = Category.query.filter_by(name='Food & Dining', is_system=True).first()
-        transport_cat = Category.query.filter_by(name='Transportation', is_system=True).first()
-        shopping_cat = Category.query.filter_by(name='Shopping', is_system=True).first()
-        bills_cat = Category.query.filter_by(name='Bills & Utilities', is_system=True).first()
-        salary_cat = Category.query.filter_by(name='Salary', is_system=True).first()
+        food_id = category_directory.system_id('Food & Dining')
+        transport_id = category_directory.system_id('Transportation')
+        shopping_id = category_directory.system_id('Shopping')
+        bills_id = category_directory.system_id('Bills & Utilities')
+        salary_id = category_directory.system_id('Salary')
         
         # Sample transactions for last 3 months
         today = datetime.now().date()
@@ -44,23 +45,23 @@ def add_sample_data(user_email):
         transactions.extend([
             # Income
             Transaction(user_id=user.id, type='income', amount=Decimal('5000.00'), 
-                       category_id=salary_cat.id, description='Monthly Salary',
+                       category_id=salary_id, description='Monthly Salary',
                        transaction_date=month1_start, merchant='Company Inc'),
             # Expenses
             Transaction(user_id=user.id, type='expense', amount=Decimal('1200.00'),
-                       category_id=bills_cat.id, description='Rent',
+                       category_id=bills_id, description='Rent',
                        transaction_date=month1_start + timedelta(days=1), merchant='Landlord'),
             Transaction(user_id=user.id, type='expense', amount=Decimal('150.00'),
-                       category_id=bills_cat.id, description='Electricity Bill',
+                       category_id=bills_id, description='Electricity Bill',
                        transaction_date=month1_start + timedelta(days=5), merchant='Power Company'),
             Transaction(user_id=user.id, type='expense', amount=Decimal('80.00'),
-                       category_id=transport_cat.id, description='Gas',
+                       category_id=transport_id, description='Gas',
                        transaction_date=month1_start + timedelta(days=7), merchant='Gas Station'),
             Transaction(user_id=user.id, type='expense', amount=Decimal('250.00'),
-                       category_id=food_cat.id, description='Groceries',
+                       category_id=food_id, description='Groceries',
                        transaction_date=month1_start + timedelta(days=10), merchant='Supermarket'),
             Transaction(user_id=user.id, type='expense', amount=Decimal('120.00'),
-                       category_id=shopping_cat.id, description='Clothes',
+                       category_id=shopping_id, description='Clothes',
                        transaction_date=month1_start + timedelta(days=15), merchant='Fashion Store'),
         ])
         
@@ -69,23 +70,23 @@ def add_sample_data(user_email):
         transactions.extend([
             # Income
             Transaction(user_id=user.id, type='income', amount=Decimal('5000.00'),
-                       category_id=salary_cat.id, description='Monthly Salary',
+                       category_id=salary_id, description='Monthly Salary',
                        transaction_date=month2_start, merchant='Company Inc'),
             # Expenses
             Transaction(user_id=user.id, type='expense', amount=Decimal('1200.00'),
-                       category_id=bills_cat.id, description='Rent',
+                       category_id=bills_id, description='Rent',
                        transaction_date=month2_start + timedelta(days=1), merchant='Landlord'),
             Transaction(user_id=user.id, type='expense', amount=Decimal('160.00'),
-                       category_id=bills_cat.id, description='Electricity Bill',
+                       category_id=bills_id, description='Electricity Bill',
                        transaction_date=month2_start + timedelta(days=5), merchant='Power Company'),
             Transaction(user_id=user.id, type='expense', amount=Decimal('90.00'),
-                       category_id=transport_cat.id, description='Gas',
+                       category_id=transport_id, description='Gas',
                        transaction_date=month2_start + timedelta(days=7), merchant='Gas Station'),
             Transaction(user_id=user.id, type='expense', amount=Decimal('280.00'),
-                       category_id=food_cat.id, description='Groceries',
+                       category_id=food_id, description='Groceries',
                        transaction_date=month2_start + timedelta(days=10), merchant='Supermarket'),
             Transaction(user_id=user.id, type='expense', amount=Decimal('200.00'),
-                       category_id=shopping_cat.id, description='Electronics',
+                       category_id=shopping_id, description='Electronics',
                        transaction_date=month2_start + timedelta(days=15), merchant='Tech Store'),
         ])
         
@@ -94,28 +95,29 @@ def add_sample_data(user_email):
         transactions.extend([
             # Income
             Transaction(user_id=user.id, type='income', amount=Decimal('5000.00'),
-                       category_id=salary_cat.id, description='Monthly Salary',
+                       category_id=salary_id, description='Monthly Salary',
                        transaction_date=month3_start, merchant='Company Inc'),
             # Expenses
             Transaction(user_id=user.id, type='expense', amount=Decimal('1200.00'),
-                       category_id=bills_cat.id, description='Rent',
+                       category_id=bills_id, description='Rent',
                        transaction_date=month3_start + timedelta(days=1), merchant='Landlord'),
             Transaction(user_id=user.id, type='expense', amount=Decimal('170.00'),
-                       category_id=bills_cat.id, description='Electricity Bill',
+                       category_id=bills_id, description='Electricity Bill',
                        transaction_date=month3_start + timedelta(days=5), merchant='Power Company'),
             Transaction(user_id=user.id, type='expense', amount=Decimal('100.00'),
-                       category_id=transport_cat.id, description='Gas',
+                       category_id=transport_id, description='Gas',
                        transaction_date=month3_start + timedelta(days=7), merchant='Gas Station'),
             Transaction(user_id=user.id, type='expense', amount=Decimal('300.00'),
-                       category_id=food_cat.id, description='Groceries',
+                       category_id=food_id, description='Groceries',
                        transaction_date=month3_start + timedelta(days=10), merchant='Supermarket'),
             Transaction(user_id=user.id, type='expense', amount=Decimal('150.00'),
-                       category_id=shopping_cat.id, description='Books',
+                       category_id=shopping_id, description='Books',
                        transaction_date=month3_start + timedelta(days=15), merchant='Bookstore'),
         ])
         
         # Add all transactions
         for transaction in transactions:
+            transaction.refresh_fingerprint()
             db.session.add(transaction)
         
         try:
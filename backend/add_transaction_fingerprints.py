@@ -0,0 +1,115 @@
+"""
+Add duplicate-detection fingerprints to existing transactions
+Run: python add_transaction_fingerprints.py
+"""
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from database.models import db, Transaction, transaction_fingerprint
+
+BATCH_SIZE = 1000
+
+# (table, column, definition) added if missing
+NEW_COLUMNS = [
+    ('transactions', 'fingerprint', 'VARCHAR(64)'),
+    ('staged_transactions', 'fingerprint', 'VARCHAR(64)'),
+    ('staged_transactions', 'is_duplicate', 'BOOLEAN DEFAULT FALSE'),
+]
+
+
+def add_columns(inspector):
+    """Add fingerprint columns and index if missing"""
+    from sqlalchemy import text
+    tables = inspector.get_table_names()
+    
+    for table, column, definition in NEW_COLUMNS:
+        if table not in tables:
+            continue
+        columns = [col['name'] for col in inspector.get_columns(table)]
+        if column not in columns:
+            print(f"✓ Adding {table}.{column} column...")
+            db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+        else:
+            print(f"✓ {table}.{column} column already exists")
+    
+    indexes = [idx['name'] for idx in inspector.get_indexes('transactions')]
+    if 'ix_transactions_fingerprint' not in indexes:
+        print("✓ Adding index ix_transactions_fingerprint...")
+        db.session.execute(text("CREATE INDEX ix_transactions_fingerprint ON transactions (fingerprint)"))
+    
+    db.session.commit()
+
+
+def backfill_fingerprints():
+    """Compute fingerprints for transactions that don't have one"""
+    from sqlalchemy import update, bindparam
+    total = 0
+    last_id = 0
+    
+    while True:
+        rows = db.session.query(
+            Transaction.id, Transaction.user_id, Transaction.transaction_date,
+            Transaction.amount, Transaction.description
+        ).filter(
+            Transaction.fingerprint.is_(None),
+            Transaction.id > last_id
+        ).order_by(Transaction.id).limit(BATCH_SIZE).all()
+        
+        if not rows:
+            break
+        
+        db.session.execute(
+            update(Transaction.__table__)
+            .where(Transaction.__table__.c.id == bindparam('row_id'))
+            .values(fingerprint=bindparam('row_fingerprint')),
+            [
+                {
+                    'row_id': row.id,
+                    'row_fingerprint': transaction_fingerprint(
+                        row.user_id, row.transaction_date, row.amount, row.description
+                    )
+                }
+                for row in rows
+            ]
+        )
+        db.session.commit()
+        
+        total += len(rows)
+        last_id = rows[-1].id
+        print(f"  {total} transactions updated...")
+    
+    return total
+
+
+def add_transaction_fingerprints():
+    """Add fingerprint columns and backfill them"""
+    
+    print("=" * 60)
+    print("Adding Transaction Fingerprints")
+    print("=" * 60)
+    
+    app = create_app()
+    
+    with app.app_context():
+        try:
+            from sqlalchemy import inspect
+            add_columns(inspect(db.engine))
+            
+            print("\n✓ Backfilling fingerprints...")
+            total = backfill_fingerprints()
+            
+            print("\n" + "=" * 60)
+            print(f"✅ SUCCESS! {total} transactions fingerprinted")
+            print("=" * 60)
+            print()
+        
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n❌ Error: {e}")
+
+if __name__ == "__main__":
+    add_transaction_fingerprints()
@@ -0,0 +1,78 @@
+"""
+Add upload tracking fields to file_uploads table
+Run: python add_upload_fields.py
+"""
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from database.models import db
+
+# (column, definition) pairs added to file_uploads if missing
+NEW_COLUMNS = [
+    ('content_hash', 'VARCHAR(64)'),
+    ('duplicate_of_id', 'INTEGER REFERENCES file_uploads(id)'),
+    ('progress', 'INTEGER DEFAULT 0'),
+]
+
+# (index name, column) pairs created if missing
+NEW_INDEXES = [
+    ('ix_file_uploads_content_hash', 'content_hash'),
+]
+
+
+def add_upload_fields():
+    """Add missing file_uploads columns and indexes"""
+    
+    print("=" * 60)
+    print("Adding Upload Tracking Fields to Database")
+    print("=" * 60)
+    
+    app = create_app()
+    
+    with app.app_context():
+        try:
+            from sqlalchemy import inspect, text
+            inspector = inspect(db.engine)
+            columns = [col['name'] for col in inspector.get_columns('file_uploads')]
+            indexes = [idx['name'] for idx in inspector.get_indexes('file_uploads')]
+            
+            print(f"\nCurrent columns: {columns}")
+            
+            for column, definition in NEW_COLUMNS:
+                if column not in columns:
+                    print(f"\n✓ Adding {column} column...")
+                    db.session.execute(text(
+                        f"ALTER TABLE file_uploads ADD COLUMN {column} {definition}"
+                    ))
+                    print(f"  ✅ {column} added")
+                else:
+                    print(f"\n✓ {column} column already exists")
+            
+            for index, column in NEW_INDEXES:
+                if index not in indexes:
+                    print(f"\n✓ Adding index {index}...")
+                    db.session.execute(text(
+                        f"CREATE INDEX {index} ON file_uploads ({column})"
+                    ))
+                    print(f"  ✅ {index} added")
+                else:
+                    print(f"\n✓ {index} index already exists")
+            
+            db.session.commit()
+            
+            print("\n" + "=" * 60)
+            print("✅ SUCCESS! Upload fields added to database")
+            print("=" * 60)
+            print()
+        
+        except Exception as e:
+            db.session.rollback()
+            print(f"\n❌ Error: {e}")
+            print("\nIf columns already exist, this is normal.")
+
+if __name__ == "__main__":
+    add_upload_fields()
@@ -4,6 +4,7 @@ Budget API Routes
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from database.models import db, Budget
+from services.budget_tracker import budget_tracker
 from datetime import datetime
 
 budgets_bp = Blueprint('budgets', __name__)
@@ -24,6 +25,36 @@ def get_budgets():
         return jsonify({'error': str(e)}), 500
 
 
+@budgets_bp.route('/status', methods=['GET'])
+@jwt_required()
+def get_budget_status():
+    """
+    Get spending against every budget over its current period
+    
+    Query params:
+        date: Day whose period to report (YYYY-MM-DD), defaults to today
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        day = request.args.get('date')
+        try:
+            today = datetime.fromisoformat(day).date() if day else None
+        except ValueError:
+            return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+        
+        budgets = budget_tracker.status(user_id, today)
+        
+        return jsonify({
+            'budgets': budgets,
+            'over_budget': sum(1 for b in budgets if b['status'] == 'over'),
+            'total_budgeted': round(sum(b['amount'] for b in budgets if b['status'] != 'upcoming'), 2),
+            'total_spent': round(sum(b['spent'] for b in budgets), 2)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @budgets_bp.route('', methods=['POST'])
 @jwt_required()
 def create_budget():
@@ -5,6 +5,8 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from database.models import db, Category, Transaction
 from ml.risk_calculator import risk_calculator
+from services.category_directory import category_directory
+from services.category_overlays import category_overlays
 
 categories_bp = Blueprint('categories', __name__)
 
@@ -15,16 +17,9 @@ def get_categories():
     try:
         user_id = int(get_jwt_identity())
         
-        # Get system categories
-        system_categories = Category.query.filter_by(is_system=True, user_id=None).all()
-        
-        # Get user custom categories
-        user_categories = Category.query.filter_by(user_id=user_id, is_system=False).all()
-        
-        all_categories = system_categories + user_categories
-        
+        # System categories followed by the user's custom categories
         return jsonify({
-            'categories': [c.to_dict() for c in all_categories]
+            'categories': category_directory.categories(user_id)
         }), 200
         
     except Exception as e:
@@ -55,6 +50,7 @@ def create_category():
         
         db.session.add(category)
         db.session.commit()
+        category_directory.invalidate(user_id)
         
         return jsonify({
             'message': 'Category created successfully',
@@ -88,6 +84,7 @@ def update_category(category_id):
             category.color = data['color']
         
         db.session.commit()
+        category_directory.invalidate(user_id)
         
         return jsonify({
             'message': 'Category updated successfully',
@@ -112,6 +109,8 @@ def delete_category(category_id):
         
         db.session.delete(category)
         db.session.commit()
+        category_directory.invalidate(user_id)
+        category_overlays.invalidate(user_id)
         
         return jsonify({'message': 'Category deleted successfully'}), 200
         
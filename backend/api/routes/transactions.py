@@ -3,8 +3,12 @@ Transaction API Routes
 """
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from database.models import db, Transaction, Category
+from database.models import db, Transaction, transaction_fingerprint
 from ml.categorizer import categorizer
+from ml.online_learner import online_learner
+from services.category_directory import category_directory
+from services.category_overlays import category_overlays
+from services.merchant_resolver import merchant_resolver
 from datetime import datetime
 
 transactions_bp = Blueprint('transactions', __name__)
@@ -52,7 +56,12 @@ def get_transactions():
 @transactions_bp.route('', methods=['POST'])
 @jwt_required()
 def create_transaction():
-    """Create a new transaction"""
+    """
+    Create a new transaction
+    
+    Returns 409 if the same transaction already exists, unless the body sets
+    allow_duplicate: true
+    """
     try:
         user_id = int(get_jwt_identity())
         data = request.get_json()
@@ -61,24 +70,40 @@ def create_transaction():
         if not data.get('amount') or not data.get('type') or not data.get('transaction_date'):
             return jsonify({'error': 'Missing required fields'}), 400
         
+        transaction_date = datetime.fromisoformat(data['transaction_date']).date()
+        fingerprint = transaction_fingerprint(
+            user_id, transaction_date, data['amount'], data.get('description')
+        )
+        
+        if not data.get('allow_duplicate'):
+            existing = Transaction.query.filter_by(user_id=user_id, fingerprint=fingerprint).first()
+            if existing:
+                return jsonify({
+                    'error': 'Transaction already exists',
+                    'duplicate_of': existing.to_dict()
+                }), 409
+        
         # Auto-categorize if not provided and type is expense
         category_id = data.get('category_id')
         if not category_id and data['type'] == 'expense':
             try:
-                category_name, confidence = categorizer.categorize(
-                    data.get('description', ''),
-                    data.get('merchant', '')
+                # The user's own choice for this merchant wins over the model
+                override = category_overlays.category_for(
+                    user_id, data.get('description'), data.get('merchant')
                 )
-                # Find category by name
-                category = Category.query.filter_by(name=category_name, is_system=True).first()
-                if category:
-                    category_id = category.id
+                if override:
+                    category_id = override['id']
+                else:
+                    category_name, confidence = categorizer.categorize(
+                        data.get('description', ''),
+                        data.get('merchant', '')
+                    )
+                    # Find category by name
+                    category_id = category_directory.system_id(category_name)
             except Exception as cat_error:
                 print(f"Categorization failed: {cat_error}")
                 # Use default category if categorization fails
-                default_cat = Category.query.filter_by(name='Others', is_system=True).first()
-                if default_cat:
-                    category_id = default_cat.id
+                category_id = category_directory.system_id('Others')
         
         # Create transaction
         transaction = Transaction(
@@ -87,10 +112,12 @@ def create_transaction():
             amount=data['amount'],
             category_id=category_id,
             description=data.get('description'),
-            transaction_date=datetime.fromisoformat(data['transaction_date']).date(),
+            transaction_date=transaction_date,
             merchant=data.get('merchant'),
+            merchant_id=merchant_resolver.resolve(data.get('merchant')),
             payment_method=data.get('payment_method'),
-            is_recurring=data.get('is_recurring', False)
+            is_recurring=data.get('is_recurring', False),
+            fingerprint=fingerprint
         )
         
         db.session.add(transaction)
@@ -137,6 +164,7 @@ def update_transaction(transaction_id):
             return jsonify({'error': 'Transaction not found'}), 404
         
         data = request.get_json()
+        previous_category_id = transaction.category_id
         
         # Update fields
         if 'amount' in data:
@@ -151,13 +179,26 @@ def update_transaction(transaction_id):
             transaction.transaction_date = datetime.fromisoformat(data['transaction_date']).date()
         if 'merchant' in data:
             transaction.merchant = data['merchant']
+            transaction.merchant_id = merchant_resolver.resolve(data['merchant'])
         if 'payment_method' in data:
             transaction.payment_method = data['payment_method']
         if 'is_recurring' in data:
             transaction.is_recurring = data['is_recurring']
         
+        transaction.refresh_fingerprint()
+        
+        # Remember the user's correction for this merchant and teach it to the categorizer
+        category = None
+        if transaction.category_id and transaction.category_id != previous_category_id:
+            category = category_directory.get(transaction.category_id, user_id)
+            if category:
+                category_overlays.learn(user_id, [(transaction.description, transaction.merchant, category['id'])])
+        
         db.session.commit()
         
+        if category:
+            online_learner.record(user_id, transaction.description, transaction.merchant, category['name'])
+        
         return jsonify({
             'message': 'Transaction updated successfully',
             'transaction': transaction.to_dict()
@@ -3,24 +3,40 @@ File Upload API Routes
 Handles file upload, processing, and transaction import
 """
 import os
-import uuid
+import time
 from datetime import datetime
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
+from sqlalchemy import insert
 
-from database.models import db, Transaction, Category, FileUpload
+from database.models import db, Transaction, FileUpload, StatementLayout, transaction_fingerprint
 from services.file_processor import file_processor
 from services.data_cleaner import data_cleaner
+from services.layout_registry import layout_registry
+from services.upload_store import upload_store
+from services.upload_jobs import upload_jobs
+from services.upload_pipeline import upload_pipeline
+from services.upload_staging import upload_staging
+from services.duplicate_detector import duplicate_detector
+from services.category_directory import category_directory
+from services.category_overlays import category_overlays
+from services.merchant_resolver import merchant_resolver
+from ml.online_learner import online_learner
 from ml.categorizer import categorizer
 
 upload_bp = Blueprint('upload', __name__)
 
 # Configuration
-UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'xls', 'pdf'}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
+# CSV files above MAX_FILE_SIZE are streamed from disk in chunks instead of read into memory
+MAX_STREAM_FILE_SIZE = int(os.getenv('MAX_STREAM_FILE_SIZE_MB', 1024)) * 1024 * 1024
+
+# Rows per executemany batch when saving confirmed transactions
+CONFIRM_INSERT_CHUNK_SIZE = 1000
+
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
@@ -28,10 +44,55 @@ def allowed_file(filename):
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def ensure_upload_folder():
-    """Ensure upload folder exists"""
-    if not os.path.exists(UPLOAD_FOLDER):
-        os.makedirs(UPLOAD_FOLDER)
+def is_async_request():
+    """Check if the client asked for background processing (?async=1)"""
+    value = request.args.get('async') or request.form.get('async') or ''
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def include_transactions():
+    """Check if the client wants the extracted rows inline (default) or via /preview"""
+    value = request.args.get('include_transactions') or request.form.get('include_transactions') or '1'
+    return value.lower() not in ('0', 'false', 'no')
+
+
+def build_upload_response(file_upload, result, message):
+    """
+    Response body for a processed upload
+    
+    Streamed uploads only carry their first rows; staged_count is the total
+    and the preview endpoint pages through the rest.
+    """
+    response = {
+        'message': message,
+        'upload_id': file_upload.id,
+        'staged_count': result.get('staged_count', len(result['transactions'])),
+        'preview_url': f'/api/upload/{file_upload.id}/preview',
+        'summary': {
+            **result['cleaning'],
+            'existing_duplicates': result.get(
+                'existing_duplicates',
+                sum(1 for t in result['transactions'] if t.get('is_duplicate'))
+            ),
+            'file_type': file_upload.file_type,
+            'original_filename': file_upload.original_filename
+        }
+    }
+    
+    if file_upload.duplicate_of_id:
+        response['duplicate_of'] = file_upload.duplicate_of_id
+    if include_transactions():
+        response['transactions'] = result['transactions']
+    
+    return response
+
+
+def get_upload_size(file):
+    """Get size of an uploaded file without reading it into memory"""
+    file.stream.seek(0, os.SEEK_END)
+    size = file.stream.tell()
+    file.stream.seek(0)
+    return size
 
 
 @upload_bp.route('', methods=['POST'])
@@ -41,7 +102,10 @@ def upload_file():
     Upload and process a bank statement file
     
     Accepts: CSV, Excel (.xlsx, .xls), PDF files
-    Returns: Processing results with extracted transactions
+    Query: async=1 to process in the background,
+           include_transactions=0 to leave the rows to the preview endpoint
+    Returns: Processing results with extracted transactions, or 202 with the
+             upload_id to poll in async mode
     """
     try:
         user_id = int(get_jwt_identity())
@@ -60,125 +124,142 @@ def upload_file():
                 'error': f'Invalid file type. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}'
             }), 400
         
-        # Read file content
-        file_content = file.read()
+        # Determine file type
+        original_filename = secure_filename(file.filename)
+        file_type = file_processor.get_file_type(original_filename)
         
-        # Check file size
-        if len(file_content) > MAX_FILE_SIZE:
+        # Check file size - large CSVs are streamed instead of rejected
+        file_size = get_upload_size(file)
+        stream = file_type == 'csv' and file_size > MAX_FILE_SIZE
+        max_size = MAX_STREAM_FILE_SIZE if file_type == 'csv' else MAX_FILE_SIZE
+        
+        if file_size > max_size:
             return jsonify({
-                'error': f'File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB'
+                'error': f'File too large. Maximum size: {max_size // (1024*1024)}MB'
             }), 400
         
-        # Generate unique filename
-        original_filename = secure_filename(file.filename)
+        # Store the file under its content hash - identical bytes are kept once
         file_ext = original_filename.rsplit('.', 1)[1].lower()
-        unique_filename = f"{uuid.uuid4().hex}_{original_filename}"
+        if stream:
+            content_hash, stored_filename = upload_store.save_stream(file.stream, file_ext)
+        else:
+            file_content = file.read()
+            content_hash, stored_filename = upload_store.save_bytes(file_content, file_ext)
         
-        # Determine file type
-        file_type = file_processor.get_file_type(original_filename)
+        # Same file uploaded by this user before: answer from the cached result
+        previous_upload = FileUpload.query.filter_by(
+            user_id=user_id,
+            content_hash=content_hash,
+            status='completed',
+            duplicate_of_id=None
+        ).order_by(FileUpload.created_at.desc()).first()
+        
+        cached_result = upload_store.load_result(stored_filename) if previous_upload else None
+        
+        if cached_result:
+            file_upload = FileUpload(
+                user_id=user_id,
+                filename=stored_filename,
+                original_filename=original_filename,
+                file_type=file_type,
+                file_size=file_size,
+                content_hash=content_hash,
+                duplicate_of_id=previous_upload.id,
+                status='completed',
+                transactions_count=len(cached_result['transactions']),
+                processing_details=previous_upload.processing_details,
+                layout_fingerprint=previous_upload.layout_fingerprint,
+                processed_at=datetime.utcnow()
+            )
+            db.session.add(file_upload)
+            db.session.flush()
+            duplicate_detector.flag(user_id, cached_result['transactions'])
+            category_overlays.apply(user_id, cached_result['transactions'])
+            upload_staging.stage(file_upload.id, user_id, cached_result['transactions'])
+            db.session.commit()
+            
+            return jsonify(build_upload_response(
+                file_upload, cached_result, 'File already processed, returning previous results'
+            )), 200
+        
+        if previous_upload:
+            # Streamed files have no cached result: copy the earlier upload's staged
+            # rows instead of reprocessing the file. Once it was confirmed nothing
+            # is left to copy, as every row of the file has been imported
+            file_upload = FileUpload(
+                user_id=user_id,
+                filename=stored_filename,
+                original_filename=original_filename,
+                file_type=file_type,
+                file_size=file_size,
+                content_hash=content_hash,
+                duplicate_of_id=previous_upload.id,
+                status='completed',
+                processing_details=previous_upload.processing_details,
+                layout_fingerprint=previous_upload.layout_fingerprint,
+                processed_at=datetime.utcnow()
+            )
+            db.session.add(file_upload)
+            db.session.flush()
+            file_upload.transactions_count = upload_staging.copy(previous_upload.id, file_upload.id, user_id)
+            db.session.commit()
+            
+            if file_upload.transactions_count:
+                return jsonify(build_upload_response(
+                    file_upload, staged_upload_result(file_upload), 'File already processed, returning previous results'
+                )), 200
+            
+            return jsonify(build_upload_response(file_upload, {
+                'transactions': [],
+                'staged_count': 0,
+                'existing_duplicates': previous_upload.transactions_count,
+                'cleaning': (previous_upload.processing_details or {}).get('cleaning', {})
+            }, 'File already imported, nothing new to confirm')), 200
         
         # Create upload record
         file_upload = FileUpload(
             user_id=user_id,
-            filename=unique_filename,
+            filename=stored_filename,
             original_filename=original_filename,
             file_type=file_type,
-            file_size=len(file_content),
-            status='processing'
+            file_size=file_size,
+            content_hash=content_hash,
+            status='pending'
         )
         db.session.add(file_upload)
         db.session.commit()
         
-        try:
-            # Save file (optional - for debugging)
-            ensure_upload_folder()
-            file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
-            with open(file_path, 'wb') as f:
-                f.write(file_content)
-            
-            # Process file
-            raw_transactions, processing_details = file_processor.process_file(
-                file_content, original_filename
-            )
-            
-            if not raw_transactions:
-                file_upload.status = 'failed'
-                file_upload.error_message = 'No transactions found in file'
-                file_upload.processing_details = processing_details
-                db.session.commit()
-                return jsonify({
-                    'error': 'No transactions could be extracted from the file',
-                    'details': processing_details
-                }), 400
-            
-            # Clean transactions
-            cleaned_transactions = data_cleaner.clean_transactions(raw_transactions)
-            cleaning_summary = data_cleaner.get_cleaning_summary(
-                raw_transactions, cleaned_transactions
-            )
-            
-            if not cleaned_transactions:
-                file_upload.status = 'failed'
-                file_upload.error_message = 'No valid transactions after cleaning'
-                file_upload.processing_details = {
-                    'processing': processing_details,
-                    'cleaning': cleaning_summary
-                }
-                db.session.commit()
-                return jsonify({
-                    'error': 'No valid transactions after data cleaning',
-                    'details': cleaning_summary
-                }), 400
-            
-            # Categorize transactions
-            categorized_transactions = []
-            for trans in cleaned_transactions:
-                # Auto-categorize
-                category_name, confidence = categorizer.categorize(
-                    trans.get('description'),
-                    trans.get('merchant')
-                )
-                
-                # Find category by name
-                category = Category.query.filter_by(
-                    name=category_name, 
-                    is_system=True
-                ).first()
-                
-                categorized_transactions.append({
-                    **trans,
-                    'suggested_category': category_name,
-                    'category_id': category.id if category else None,
-                    'category_confidence': round(confidence, 2)
-                })
-            
-            # Update upload record
-            file_upload.status = 'completed'
-            file_upload.transactions_count = len(categorized_transactions)
-            file_upload.processed_at = datetime.utcnow()
-            file_upload.processing_details = {
-                'processing': processing_details,
-                'cleaning': cleaning_summary
-            }
-            db.session.commit()
-            
+        # Async mode: hand the stored file to the worker pool and return at once
+        if is_async_request():
+            upload_jobs.submit(current_app._get_current_object(), file_upload.id, stream)
             return jsonify({
-                'message': 'File processed successfully',
+                'message': 'File accepted for processing',
                 'upload_id': file_upload.id,
-                'transactions': categorized_transactions,
-                'summary': {
-                    **cleaning_summary,
-                    'file_type': file_type,
-                    'original_filename': original_filename
-                }
-            }), 200
-            
-        except Exception as e:
-            file_upload.status = 'failed'
-            file_upload.error_message = str(e)
-            db.session.commit()
-            raise
-            
+                'status': file_upload.status,
+                'status_url': f'/api/upload/{file_upload.id}/status',
+                'result_url': f'/api/upload/{file_upload.id}/result'
+            }), 202
+        
+        result = upload_jobs.process(
+            file_upload,
+            file_content=None if stream else file_content,
+            stream=stream
+        )
+        
+        if not result['raw_count']:
+            return jsonify({
+                'error': 'No transactions could be extracted from the file',
+                'details': result['processing']
+            }), 400
+        
+        if not result['staged_count']:
+            return jsonify({
+                'error': 'No valid transactions after data cleaning',
+                'details': result['cleaning']
+            }), 400
+        
+        return jsonify(build_upload_response(file_upload, result, 'File processed successfully')), 200
+        
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
@@ -192,6 +273,19 @@ def confirm_transactions():
     """
     Confirm and save extracted transactions to database
     
+    Rows that already exist for the user are skipped unless allow_duplicates
+    is true, or, for staged rows, their row is listed in allow_duplicate_rows.
+    
+    Staged rows (kept server-side since upload):
+    Body: {
+        upload_id: int,
+        exclude: [int] (optional, rows to skip),
+        edits: [{row: int, category_id, type, amount, ...}] (optional),
+        allow_duplicates: bool (optional),
+        allow_duplicate_rows: [int] (optional, duplicate rows to import anyway)
+    }
+    
+    Full list posted back by the client:
     Body: {
         upload_id: int,
         transactions: [
@@ -204,13 +298,17 @@ def confirm_transactions():
                 category_id: int (optional),
                 is_recurring: bool (optional)
             }
-        ]
+        ],
+        allow_duplicates: bool (optional)
     }
     """
     try:
         user_id = int(get_jwt_identity())
         data = request.get_json()
         
+        if 'transactions' not in data:
+            return confirm_staged_transactions(user_id, data)
+        
         upload_id = data.get('upload_id')
         transactions = data.get('transactions', [])
         
@@ -226,47 +324,39 @@ def confirm_transactions():
             if not file_upload:
                 return jsonify({'error': 'Upload not found'}), 404
         
-        # Save transactions
-        saved_count = 0
-        errors = []
-        
-        for idx, trans in enumerate(transactions):
-            try:
-                # Validate required fields
-                if not trans.get('amount') or not trans.get('transaction_date'):
-                    errors.append(f"Row {idx + 1}: Missing required fields")
-                    continue
-                
-                # Parse date
-                trans_date = trans.get('transaction_date')
-                if isinstance(trans_date, str):
-                    trans_date = datetime.fromisoformat(trans_date.replace('Z', '')).date()
-                
-                # Create transaction
-                transaction = Transaction(
-                    user_id=user_id,
-                    type=trans.get('type', 'expense'),
-                    amount=float(trans['amount']),
-                    category_id=trans.get('category_id'),
-                    description=trans.get('description', ''),
-                    transaction_date=trans_date,
-                    merchant=trans.get('merchant', ''),
-                    payment_method=trans.get('payment_method', 'bank_transfer'),
-                    is_recurring=trans.get('is_recurring', False)
-                )
-                
-                db.session.add(transaction)
-                saved_count += 1
-                
-            except Exception as e:
-                errors.append(f"Row {idx + 1}: {str(e)}")
+        # Validate into plain rows, then insert them in chunks
+        started = time.perf_counter()
+        rows, errors = build_transaction_rows(user_id, transactions)
         
+        skipped_duplicates = 0
+        if not data.get('allow_duplicates'):
+            existing = duplicate_detector.existing_fingerprints(user_id, [r['fingerprint'] for r in rows])
+            if existing:
+                new_rows = [r for r in rows if r['fingerprint'] not in existing]
+                skipped_duplicates = len(rows) - len(new_rows)
+                rows = new_rows
+        validated = time.perf_counter()
+        
+        saved_count = insert_transaction_rows(rows)
+        inserted = time.perf_counter()
+        
+        # The posted list replaces the staged rows, which must not be confirmed again
+        if upload_id:
+            upload_staging.clear(upload_id)
+        
+        learn_category_corrections(user_id, category_corrections(user_id, transactions))
         db.session.commit()
         
         return jsonify({
             'message': f'Successfully saved {saved_count} transactions',
             'saved_count': saved_count,
-            'errors': errors if errors else None
+            'skipped_duplicates': skipped_duplicates,
+            'errors': errors if errors else None,
+            'timings_ms': {
+                'validate': round((validated - started) * 1000, 2),
+                'insert': round((inserted - validated) * 1000, 2),
+                'total': round((time.perf_counter() - started) * 1000, 2)
+            }
         }), 201
         
     except Exception as e:
@@ -274,6 +364,319 @@ def confirm_transactions():
         return jsonify({'error': str(e)}), 500
 
 
+def build_transaction_rows(user_id, transactions):
+    """
+    Validate posted transactions into rows for the transactions table
+    
+    Returns:
+        Tuple of (rows, errors), errors naming the 1-based row they came from
+    """
+    rows = []
+    errors = []
+    
+    for idx, trans in enumerate(transactions):
+        try:
+            # Validate required fields
+            if not trans.get('amount') or not trans.get('transaction_date'):
+                errors.append(f"Row {idx + 1}: Missing required fields")
+                continue
+            
+            # Parse date
+            trans_date = trans.get('transaction_date')
+            if isinstance(trans_date, str):
+                trans_date = datetime.fromisoformat(trans_date.replace('Z', '')).date()
+            
+            amount = float(trans['amount'])
+            description = trans.get('description', '')
+            
+            rows.append({
+                'user_id': user_id,
+                'type': trans.get('type', 'expense'),
+                'amount': amount,
+                'category_id': trans.get('category_id'),
+                'description': description,
+                'transaction_date': trans_date,
+                'merchant': trans.get('merchant', ''),
+                'payment_method': trans.get('payment_method', 'bank_transfer'),
+                'is_recurring': trans.get('is_recurring', False),
+                'fingerprint': transaction_fingerprint(user_id, trans_date, amount, description)
+            })
+            
+        except Exception as e:
+            errors.append(f"Row {idx + 1}: {str(e)}")
+    
+    merchant_ids = merchant_resolver.resolve_many([row['merchant'] for row in rows])
+    for row, merchant_id in zip(rows, merchant_ids):
+        row['merchant_id'] = merchant_id
+    
+    return rows, errors
+
+
+def category_corrections(user_id, transactions):
+    """(description, merchant, category_id, category name) of posted rows whose category differs from the suggestion"""
+    corrections = []
+    for trans in transactions:
+        suggested = trans.get('suggested_category')
+        category = category_directory.get(trans.get('category_id'), user_id) if suggested else None
+        if category and category['name'] != suggested:
+            corrections.append((trans.get('description'), trans.get('merchant'), category['id'], category['name']))
+    return corrections
+
+
+def learn_category_corrections(user_id, corrections):
+    """Keep the user's category choices as merchant overrides and teach them to the categorizer"""
+    category_overlays.learn(user_id, [(d, m, category_id) for d, m, category_id, _ in corrections])
+    for description, merchant, _, category_name in corrections:
+        online_learner.record(user_id, description, merchant, category_name)
+
+
+def insert_transaction_rows(rows):
+    """Insert transaction rows with one executemany per chunk, bypassing the ORM unit of work"""
+    for start in range(0, len(rows), CONFIRM_INSERT_CHUNK_SIZE):
+        db.session.execute(
+            insert(Transaction.__table__),
+            rows[start:start + CONFIRM_INSERT_CHUNK_SIZE]
+        )
+    return len(rows)
+
+
+def confirm_staged_transactions(user_id, data):
+    """Promote an upload's staged rows, applying the client's exclusions and edits"""
+    upload_id = data.get('upload_id')
+    exclude = data.get('exclude') or []
+    edits = data.get('edits') or []
+    allow_rows = data.get('allow_duplicate_rows') or []
+    
+    if not upload_id:
+        return jsonify({'error': 'upload_id is required'}), 400
+    
+    if not all(isinstance(row, int) for row in exclude):
+        return jsonify({'error': 'exclude must be a list of row numbers'}), 400
+    
+    if not all(isinstance(row, int) for row in allow_rows):
+        return jsonify({'error': 'allow_duplicate_rows must be a list of row numbers'}), 400
+    
+    file_upload = FileUpload.query.filter_by(
+        id=upload_id,
+        user_id=user_id
+    ).first()
+    if not file_upload:
+        return jsonify({'error': 'Upload not found'}), 404
+    
+    if not upload_staging.count(upload_id):
+        return jsonify({'error': 'No staged transactions for this upload'}), 400
+    
+    started = time.perf_counter()
+    errors = upload_staging.apply_edits(upload_id, user_id, edits)
+    corrections = upload_staging.corrections(upload_id, exclude)
+    edited = time.perf_counter()
+    saved_count, skipped_duplicates = upload_staging.promote(
+        upload_id, user_id, exclude,
+        skip_duplicates=not data.get('allow_duplicates'),
+        allow_rows=allow_rows
+    )
+    inserted = time.perf_counter()
+    
+    if not saved_count and not skipped_duplicates:
+        db.session.rollback()
+        return jsonify({'error': 'No transactions to save'}), 400
+    
+    learn_category_corrections(user_id, corrections)
+    db.session.commit()
+    
+    return jsonify({
+        'message': f'Successfully saved {saved_count} transactions',
+        'saved_count': saved_count,
+        'skipped_duplicates': skipped_duplicates,
+        'errors': errors if errors else None,
+        'timings_ms': {
+            'edit': round((edited - started) * 1000, 2),
+            'insert': round((inserted - edited) * 1000, 2),
+            'total': round((time.perf_counter() - started) * 1000, 2)
+        }
+    }), 201
+
+
+@upload_bp.route('/<int:upload_id>/preview', methods=['GET'])
+@jwt_required()
+def preview_upload(upload_id):
+    """
+    Get a page of an upload's staged transactions
+    
+    Query: page (default 1), per_page (default 50, max 500)
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 50, type=int), 1), 500)
+        
+        file_upload = FileUpload.query.filter_by(
+            id=upload_id,
+            user_id=user_id
+        ).first()
+        
+        if not file_upload:
+            return jsonify({'error': 'Upload not found'}), 404
+        
+        staged = upload_staging.preview(upload_id, page, per_page)
+        
+        return jsonify({
+            'upload_id': upload_id,
+            'transactions': [t.to_dict() for t in staged.items],
+            'page': page,
+            'per_page': per_page,
+            'total': staged.total,
+            'pages': staged.pages
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@upload_bp.route('/layouts', methods=['GET'])
+@jwt_required()
+def get_layout_stats():
+    """Get statement layout cache hit/miss counts and the user's most used layouts"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        # Layouts hold statement headers, so only those of the user's own uploads are listed
+        user_layouts = db.session.query(FileUpload.layout_fingerprint)\
+            .filter(FileUpload.user_id == user_id, FileUpload.layout_fingerprint.isnot(None))
+        layouts = StatementLayout.query\
+            .filter(StatementLayout.fingerprint.in_(user_layouts))\
+            .order_by(StatementLayout.hit_count.desc())\
+            .limit(20)\
+            .all()
+        
+        return jsonify({
+            'cache': layout_registry.stats(),
+            'layouts': [l.to_dict() for l in layouts]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@upload_bp.route('/normalization-cache', methods=['GET'])
+@jwt_required()
+def get_normalization_cache_stats():
+    """Get hit/miss counts of the description and merchant normalization caches"""
+    try:
+        return jsonify({
+            'descriptions': data_cleaner.description_cache.stats(),
+            'merchants': data_cleaner.merchant_cache.stats(),
+            'extracted_merchants': file_processor.merchant_cache.stats(),
+            'merchant_ids': merchant_resolver.stats()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@upload_bp.route('/categorization-stats', methods=['GET'])
+@jwt_required()
+def get_categorization_stats():
+    """Get merchant dictionary hit rate and the time split between dictionary and model"""
+    try:
+        return jsonify({
+            'dictionary': categorizer.dictionary.stats() if categorizer.dictionary else None,
+            'online_learning': online_learner.stats(),
+            'overlays': category_overlays.stats()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@upload_bp.route('/<int:upload_id>/status', methods=['GET'])
+@jwt_required()
+def get_upload_status(upload_id):
+    """Get processing status and progress of an upload"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        file_upload = FileUpload.query.filter_by(
+            id=upload_id,
+            user_id=user_id
+        ).first()
+        
+        if not file_upload:
+            return jsonify({'error': 'Upload not found'}), 404
+        
+        return jsonify({
+            'upload_id': file_upload.id,
+            'status': file_upload.status,
+            'progress': file_upload.progress or 0,
+            'transactions_count': file_upload.transactions_count,
+            'error_message': file_upload.error_message,
+            'processed_at': file_upload.processed_at.isoformat() if file_upload.processed_at else None
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@upload_bp.route('/<int:upload_id>/result', methods=['GET'])
+@jwt_required()
+def get_upload_result(upload_id):
+    """Get extracted transactions of a completed upload"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        file_upload = FileUpload.query.filter_by(
+            id=upload_id,
+            user_id=user_id
+        ).first()
+        
+        if not file_upload:
+            return jsonify({'error': 'Upload not found'}), 404
+        
+        if file_upload.status == 'failed':
+            return jsonify({
+                'error': file_upload.error_message,
+                'details': file_upload.processing_details
+            }), 400
+        
+        if file_upload.status != 'completed':
+            return jsonify({
+                'error': 'Upload is still being processed',
+                'status': file_upload.status,
+                'progress': file_upload.progress or 0
+            }), 409
+        
+        result = upload_store.load_result(file_upload.filename)
+        if result:
+            # Cached results are shared by identical files, so duplicate flags and
+            # overrides are applied per request
+            duplicate_detector.flag(user_id, result['transactions'])
+            category_overlays.apply(user_id, result['transactions'])
+        else:
+            # Streamed files are not cached; their rows were flagged as they were staged
+            result = staged_upload_result(file_upload)
+            if not result:
+                return jsonify({'error': 'Upload result is no longer available'}), 410
+        
+        return jsonify(build_upload_response(file_upload, result, 'File processed successfully')), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def staged_upload_result(file_upload):
+    """First page of an upload's staged rows in the shape of a pipeline result, or None"""
+    staged = upload_staging.preview(file_upload.id, 1, upload_pipeline.PREVIEW_ROWS)
+    if not staged.total:
+        return None
+    
+    return {
+        'transactions': [t.to_dict() for t in staged.items],
+        'staged_count': staged.total,
+        'existing_duplicates': upload_staging.duplicate_count(file_upload.id),
+        'cleaning': (file_upload.processing_details or {}).get('cleaning', {})
+    }
+
+
 @upload_bp.route('/history', methods=['GET'])
 @jwt_required()
 def get_upload_history():
@@ -309,14 +712,23 @@ def delete_upload(upload_id):
         if not file_upload:
             return jsonify({'error': 'Upload not found'}), 404
         
-        # Delete file if exists
-        file_path = os.path.join(UPLOAD_FOLDER, file_upload.filename)
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        # Delete file unless another upload shares the same stored content
+        shared = FileUpload.query.filter(
+            FileUpload.filename == file_upload.filename,
+            FileUpload.id != file_upload.id
+        ).count()
+        
+        upload_staging.clear(file_upload.id)
+        
+        # Re-uploads pointing at this one no longer have an original
+        FileUpload.query.filter_by(duplicate_of_id=file_upload.id).update({'duplicate_of_id': None})
         
         db.session.delete(file_upload)
         db.session.commit()
         
+        if not shared:
+            upload_store.delete(file_upload.filename)
+        
         return jsonify({'message': 'Upload deleted successfully'}), 200
         
     except Exception as e:
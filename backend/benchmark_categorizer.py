@@ -0,0 +1,170 @@
+"""
+Benchmark expense categorization
+Compares per-row model calls with the batched categorizer and the NumPy
+single-transaction kernel, and checks they agree; then reports how many rows
+the merchant dictionary answers ahead of the model
+Run: python benchmark_categorizer.py [rows]
+"""
+import sys
+import os
+import time
+import random
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from ml.categorizer import categorizer
+from ml.merchant_dictionary import MerchantDictionary
+from benchmark_file_processing import MERCHANTS
+
+
+def build_transactions(rows, seed=11):
+    """Cleaned transactions with a mix of merchants, plus rows with no usable text"""
+    rng = random.Random(seed)
+    transactions = [
+        {'description': f"{rng.choice(MERCHANTS)} {rng.randint(100, 999)}", 'merchant': rng.choice(MERCHANTS)}
+        for _ in range(rows)
+    ]
+    transactions.extend([
+        {'description': '', 'merchant': ''},
+        {'description': None, 'merchant': None},
+        {'description': '12345 678', 'merchant': ''},
+    ])
+    return transactions
+
+
+def categorize_per_row(transactions):
+    """Reference: predict and predict_proba called once per transaction"""
+    results = []
+    for trans in transactions:
+        processed = categorizer.preprocess_text(f"{trans.get('description') or ''} {trans.get('merchant') or ''}")
+        if not processed:
+            results.append({'category': 'Others', 'confidence': 0.0})
+            continue
+        category = categorizer.model.predict([processed])[0]
+        confidence = float(np.max(categorizer.model.predict_proba([processed])))
+        results.append({'category': category, 'confidence': confidence})
+    return results
+
+
+def run_kernel_benchmark(transactions, samples=2000, tolerance=1e-9):
+    """Compare the NumPy kernel with the sklearn pipeline on single transactions"""
+    kernel = categorizer.kernel
+    if kernel is None:
+        print("\n  Kernel:        not available for this model")
+        return True
+    
+    # Training descriptions make sure most vocabulary terms are exercised
+    texts = list(categorizer.training_data()['processed_text'])
+    texts += [
+        categorizer.preprocess_text(f"{t.get('description') or ''} {t.get('merchant') or ''}")
+        for t in transactions[:samples]
+    ]
+    texts = [t for t in texts if t]
+    
+    max_diff = 0.0
+    labels_match = True
+    for text in texts:
+        expected = categorizer.model.predict_proba([text])[0]
+        actual = kernel.predict_proba_one(text)
+        max_diff = max(max_diff, float(np.max(np.abs(expected - actual))))
+        labels_match = labels_match and \
+            categorizer.model.classes_[np.argmax(expected)] == kernel.classes[np.argmax(actual)]
+    
+    started = time.perf_counter()
+    for text in texts:
+        categorizer.model.predict_proba([text])
+    pipeline_time = (time.perf_counter() - started) / len(texts)
+    
+    started = time.perf_counter()
+    for text in texts:
+        kernel.predict_proba_one(text)
+    kernel_time = (time.perf_counter() - started) / len(texts)
+    
+    match = labels_match and max_diff <= tolerance
+    print(f"\nSingle transaction ({len(texts):,} texts)")
+    print(f"  Pipeline:      {pipeline_time * 1e6:10.1f} us")
+    print(f"  Kernel:        {kernel_time * 1e6:10.1f} us")
+    print(f"  Speedup:       {pipeline_time / kernel_time:10.1f}x")
+    print(f"  Max abs diff:  {max_diff:10.2e}")
+    print(f"  Output match:  {'[OK]' if match else '[MISMATCH]'}")
+    return match
+
+
+# Merchants as users have confirmed them, standing in for saved transactions
+CONFIRMED_MERCHANTS = [
+    ('Swiggy', 'Food & Dining'), ('Amazon Pay', 'Shopping'), ('Reliance Jio', 'Bills & Utilities'),
+    ('Netflix', 'Entertainment'), ('Uber Trip', 'Transportation'), ('BESCOM', 'Bills & Utilities'),
+    ('Starbucks Coffee', 'Food & Dining'), ('Big Bazaar', 'Food & Dining'),
+]
+
+
+def run_dictionary_benchmark(transactions, model_only):
+    """Hit rate and latency split of the merchant dictionary ahead of the model"""
+    ok = True
+    for label, seed in [
+        ('Training seed', categorizer.dictionary_seed),
+        ('With confirmed', lambda: categorizer.dictionary_seed() + CONFIRMED_MERCHANTS),
+    ]:
+        categorizer.dictionary = MerchantDictionary(seed)
+        started = time.perf_counter()
+        actual = categorizer.batch_categorize(transactions)
+        total_time = time.perf_counter() - started
+        stats = categorizer.dictionary.stats()
+        
+        # Dictionary hits are certain; every other row must get the model's answer
+        known = categorizer.dictionary.lookup_many(transactions)
+        match = all(
+            result == ({'category': category, 'confidence': 1.0} if category else expected)
+            for result, category, expected in zip(actual, known, model_only)
+        )
+        ok = ok and match
+        
+        print(f"\n{label} ({stats['entries']} merchants)")
+        print(f"  Hit rate:      {stats['hit_rate'] * 100:9.1f} %")
+        print(f"  Dictionary:    {stats['dictionary_ms']:10.1f} ms")
+        print(f"  Model:         {stats['model_ms']:10.1f} ms")
+        print(f"  Total:         {total_time * 1000:10.1f} ms")
+        print(f"  Misses match:  {'[OK]' if match else '[MISMATCH]'}")
+    
+    return ok
+
+
+def run_benchmark(rows=10000):
+    """Time per-row and batched categorization and compare their output"""
+    print("=" * 60)
+    print(f"Categorization Benchmark ({rows:,} rows)")
+    print("=" * 60)
+    
+    transactions = build_transactions(rows)
+    
+    # Model parity is checked without the dictionary answering known merchants
+    dictionary, categorizer.dictionary = categorizer.dictionary, None
+    
+    started = time.perf_counter()
+    expected = categorize_per_row(transactions)
+    row_time = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    actual = categorizer.batch_categorize(transactions)
+    batch_time = time.perf_counter() - started
+    
+    match = expected == actual
+    
+    print(f"\n  Per-row calls: {row_time * 1000:10.1f} ms")
+    print(f"  Batched:       {batch_time * 1000:10.1f} ms")
+    print(f"  Speedup:       {row_time / batch_time:10.1f}x")
+    print(f"  Output match:  {'[OK]' if match else '[MISMATCH]'}")
+    
+    kernel_match = run_kernel_benchmark(transactions)
+    dictionary_match = run_dictionary_benchmark(transactions, actual)
+    categorizer.dictionary = dictionary
+    
+    print("\n" + "=" * 60)
+    return match and kernel_match and dictionary_match
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    sys.exit(0 if run_benchmark(rows) else 1)
@@ -0,0 +1,170 @@
+"""
+Benchmark the transaction cleaning engines
+Compares the vectorized and per-row DataCleaner paths and checks they agree,
+then measures the normalization cache on a recurring monthly import
+Run: python benchmark_data_cleaner.py [rows]
+"""
+import sys
+import os
+import time
+import random
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.data_cleaner import DataCleaner, KeyDigests
+from services.file_processor import FileProcessor
+from benchmark_file_processing import build_statement, MERCHANTS
+
+# Rows that exercise every cleaning branch
+EDGE_CASES = [
+    {'transaction_date': '2024-03-01T00:00:00', 'amount': 120.555, 'type': 'expense',
+     'description': 'UPI/SWIGGY ORDER 123456789012', 'merchant': ''},
+    {'transaction_date': '2024-03-01T00:00:00', 'amount': 120.555, 'type': 'expense',
+     'description': '  upi/swiggy order 123456789012  ', 'merchant': None},
+    {'transaction_date': '2024-03-02', 'amount': 50, 'type': 'unknown',
+     'description': 'salary credited from ACME\tCorp', 'merchant': 'ACME 12345678 Corp'},
+    {'transaction_date': '2024-03-03', 'amount': 10.0, 'description': 'NEFT-ABCDEFGHIJKLMNOP12 paid to Ravi Kumar transfer'},
+    {'transaction_date': '2024-03-03', 'amount': 10.0, 'type': 'expense',
+     'description': 'Café Coffee  Day 9876543210', 'merchant': 'CC'},
+    {'transaction_date': '2024-03-04', 'amount': 0, 'type': 'expense', 'description': 'Zero amount'},
+    {'transaction_date': '2024-03-04', 'amount': -5.0, 'type': 'expense', 'description': 'Negative'},
+    {'transaction_date': '', 'amount': 5.0, 'type': 'expense', 'description': 'No date'},
+    {'transaction_date': None, 'amount': 5.0, 'type': 'expense', 'description': 'None date'},
+    {'transaction_date': '2024-03-05', 'amount': None, 'type': 'expense', 'description': 'None amount'},
+    {'transaction_date': '05/03/2024', 'amount': 7, 'type': 'income', 'description': 'refund'},
+    {'transaction_date': '2024-03-06', 'amount': 99.99, 'type': 'expense',
+     'description': 'POS at Big Bazaar online payment', 'merchant': ''},
+    {'transaction_date': '2024-03-06', 'amount': 99.99, 'type': 'expense',
+     'description': 'ATM', 'merchant': ''},
+    {'transaction_date': '2024-03-07', 'amount': 1e6, 'type': 'expense', 'description': ''},
+    {'transaction_date': '2024-03-07', 'amount': 3, 'type': 'expense'},
+]
+
+# Rows the vectorized path hands back to the per-row path
+FALLBACK_CASES = EDGE_CASES + [
+    {'transaction_date': '2024-03-08', 'amount': True, 'type': 'expense', 'description': 'Bool'},
+    {'transaction_date': '2024-03-08', 'amount': 4, 'type': 'expense', 'merchant': 42},
+]
+
+
+def build_transactions(rows, seed=7):
+    """Raw transactions as the file processor produces them, plus edge cases"""
+    processor = FileProcessor()
+    transactions = []
+    for layout in ['debit_credit', 'signed_amount']:
+        df = build_statement(rows // 2, layout, seed)
+        transactions.extend(processor._extract_transactions_from_dataframe(df, {}))
+    
+    # Repeat some rows so deduplication has work to do
+    rng = random.Random(seed)
+    transactions.extend(rng.sample(transactions, len(transactions) // 20))
+    rng.shuffle(transactions)
+    
+    return EDGE_CASES + transactions + EDGE_CASES
+
+
+def time_engine(cleaner, transactions, repeat):
+    """Run a cleaning engine and return (best_seconds, cleaned)"""
+    best = None
+    cleaned = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cleaned = cleaner.clean_transactions(transactions)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, cleaned
+
+
+def clean_in_chunks(cleaner, transactions, chunk_size):
+    """Clean a list chunk by chunk the way streamed uploads do"""
+    seen_keys = KeyDigests()
+    cleaned = []
+    for start in range(0, len(transactions), chunk_size):
+        cleaned.extend(cleaner.clean_transactions(transactions[start:start + chunk_size], seen_keys))
+    return cleaned
+
+
+def build_month(rows, month, seed=7):
+    """A month of statement rows drawn from a fixed set of recurring narrations"""
+    rng = random.Random(seed)
+    narrations = [f"{rng.choice(MERCHANTS)} {rng.randint(100000, 99999999999)}" for _ in range(rows // 20)]
+    
+    rng = random.Random(seed + month)
+    return [{
+        'transaction_date': f"2024-{month:02d}-{rng.randint(1, 28):02d}",
+        'amount': round(rng.uniform(10, 50000), 2),
+        'type': 'expense',
+        'description': rng.choice(narrations),
+        'merchant': ''
+    } for _ in range(rows)]
+
+
+def run_recurring_import(rows):
+    """Clean two months of recurring narrations with a shared cache"""
+    cleaner = DataCleaner()
+    uncached = DataCleaner(cache_size=0)
+    
+    print("\nRecurring monthly import")
+    all_match = True
+    for month in [1, 2]:
+        transactions = build_month(rows, month)
+        before = cleaner.description_cache.stats()
+        
+        started = time.perf_counter()
+        cleaned = cleaner.clean_transactions(transactions)
+        elapsed = time.perf_counter() - started
+        
+        match = cleaned == uncached.clean_transactions(transactions)
+        all_match = all_match and match
+        after = cleaner.description_cache.stats()
+        hits = after['hits'] - before['hits']
+        lookups = hits + after['misses'] - before['misses']
+        print(f"  Month {month}: {elapsed * 1000:8.1f} ms, description cache hit rate "
+              f"{hits / lookups:.0%}, output match {'[OK]' if match else '[MISMATCH]'}")
+    
+    return all_match
+
+
+def run_benchmark(rows=50000, repeat=3):
+    """Benchmark both cleaning engines and check their output is identical"""
+    print("=" * 60)
+    print(f"Transaction Cleaning Benchmark ({rows:,} rows)")
+    print("=" * 60)
+    
+    # Engines are timed without the normalization cache; the parity checks
+    # below run with it, so cached and uncached output are compared too
+    row_cleaner = DataCleaner(use_vectorized=False)
+    vectorized_cleaner = DataCleaner(use_vectorized=True)
+    transactions = build_transactions(rows)
+    
+    row_time, row_result = time_engine(DataCleaner(use_vectorized=False, cache_size=0), transactions, 1)
+    vec_time, vec_result = time_engine(DataCleaner(use_vectorized=True, cache_size=0), transactions, repeat)
+    match = row_result == vec_result
+    match = match and row_cleaner.clean_transactions(transactions) == vec_result
+    match = match and vectorized_cleaner.clean_transactions(transactions) == vec_result
+    
+    chunked_match = clean_in_chunks(row_cleaner, transactions, 5000) == \
+        clean_in_chunks(vectorized_cleaner, transactions, 5000)
+    
+    fallback_match = row_cleaner.clean_transactions(FALLBACK_CASES) == \
+        vectorized_cleaner.clean_transactions(FALLBACK_CASES)
+    
+    print(f"\n  Input rows:    {len(transactions):,}")
+    print(f"  Cleaned rows:  {len(vec_result):,}")
+    print(f"  Row engine:    {row_time * 1000:10.1f} ms")
+    print(f"  Vectorized:    {vec_time * 1000:10.1f} ms")
+    print(f"  Speedup:       {row_time / vec_time:10.1f}x")
+    print(f"  Output match:  {'[OK]' if match else '[MISMATCH]'}")
+    print(f"  Chunked match: {'[OK]' if chunked_match else '[MISMATCH]'}")
+    print(f"  Fallback match:{'[OK]' if fallback_match else '[MISMATCH]':>6}")
+    
+    recurring_match = run_recurring_import(rows)
+    
+    print("\n" + "=" * 60)
+    return match and chunked_match and fallback_match and recurring_match
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    sys.exit(0 if run_benchmark(rows) else 1)
@@ -0,0 +1,102 @@
+"""
+Benchmark the statement extraction engines
+Compares the vectorized and per-row extraction paths on synthetic statements
+Run: python benchmark_file_processing.py [rows]
+"""
+import sys
+import os
+import time
+import random
+from datetime import date, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+from services.file_processor import FileProcessor
+
+MERCHANTS = [
+    'UPI/Swiggy Bangalore', 'NEFT Salary ACME Corp', 'POS Amazon Pay India',
+    'ATM Withdrawal MG Road', 'Payment to Reliance Jio', 'IMPS from Rahul Sharma',
+    'Netflix Subscription', 'Uber Trip 12345', 'Electricity Bill BESCOM',
+    'Transfer to Savings', 'Starbucks Coffee', 'Big Bazaar Groceries',
+]
+
+
+def build_statement(rows, layout='debit_credit', seed=42):
+    """Build a synthetic bank statement DataFrame"""
+    rng = random.Random(seed)
+    start = date(2022, 1, 1)
+    data = []
+    
+    for i in range(rows):
+        txn_date = start + timedelta(days=i // 40)
+        description = f"{rng.choice(MERCHANTS)} {rng.randint(100000, 99999999999)}"
+        amount = round(rng.uniform(10, 50000), 2)
+        is_credit = rng.random() < 0.2
+        
+        if layout == 'debit_credit':
+            data.append({
+                'Txn Date': txn_date.strftime('%d/%m/%Y'),
+                'Narration': description,
+                'Withdrawal': '' if is_credit else f"{amount:,.2f}",
+                'Deposit': f"{amount:,.2f}" if is_credit else '',
+                'Balance': f"{rng.uniform(0, 100000):,.2f}",
+            })
+        else:
+            signed = amount if is_credit else -amount
+            data.append({
+                'Date': txn_date.strftime('%Y-%m-%d'),
+                'Description': description,
+                'Amount': f"₹{signed:,.2f}",
+            })
+    
+    return pd.DataFrame(data).replace('', None)
+
+
+def time_engine(processor, df, repeat):
+    """Run an extraction engine and return (best_seconds, transactions)"""
+    best = None
+    transactions = []
+    for _ in range(repeat):
+        details = {}
+        started = time.perf_counter()
+        transactions = processor._extract_transactions_from_dataframe(df.copy(), details)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, transactions
+
+
+def run_benchmark(rows=50000, repeat=3):
+    """Benchmark both extraction engines on each layout"""
+    print("=" * 60)
+    print(f"Statement Extraction Benchmark ({rows:,} rows)")
+    print("=" * 60)
+    
+    row_processor = FileProcessor(use_vectorized=False)
+    vectorized_processor = FileProcessor(use_vectorized=True)
+    all_match = True
+    
+    for layout in ['debit_credit', 'signed_amount']:
+        df = build_statement(rows, layout)
+        
+        row_time, row_result = time_engine(row_processor, df, 1)
+        vec_time, vec_result = time_engine(vectorized_processor, df, repeat)
+        
+        match = row_result == vec_result
+        all_match = all_match and match
+        
+        print(f"\nLayout: {layout}")
+        print(f"  Transactions:  {len(vec_result):,}")
+        print(f"  Row engine:    {row_time * 1000:10.1f} ms")
+        print(f"  Vectorized:    {vec_time * 1000:10.1f} ms")
+        print(f"  Speedup:       {row_time / vec_time:10.1f}x")
+        print(f"  Output match:  {'[OK]' if match else '[MISMATCH]'}")
+    
+    print("\n" + "=" * 60)
+    return all_match
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    sys.exit(0 if run_benchmark(rows) else 1)
@@ -0,0 +1,81 @@
+"""
+Benchmark the shared keyword matcher
+Checks it against plain substring tests and times both as the keyword lists grow
+Run: python benchmark_keyword_matcher.py [descriptions]
+"""
+import sys
+import os
+import time
+import random
+import string
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.keyword_matcher import KeywordMatcher, TRANSACTION_KEYWORDS
+from benchmark_file_processing import MERCHANTS
+
+
+def build_keywords(extra, seed=42):
+    """The shipped keyword lists plus synthetic bank-specific entries"""
+    rng = random.Random(seed)
+    keyword_lists = {group: list(keywords) for group, keywords in TRANSACTION_KEYWORDS.items()}
+    groups = list(keyword_lists)
+    for i in range(extra):
+        word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10)))
+        keyword_lists[groups[i % len(groups)]].append(word)
+    return keyword_lists
+
+
+def build_descriptions(count, seed=42):
+    """Synthetic lowercased description + merchant strings"""
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(MERCHANTS)} {rng.randint(100000, 99999999999)} {rng.choice(MERCHANTS)}".lower()
+        for _ in range(count)
+    ]
+
+
+def naive_scores(keyword_lists, text):
+    """Scores computed with one substring test per keyword"""
+    return {group: sum(1 for kw in keywords if kw in text) for group, keywords in keyword_lists.items()}
+
+
+def run_benchmark(count=20000):
+    """Compare the matcher with substring tests for growing keyword lists"""
+    print("=" * 60)
+    print(f"Keyword Matcher Benchmark ({count:,} descriptions)")
+    print("=" * 60)
+    
+    descriptions = build_descriptions(count)
+    all_match = True
+    
+    for extra in [0, 200, 1000]:
+        keyword_lists = build_keywords(extra)
+        matcher = KeywordMatcher(keyword_lists)
+        total = sum(len(set(keywords)) for keywords in keyword_lists.values())
+        
+        started = time.perf_counter()
+        expected = [naive_scores(keyword_lists, text) for text in descriptions]
+        naive_time = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        actual = [matcher.scores(text) for text in descriptions]
+        matcher_time = time.perf_counter() - started
+        
+        match = expected == actual
+        all_match = all_match and match
+        
+        print(f"\nKeywords: {total:,}")
+        print(f"  Substring tests: {naive_time * 1000:10.1f} ms")
+        print(f"  Matcher:         {matcher_time * 1000:10.1f} ms")
+        print(f"  Speedup:         {naive_time / matcher_time:10.1f}x")
+        print(f"  Output match:    {'[OK]' if match else '[MISMATCH]'}")
+    
+    print("\n" + "=" * 60)
+    return all_match
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    sys.exit(0 if run_benchmark(count) else 1)
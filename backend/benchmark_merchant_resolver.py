@@ -0,0 +1,118 @@
+"""
+Benchmark merchant resolution
+Checks how often variants of known merchants find their merchant in the
+MinHash index, compares with an exact Jaccard scan and times queries
+Run: python benchmark_merchant_resolver.py [merchants]
+"""
+import sys
+import os
+import time
+import random
+import string
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from services.merchant_resolver import MinHashIndex, merchant_resolver
+
+SUFFIXES = ['india', 'in', 'pvt ltd', 'online', 'store', 'payments', 'blr', 'mumbai']
+
+
+def random_word(rng):
+    """Lowercase word of 4 to 9 letters"""
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+
+
+def build_merchants(count, seed=7):
+    """Canonical merchant names of two or three random words"""
+    rng = random.Random(seed)
+    return [' '.join(random_word(rng) for _ in range(rng.randint(2, 3))) for _ in range(count)]
+
+
+def variant(name, rng):
+    """Raw statement spelling of a merchant: case, codes, a suffix or a truncated word"""
+    kind = rng.randint(0, 3)
+    if kind == 0:
+        raw = f"{name.upper()}*{rng.randint(1000, 9999)}"
+    elif kind == 1:
+        raw = f"{name} {rng.choice(SUFFIXES)}"
+    elif kind == 2:
+        raw = f"POS {name.title()} {rng.randint(100, 999)}"
+    else:
+        raw = name[:max(len(name) - rng.randint(1, 3), 6)]
+    return merchant_resolver.merchant_key(raw)
+
+
+def shingles(key, size=MinHashIndex.SHINGLE_SIZE):
+    """Character shingles of a key, as MinHashIndex builds them"""
+    return {key[i:i + size] for i in range(max(len(key) - size + 1, 1))}
+
+
+def exact_nearest(key, merchant_shingles, threshold):
+    """Reference: best exact Jaccard similarity over every merchant"""
+    query = shingles(key)
+    best, best_id = 0.0, None
+    for item_id, other in enumerate(merchant_shingles):
+        similarity = len(query & other) / len(query | other)
+        if similarity > best:
+            best, best_id = similarity, item_id
+    return best_id if best >= threshold else None
+
+
+def run_benchmark(count=100000, queries=5000, scan_queries=200):
+    """Build an index of synthetic merchants and resolve variants against it"""
+    print("=" * 60)
+    print(f"Merchant Resolution Benchmark ({count:,} merchants)")
+    print("=" * 60)
+    
+    rng = random.Random(11)
+    merchants = [merchant_resolver.merchant_key(name) for name in build_merchants(count)]
+    index = MinHashIndex(merchant_resolver.threshold)
+    
+    started = time.perf_counter()
+    index.add_many(list(range(count)), merchants)
+    build_time = time.perf_counter() - started
+    
+    targets = [rng.randrange(count) for _ in range(queries)]
+    known = [variant(merchants[t], rng) for t in targets]
+    unknown = [merchant_resolver.merchant_key(' '.join(random_word(rng) for _ in range(2))) for _ in range(queries)]
+    
+    timings = []
+    found = []
+    for key in known + unknown:
+        started = time.perf_counter()
+        found.append(index.query(key))
+        timings.append(time.perf_counter() - started)
+    timings = np.array(timings) * 1e6
+    
+    recall = sum(1 for t, f in zip(targets, found[:queries]) if f == t) / queries
+    false_matches = sum(1 for f in found[queries:] if f is not None) / queries
+    
+    # Exact Jaccard over every merchant, on a sample of the variants
+    merchant_shingles = [shingles(key) for key in merchants]
+    sample = list(range(min(scan_queries, queries)))
+    started = time.perf_counter()
+    expected = [exact_nearest(known[i], merchant_shingles, index.threshold) for i in sample]
+    scan_time = (time.perf_counter() - started) / len(sample) * 1e6
+    agreement = sum(1 for i, e in zip(sample, expected) if found[i] == e) / len(sample)
+    
+    ok = recall >= 0.9 and false_matches <= 0.01 and np.percentile(timings, 99) < 1000
+    
+    print(f"\n  Index build:   {build_time * 1000:10.1f} ms ({build_time / count * 1e6:.1f} us/merchant)")
+    print(f"  Query mean:    {timings.mean():10.1f} us")
+    print(f"  Query p99:     {np.percentile(timings, 99):10.1f} us")
+    print(f"  Exact scan:    {scan_time:10.1f} us/query")
+    print(f"  Speedup:       {scan_time / timings.mean():10.1f}x")
+    print(f"  Recall:        {recall * 100:9.1f} %")
+    print(f"  False matches: {false_matches * 100:9.2f} %")
+    print(f"  Agrees with exact scan: {agreement * 100:.1f} %")
+    print(f"  Within targets: {'[OK]' if ok else '[MISMATCH]'}")
+    
+    print("\n" + "=" * 60)
+    return ok
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    sys.exit(0 if run_benchmark(count) else 1)
@@ -0,0 +1,182 @@
+"""
+Benchmark risk score data loading
+Compares the snapshot queries with one query per risk factor and per budget,
+checks they produce the same factors and counts queries per
+/api/risk/score and /api/budgets/status call
+Uses an in-memory SQLite database, never the configured one
+Run: python benchmark_risk_calculator.py [transactions]
+"""
+import sys
+import os
+import time
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert, func
+from app import create_app
+from database.models import db, User, Category, Transaction, Budget
+from ml.risk_calculator import risk_calculator
+from services.budget_tracker import budget_tracker
+from services.query_counter import QueryCounter
+
+
+def seed(transactions, budgets=30, seed=3):
+    """A user with transactions over the last 200 days and budgets of every period"""
+    rng = random.Random(seed)
+    user = User(email='benchmark@example.com', full_name='Benchmark')
+    user.set_password('benchmark')
+    db.session.add(user)
+    db.session.commit()
+    
+    category_ids = [c.id for c in Category.query.filter_by(is_system=True).all()] + [None]
+    today = datetime.now().date()
+    rows = [
+        {
+            'user_id': user.id,
+            'type': 'income' if rng.random() < 0.1 else 'expense',
+            'amount': Decimal(rng.randint(100, 500000)) / 100,
+            'category_id': rng.choice(category_ids),
+            'description': 'benchmark',
+            'transaction_date': today - timedelta(days=rng.randint(0, 200))
+        }
+        for _ in range(transactions)
+    ]
+    for start in range(0, len(rows), 5000):
+        db.session.execute(insert(Transaction.__table__), rows[start:start + 5000])
+    
+    for _ in range(budgets):
+        db.session.add(Budget(
+            user_id=user.id,
+            category_id=rng.choice(category_ids[:-1]),
+            amount=Decimal(rng.randint(1000, 50000)),
+            period=rng.choice(['weekly', 'monthly', 'yearly']),
+            start_date=today - timedelta(days=rng.randint(0, 400)) if rng.random() < 0.5 else None
+        ))
+    db.session.commit()
+    return user.id
+
+
+def per_factor_snapshot(user_id, start_date, end_date):
+    """Reference: the snapshot built with separate queries per factor, as before"""
+    in_window = [
+        Transaction.user_id == user_id,
+        Transaction.transaction_date >= start_date,
+        Transaction.transaction_date <= end_date
+    ]
+    
+    monthly = {}
+    daily = db.session.query(Transaction.transaction_date, func.sum(Transaction.amount)).filter(
+        *in_window, Transaction.type == 'expense'
+    ).group_by(Transaction.transaction_date).all()
+    for day, total in daily:
+        monthly[str(day)[:7]] = monthly.get(str(day)[:7], 0) + total
+    
+    income = db.session.query(func.sum(Transaction.amount)).filter(
+        *in_window, Transaction.type == 'income'
+    ).scalar() or 0
+    expenses = db.session.query(func.sum(Transaction.amount)).filter(
+        *in_window, Transaction.type == 'expense'
+    ).scalar() or 0
+    
+    # One SUM per budget over its current period
+    budgets = []
+    for budget in Budget.query.filter_by(user_id=user_id).order_by(Budget.id).all():
+        start, end = budget_tracker.period_window(budget, end_date)
+        spent = db.session.query(func.sum(Transaction.amount)).filter(
+            Transaction.user_id == user_id,
+            Transaction.category_id == budget.category_id,
+            Transaction.type == 'expense',
+            Transaction.transaction_date >= start,
+            Transaction.transaction_date <= end
+        ).scalar() or 0
+        budgets.append({
+            'budget_id': budget.id,
+            'amount': float(budget.amount),
+            'spent': round(float(spent), 2),
+            'status': 'upcoming' if start > end_date else 'current'
+        })
+    
+    by_category = dict(db.session.query(Transaction.category_id, func.sum(Transaction.amount)).filter(
+        *in_window, Transaction.type == 'expense'
+    ).group_by(Transaction.category_id).all())
+    
+    return {
+        'monthly_expenses': dict(sorted(monthly.items())),
+        'income': income,
+        'expenses': expenses,
+        'category_expenses': by_category,
+        'budgets': budgets
+    }
+
+
+def factors(snapshot):
+    """Every snapshot-based factor of the risk calculator"""
+    return [
+        risk_calculator._calculate_spending_velocity(snapshot),
+        risk_calculator._calculate_savings_rate(snapshot),
+        risk_calculator._calculate_budget_adherence(snapshot),
+        risk_calculator._calculate_category_concentration(snapshot)
+    ]
+
+
+def timed(function, *args, repeat=5):
+    """Best wall time of a call, its result and the number of queries it ran"""
+    best = None
+    for _ in range(repeat):
+        with QueryCounter(db.engine) as counter:
+            started = time.perf_counter()
+            result = function(*args)
+            elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best, counter.count
+
+
+def run_benchmark(transactions=50000):
+    """Load the risk snapshot both ways and compare"""
+    print("=" * 60)
+    print(f"Risk Snapshot Benchmark ({transactions:,} transactions)")
+    print("=" * 60)
+    
+    app = create_app()
+    with app.app_context():
+        user_id = seed(transactions)
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=90)
+        
+        expected, reference_time, reference_queries = timed(per_factor_snapshot, user_id, start_date, end_date)
+        actual, snapshot_time, snapshot_queries = timed(risk_calculator.load_snapshot, user_id, start_date, end_date)
+        
+        spent = {b['budget_id']: b['spent'] for b in actual['budgets']}
+        match = factors(expected) == factors(actual) and \
+            spent == {b['budget_id']: b['spent'] for b in expected['budgets']}
+        
+        token = create_access_token(identity=str(user_id))
+        client = app.test_client()
+        with QueryCounter(db.engine) as counter:
+            response = client.get('/api/risk/score', headers={'Authorization': f'Bearer {token}'})
+        with QueryCounter(db.engine) as status_counter:
+            status = client.get('/api/budgets/status', headers={'Authorization': f'Bearer {token}'})
+        
+        print(f"\n  Per-factor:    {reference_time * 1000:10.1f} ms ({reference_queries} queries)")
+        print(f"  Snapshot:      {snapshot_time * 1000:10.1f} ms ({snapshot_queries} queries)")
+        print(f"  Speedup:       {reference_time / snapshot_time:10.1f}x")
+        print(f"  Output match:  {'[OK]' if match else '[MISMATCH]'}")
+        print(f"\n  GET /api/risk/score: {response.status_code}, {counter.count} queries "
+              f"(score {response.get_json().get('score')})")
+        print(f"  GET /api/budgets/status: {status.status_code}, {status_counter.count} queries "
+              f"({len(status.get_json().get('budgets', []))} budgets)")
+    
+    print("\n" + "=" * 60)
+    return match and response.status_code == 200 and status.status_code == 200
+
+
+if __name__ == "__main__":
+    transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    sys.exit(0 if run_benchmark(transactions) else 1)
@@ -0,0 +1,34 @@
+"""
+Build the expense categorization model artifact
+Trains the categorizer and writes ml/models/category_model.v<version>.joblib
+Run once per deploy, before starting the workers: python build_category_model.py [path]
+"""
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ml.categorizer import categorizer
+
+
+def build_model(model_path=None):
+    """Train the categorizer and save its versioned artifact"""
+    print("=" * 60)
+    print("Building categorization model")
+    print("=" * 60)
+    
+    try:
+        path = categorizer.save_artifact(model_path)
+    except Exception as e:
+        print(f"\n❌ Error building model: {e}")
+        return False
+    
+    print(f"\n✅ Model v{categorizer.MODEL_VERSION} written to {path}")
+    print(f"   Size: {os.path.getsize(path) / 1024:.1f} KB")
+    return True
+
+
+if __name__ == "__main__":
+    model_path = sys.argv[1] if len(sys.argv) > 1 else None
+    sys.exit(0 if build_model(model_path) else 1)
@@ -2,12 +2,33 @@
 SQLAlchemy Database Models
 """
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from datetime import datetime, date
+from decimal import Decimal
 from sqlalchemy import JSON
 import bcrypt
+import hashlib
+import re
 
 db = SQLAlchemy()
 
+
+def transaction_fingerprint(user_id, transaction_date, amount, description):
+    """
+    Hash identifying the same transaction across imports
+    
+    Built from the user, the date, the amount to the cent and the description
+    lowercased with punctuation and extra whitespace removed.
+    """
+    if isinstance(transaction_date, datetime):
+        transaction_date = transaction_date.date()
+    date_part = transaction_date.isoformat() if isinstance(transaction_date, date) else str(transaction_date)[:10]
+    amount_part = Decimal(str(amount)).quantize(Decimal('0.01'))
+    description_part = re.sub(r'[^a-z0-9]+', ' ', (description or '').lower()).strip()
+    
+    key = f"{user_id}|{date_part}|{amount_part}|{description_part}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
 class User(db.Model):
     """User model"""
     __tablename__ = 'users'
@@ -83,11 +104,19 @@ class Transaction(db.Model):
     description = db.Column(db.Text)
     transaction_date = db.Column(db.Date, nullable=False)
     merchant = db.Column(db.String(255))
+    merchant_id = db.Column(db.Integer, db.ForeignKey('merchants.id'), nullable=True, index=True)  # Canonical merchant
     payment_method = db.Column(db.String(50))
     is_recurring = db.Column(db.Boolean, default=False)
+    fingerprint = db.Column(db.String(64), index=True)  # See transaction_fingerprint()
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    def refresh_fingerprint(self):
+        """Recompute the duplicate-detection fingerprint from the current fields"""
+        self.fingerprint = transaction_fingerprint(
+            self.user_id, self.transaction_date, self.amount, self.description
+        )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -97,6 +126,7 @@ class Transaction(db.Model):
             'description': self.description,
             'transaction_date': self.transaction_date.isoformat() if self.transaction_date else None,
             'merchant': self.merchant,
+            'merchant_id': self.merchant_id,
             'payment_method': self.payment_method,
             'is_recurring': self.is_recurring,
             'created_at': self.created_at.isoformat() if self.created_at else None
@@ -205,6 +235,7 @@ class UserPreference(db.Model):
 class FileUpload(db.Model):
     """File upload model for tracking uploaded statements"""
     __tablename__ = 'file_uploads'
+    __table_args__ = (db.Index('ix_file_uploads_user_layout', 'user_id', 'layout_fingerprint'),)
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -213,9 +244,13 @@ class FileUpload(db.Model):
     file_type = db.Column(db.String(20), nullable=False)  # 'csv', 'excel', 'pdf'
     file_size = db.Column(db.Integer)  # Size in bytes
     status = db.Column(db.String(20), default='pending')  # 'pending', 'processing', 'completed', 'failed'
+    progress = db.Column(db.Integer, default=0)  # Percent complete while processing
     transactions_count = db.Column(db.Integer, default=0)
     error_message = db.Column(db.Text)
     processing_details = db.Column(JSON)  # Detailed processing info
+    content_hash = db.Column(db.String(64), index=True)  # SHA-256 of file content
+    layout_fingerprint = db.Column(db.String(64))  # StatementLayout.fingerprint of the file's layout
+    duplicate_of_id = db.Column(db.Integer, db.ForeignKey('file_uploads.id'), nullable=True)  # Earlier identical upload
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     processed_at = db.Column(db.DateTime)
     
@@ -230,14 +265,115 @@ class FileUpload(db.Model):
             'file_type': self.file_type,
             'file_size': self.file_size,
             'status': self.status,
+            'progress': self.progress,
             'transactions_count': self.transactions_count,
             'error_message': self.error_message,
             'processing_details': self.processing_details,
+            'content_hash': self.content_hash,
+            'layout_fingerprint': self.layout_fingerprint,
+            'duplicate_of_id': self.duplicate_of_id,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'processed_at': self.processed_at.isoformat() if self.processed_at else None
         }
 
 
+class StagedTransaction(db.Model):
+    """Extracted transaction held server-side until its upload is confirmed"""
+    __tablename__ = 'staged_transactions'
+    __table_args__ = (db.UniqueConstraint('upload_id', 'row_index'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    upload_id = db.Column(db.Integer, db.ForeignKey('file_uploads.id'), nullable=False, index=True)
+    row_index = db.Column(db.Integer, nullable=False)  # Position in the extracted result
+    type = db.Column(db.String(20), nullable=False)
+    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True)
+    suggested_category = db.Column(db.String(100))
+    category_confidence = db.Column(db.Float)
+    description = db.Column(db.Text)
+    transaction_date = db.Column(db.Date, nullable=False)
+    merchant = db.Column(db.String(255))
+    merchant_id = db.Column(db.Integer, db.ForeignKey('merchants.id'), nullable=True)
+    payment_method = db.Column(db.String(50), default='bank_transfer')
+    is_recurring = db.Column(db.Boolean, default=False)
+    fingerprint = db.Column(db.String(64))
+    is_duplicate = db.Column(db.Boolean, default=False)  # Already imported when staged
+    
+    def to_dict(self):
+        return {
+            'row': self.row_index,
+            'transaction_date': self.transaction_date.isoformat() if self.transaction_date else None,
+            'type': self.type,
+            'amount': float(self.amount),
+            'description': self.description,
+            'merchant': self.merchant,
+            'suggested_category': self.suggested_category,
+            'category_id': self.category_id,
+            'category_confidence': self.category_confidence,
+            'payment_method': self.payment_method,
+            'is_recurring': self.is_recurring,
+            'is_duplicate': self.is_duplicate
+        }
+
+
+class StatementLayout(db.Model):
+    """Known bank statement layout with its resolved parsing plan"""
+    __tablename__ = 'statement_layouts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    fingerprint = db.Column(db.String(64), unique=True, nullable=False, index=True)  # Header + column types hash
+    column_mapping = db.Column(JSON, nullable=False)
+    date_format = db.Column(db.String(50))
+    decimal_separator = db.Column(db.String(1), default='.')
+    amount_convention = db.Column(db.String(20))  # 'debit_credit' or 'signed_amount'
+    encoding = db.Column(db.String(50))
+    hit_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_plan(self):
+        """Parsing plan consumed by FileProcessor"""
+        return {
+            'column_mapping': self.column_mapping,
+            'date_format': self.date_format,
+            'decimal_separator': self.decimal_separator,
+            'amount_convention': self.amount_convention,
+            'encoding': self.encoding
+        }
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'fingerprint': self.fingerprint,
+            **self.to_plan(),
+            'hit_count': self.hit_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'last_used_at': self.last_used_at.isoformat() if self.last_used_at else None
+        }
+
+
+class CategoryOverride(db.Model):
+    """A user's category choice for a merchant, applied over the categorizer's suggestion"""
+    __tablename__ = 'category_overrides'
+    __table_args__ = (db.UniqueConstraint('user_id', 'merchant_key'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    merchant_key = db.Column(db.String(100), nullable=False)  # See CategoryOverlays.merchant_key()
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete='CASCADE'), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class Merchant(db.Model):
+    """Canonical merchant that raw statement merchant strings resolve to"""
+    __tablename__ = 'merchants'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False)  # First raw string seen for the merchant
+    key = db.Column(db.String(255), unique=True, nullable=False)  # See MerchantResolver.merchant_key()
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
 def initialize_default_categories():
     """Initialize default system categories"""
     default_categories = [
@@ -3,20 +3,82 @@ Expense Categorization ML Module
 Uses Naive Bayes classifier for automatic expense categorization
 """
 import re
+import copy
 import joblib
 import os
-from sklearn.feature_extraction.text import TfidfVectorizer
+import time
+import uuid
+import threading
+from datetime import datetime
+import sklearn
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.pipeline import Pipeline
+from ml.nb_kernel import NaiveBayesKernel
+from ml.merchant_dictionary import MerchantDictionary
 import pandas as pd
 import numpy as np
 
+# Directory holding built model artifacts (see build_category_model.py)
+MODEL_DIR = os.getenv('ML_MODEL_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models'))
+
+
 class ExpenseCategorizer:
-    def __init__(self, model_path='ml/models/category_model.pkl'):
-        """Initialize the categorizer"""
-        self.model_path = model_path
-        self.model = None
-        self.load_or_train_model()
+    # Bump when the training data or pipeline changes; old artifacts are then ignored
+    MODEL_VERSION = 1
+    
+    # Online mode learns from user corrections (see ml/online_learner.py)
+    ONLINE = os.getenv('CATEGORIZER_MODE', 'static').lower() == 'online'
+    HASH_FEATURES = 2 ** 18
+    
+    # Known merchants skip the model (see ml/merchant_dictionary.py)
+    USE_DICTIONARY = os.getenv('MERCHANT_DICTIONARY_ENABLED', 'true').lower() == 'true'
+    
+    # Merchant names in the training data that seed the dictionary. Generic words
+    # ('pharmacy', 'books') would prefix-match too much and are left to the model
+    SEED_MERCHANTS = (
+        'starbucks', 'mcdonalds', 'pizza hut', 'whole foods', 'dominos', 'chipotle',
+        'dunkin donuts', 'burger king', 'taco bell', 'uber', 'lyft', 'shell',
+        'amazon', 'walmart', 'target', 'best buy', 'home depot', 'ikea', 'ebay',
+        'netflix', 'spotify'
+    )
+    
+    def __init__(self, model_path=None, online=None, checkpoint_path=None, use_dictionary=None):
+        """Initialize the categorizer; the model is loaded on first use"""
+        self.model_path = model_path or os.path.join(MODEL_DIR, f"category_model.v{self.MODEL_VERSION}.joblib")
+        self.online = self.ONLINE if online is None else online
+        self.checkpoint_path = checkpoint_path or \
+            os.path.join(MODEL_DIR, f"category_online.v{self.MODEL_VERSION}.joblib")
+        self.kernel_path = os.path.splitext(self.model_path)[0] + '.kernel.npz'
+        self._model = None
+        self._model_build = None
+        self._kernel = None
+        use_dictionary = self.USE_DICTIONARY if use_dictionary is None else use_dictionary
+        self.dictionary = MerchantDictionary(self.dictionary_seed) if use_dictionary else None
+        self._lock = threading.Lock()
+        # Serializes online updates so none is lost between copy and swap
+        self._learn_lock = threading.Lock()
+    
+    @property
+    def model(self):
+        """The fitted pipeline, loaded on first access"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self.load_model()
+        return self._model
+    
+    @property
+    def kernel(self):
+        """NumPy scorer for single transactions; None in online mode"""
+        if self.online:
+            return None
+        if self._kernel is None:
+            model = self.model
+            with self._lock:
+                if self._kernel is None:
+                    self._kernel = self.load_kernel(model) or False
+        return self._kernel or None
     
     def preprocess_text(self, text):
         """Preprocess transaction description"""
@@ -26,21 +88,157 @@ class ExpenseCategorizer:
         text = re.sub(r'[^a-z\s]', '', text)
         return text
     
-    def load_or_train_model(self):
-        """Load existing model or train a new one"""
+    def load_model(self):
+        """
+        Load the model artifact, or train one in memory if it can't be used
+        
+        Fitted arrays are memory-mapped read-only, so worker processes share
+        one copy through the page cache. Nothing is written here; artifacts
+        are produced by build_category_model.py.
+        """
+        if self.online:
+            return self.load_online_model()
+        
         if os.path.exists(self.model_path):
             try:
-                self.model = joblib.load(self.model_path)
-                print("Loaded existing categorization model")
+                artifact = joblib.load(self.model_path, mmap_mode='r')
+                if artifact.get('version') == self.MODEL_VERSION:
+                    print(f"Loaded categorization model v{artifact['version']} "
+                          f"(trained {artifact.get('trained_at')})")
+                    self._model_build = artifact.get('trained_at')
+                    return artifact['model']
+                print(f"Ignoring categorization model v{artifact.get('version')}, "
+                      f"expected v{self.MODEL_VERSION}")
             except Exception as e:
                 print(f"Error loading model: {e}")
-                self.train_model()
-        else:
-            self.train_model()
+        
+        print("No categorization model artifact found, training in memory. "
+              "Run: python build_category_model.py")
+        return self.train_model()
     
-    def train_model(self):
-        """Train the categorization model with sample data"""
-        # Sample training data
+    def load_kernel(self, model):
+        """
+        Load the kernel exported with the model artifact
+        
+        Falls back to exporting one from the loaded pipeline when the file is
+        missing or belongs to another build.
+        """
+        if self._model_build and os.path.exists(self.kernel_path):
+            try:
+                kernel = NaiveBayesKernel.load(self.kernel_path)
+                if kernel.build == self._model_build:
+                    return kernel
+            except Exception as e:
+                print(f"Error loading categorization kernel: {e}")
+        
+        return NaiveBayesKernel.from_pipeline(model)
+    
+    def load_online_model(self):
+        """Load the latest online checkpoint, or start from the sample data"""
+        if os.path.exists(self.checkpoint_path):
+            try:
+                # Not memory-mapped: the counts are updated by partial_fit
+                artifact = joblib.load(self.checkpoint_path)
+                if artifact.get('version') == self.MODEL_VERSION:
+                    print(f"Loaded online categorization checkpoint ({artifact.get('trained_at')})")
+                    return artifact['model']
+            except Exception as e:
+                print(f"Error loading online checkpoint: {e}")
+        
+        return self.train_online_model()
+    
+    def train_online_model(self):
+        """
+        Hashing vectorizer + Naive Bayes trained with partial_fit
+        
+        The vectorizer is stateless, so new words need no refit, and Naive
+        Bayes keeps per-class counts that every batch of corrections simply
+        adds to. Its classes are fixed by the sample data.
+        """
+        df = self.training_data()
+        
+        model = Pipeline([
+            ('hashing', HashingVectorizer(n_features=self.HASH_FEATURES, ngram_range=(1, 2),
+                                          alternate_sign=False)),
+            ('clf', MultinomialNB())
+        ])
+        model.named_steps['clf'].partial_fit(
+            model.named_steps['hashing'].transform(df['processed_text']),
+            df['category'],
+            classes=sorted(df['category'].unique())
+        )
+        return model
+    
+    def learn(self, texts, labels):
+        """
+        Update the online model with corrected (preprocessed text, category) pairs
+        
+        The update runs on a copy that then replaces the live model in one
+        assignment, so concurrent predictions always see a complete model.
+        Labels the model has no class for are skipped.
+        
+        Returns:
+            Number of samples learned
+        """
+        if not self.online:
+            return 0
+        
+        with self._learn_lock:
+            model = self.model
+            known = set(model.classes_)
+            samples = [(text, label) for text, label in zip(texts, labels) if text and label in known]
+            if not samples:
+                return 0
+            
+            updated = copy.deepcopy(model)
+            updated.named_steps['clf'].partial_fit(
+                updated.named_steps['hashing'].transform([text for text, _ in samples]),
+                [label for _, label in samples]
+            )
+            
+            with self._lock:
+                self._model = updated
+        
+        return len(samples)
+    
+    def save_checkpoint(self):
+        """Write the online model to its checkpoint file; returns its path"""
+        return self._write_artifact(self.model, self.checkpoint_path)
+    
+    def save_artifact(self, model_path=None):
+        """
+        Train the model and write it as a versioned artifact; returns its path
+        
+        The inference kernel's weights are exported next to it, tagged with
+        the same build so a worker never pairs a kernel with another model.
+        """
+        model_path = model_path or self.model_path
+        model = self.train_model()
+        trained_at = datetime.utcnow().isoformat()
+        
+        kernel = NaiveBayesKernel.from_pipeline(model, trained_at)
+        kernel.save(os.path.splitext(model_path)[0] + '.kernel.npz')
+        return self._write_artifact(model, model_path, trained_at)
+    
+    def _write_artifact(self, model, model_path, trained_at=None):
+        """Write a model with its version metadata, atomically"""
+        artifact = {
+            'version': self.MODEL_VERSION,
+            'trained_at': trained_at or datetime.utcnow().isoformat(),
+            'sklearn_version': sklearn.__version__,
+            'model': model
+        }
+        
+        os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
+        # Uncompressed, so the arrays can be memory-mapped; written atomically
+        # so a worker starting meanwhile never reads a partial file
+        tmp_path = f"{model_path}.{uuid.uuid4().hex}.tmp"
+        joblib.dump(artifact, tmp_path)
+        os.replace(tmp_path, model_path)
+        return model_path
+    
+    def training_data(self):
+        """Sample training data with preprocessed text"""
         training_data = {
             'description': [
                 # Food & Dining
@@ -124,58 +322,101 @@ class ExpenseCategorizer:
         
         df = pd.DataFrame(training_data)
         df['processed_text'] = df['description'].apply(self.preprocess_text)
+        return df
+    
+    def dictionary_seed(self):
+        """SEED_MERCHANTS found in the training data, with the one category they appear under"""
+        df = self.training_data()
+        categories = {}
+        for description, category in zip(df['description'], df['category']):
+            for name in self.SEED_MERCHANTS:
+                if description == name or description.startswith(name + ' '):
+                    categories.setdefault(name, set()).add(category)
+        return [(name, found.pop()) for name, found in categories.items() if len(found) == 1]
+    
+    def train_model(self):
+        """Train the categorization model with sample data and return it"""
+        df = self.training_data()
         
         # Create pipeline
-        self.model = Pipeline([
+        model = Pipeline([
             ('tfidf', TfidfVectorizer(max_features=100, ngram_range=(1, 2))),
             ('clf', MultinomialNB())
         ])
         
         # Train model
-        self.model.fit(df['processed_text'], df['category'])
-        
-        # Save model
-        os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-        joblib.dump(self.model, self.model_path)
-        print("Trained and saved new categorization model")
+        model.fit(df['processed_text'], df['category'])
+        return model
     
     def categorize(self, description, merchant=None):
         """Categorize a transaction based on description and merchant"""
-        if not self.model:
-            return 'Others', 0.0
+        kernel = self.kernel
+        if not kernel:
+            result = self.batch_categorize([{'description': description, 'merchant': merchant}])[0]
+            return result['category'], result['confidence']
         
-        # Combine description and merchant
-        text = f"{description or ''} {merchant or ''}"
-        processed = self.preprocess_text(text)
+        if self.dictionary:
+            category = self.dictionary.lookup_many([{'description': description, 'merchant': merchant}])[0]
+            if category:
+                return category, 1.0
         
+        processed = self.preprocess_text(f"{description or ''} {merchant or ''}")
         if not processed:
             return 'Others', 0.0
         
-        try:
-            # Predict category
-            category = self.model.predict([processed])[0]
-            
-            # Get probability
-            proba = self.model.predict_proba([processed])
-            confidence = float(np.max(proba))
-            
-            return category, confidence
-        except Exception as e:
-            print(f"Error categorizing: {e}")
-            return 'Others', 0.0
+        started = time.perf_counter()
+        prediction = kernel.predict_one(processed)
+        if self.dictionary:
+            self.dictionary.record_model_time(time.perf_counter() - started)
+        return prediction
     
     def batch_categorize(self, transactions):
-        """Categorize multiple transactions"""
-        results = []
-        for trans in transactions:
-            category, confidence = self.categorize(
-                trans.get('description'),
-                trans.get('merchant')
+        """
+        Categorize multiple transactions
+        
+        Known merchants are answered from the merchant dictionary with full
+        confidence. The rest are vectorized in one transform and scored with
+        a single predict_proba call; each label is the argmax of its
+        probabilities, which is what predict would return.
+        """
+        results = [{'category': 'Others', 'confidence': 0.0} for _ in transactions]
+        if not transactions:
+            return results
+        
+        pending = list(range(len(transactions)))
+        if self.dictionary:
+            known = self.dictionary.lookup_many(transactions)
+            for idx, category in enumerate(known):
+                if category:
+                    results[idx] = {'category': category, 'confidence': 1.0}
+            pending = [idx for idx, category in enumerate(known) if not category]
+        
+        # Combine description and merchant
+        processed = {
+            idx: self.preprocess_text(
+                f"{transactions[idx].get('description') or ''} {transactions[idx].get('merchant') or ''}"
             )
-            results.append({
-                'category': category,
-                'confidence': confidence
-            })
+            for idx in pending
+        }
+        rows = [idx for idx in pending if processed[idx]]
+        if not rows or not self.model:
+            return results
+        
+        started = time.perf_counter()
+        try:
+            proba = self.model.predict_proba([processed[idx] for idx in rows])
+            labels = self.model.classes_[np.argmax(proba, axis=1)]
+            confidences = np.max(proba, axis=1)
+        except Exception as e:
+            print(f"Error categorizing: {e}")
+            return results
+        finally:
+            if self.dictionary:
+                self.dictionary.record_model_time(time.perf_counter() - started)
+        
+        for idx, category, confidence in zip(rows, labels, confidences):
+            results[idx] = {'category': str(category), 'confidence': float(confidence)}
+        
         return results
 
 
@@ -0,0 +1,206 @@
+"""
+Merchant Dictionary
+Known merchant -> category lookups that short-circuit the ML categorizer
+"""
+import os
+import re
+import time
+import atexit
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import has_app_context, current_app
+from sqlalchemy import func
+
+from database.models import db, Transaction, Category
+
+
+class MerchantDictionary:
+    """
+    Word trie of normalized merchant names mapped to a category name
+    
+    Entries come from the merchant names in the categorizer's training data
+    and from transactions saved in the last LOOKBACK_DAYS: a merchant is
+    added once MIN_USERS different users saved at least MIN_SUPPORT
+    transactions of it, with one system category making up MIN_SHARE of them.
+    A lookup walks the merchant's words (then the description's) down the
+    trie and returns the category of the longest entry that prefixes them,
+    so "starbucks coffee mg road" matches "starbucks coffee".
+    
+    The first lookup builds the trie from the seed alone. Inside an app, it
+    also starts a daemon thread that adds the saved merchants and rebuilds
+    the trie every REFRESH_SECONDS, so requests never wait on the query.
+    """
+    
+    REFRESH_SECONDS = float(os.getenv('MERCHANT_DICTIONARY_REFRESH_SECONDS', 3600))
+    MIN_SUPPORT = int(os.getenv('MERCHANT_DICTIONARY_MIN_SUPPORT', 3))
+    MIN_USERS = int(os.getenv('MERCHANT_DICTIONARY_MIN_USERS', 3))
+    LOOKBACK_DAYS = int(os.getenv('MERCHANT_DICTIONARY_LOOKBACK_DAYS', 180))
+    MIN_SHARE = 0.9
+    MAX_ENTRIES = 50000
+    MAX_WORDS = 6
+    
+    # Trie nodes map a word to its child; a category sits under this key
+    CATEGORY = ''
+    
+    def __init__(self, seed: Optional[Callable[[], Iterable[Tuple[str, str]]]] = None):
+        self.seed = seed
+        self._trie = None
+        self._entries = 0
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.dictionary_seconds = 0.0
+        self.model_seconds = 0.0
+    
+    def normalize(self, text: Optional[str]) -> List[str]:
+        """Lowercased words of a merchant name, letters only"""
+        return re.sub(r'[^a-z]+', ' ', str(text or '').lower()).split()[:self.MAX_WORDS]
+    
+    def lookup(self, description: Optional[str], merchant: Optional[str]) -> Optional[str]:
+        """Category of the longest known merchant prefixing the merchant or description"""
+        trie = self._current_trie()
+        for text in (merchant, description):
+            node = trie
+            category = None
+            for word in self.normalize(text):
+                node = node.get(word)
+                if node is None:
+                    break
+                category = node.get(self.CATEGORY, category)
+            if category:
+                return category
+        return None
+    
+    def lookup_many(self, transactions: List[Dict]) -> List[Optional[str]]:
+        """lookup() for each transaction, recording hits and time spent"""
+        started = time.perf_counter()
+        categories = [self.lookup(t.get('description'), t.get('merchant')) for t in transactions]
+        elapsed = time.perf_counter() - started
+        
+        hits = sum(1 for c in categories if c)
+        with self._stats_lock:
+            self.hits += hits
+            self.misses += len(categories) - hits
+            self.dictionary_seconds += elapsed
+        return categories
+    
+    def record_model_time(self, seconds: float):
+        """Add time the model spent on dictionary misses"""
+        with self._stats_lock:
+            self.model_seconds += seconds
+    
+    def stats(self) -> Dict:
+        """Hit rate and the time split between dictionary and model, for this worker"""
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {
+                'entries': self._entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'dictionary_ms': round(self.dictionary_seconds * 1000, 2),
+                'model_ms': round(self.model_seconds * 1000, 2)
+            }
+    
+    def refresh(self):
+        """Rebuild the trie from the seed entries and confirmed transactions"""
+        entries = self._seed_entries()
+        
+        # Confirmed transactions override the seed entries
+        if has_app_context():
+            try:
+                entries.update(self._confirmed_entries())
+            except Exception as e:
+                print(f"Error loading merchant dictionary: {e}")
+        
+        self._install(entries)
+    
+    def stop(self):
+        """Stop the background refresh thread"""
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+    
+    def _seed_entries(self) -> Dict[Tuple[str, ...], str]:
+        """Entries from the seed callable"""
+        entries = {}
+        if self.seed:
+            for text, category in self.seed():
+                entries[tuple(self.normalize(text))] = category
+        return entries
+    
+    def _install(self, entries: Dict[Tuple[str, ...], str]):
+        """Build a trie from entries and swap it in"""
+        trie = {}
+        for words, category in entries.items():
+            if not words:
+                continue
+            node = trie
+            for word in words:
+                node = node.setdefault(word, {})
+            node[self.CATEGORY] = category
+        
+        self._trie = trie
+        self._entries = len(entries)
+    
+    def _current_trie(self) -> Dict:
+        """The trie, built from the seed on first use"""
+        if self._trie is None:
+            with self._refresh_lock:
+                if self._trie is None:
+                    self._install(self._seed_entries())
+        if self._thread is None and has_app_context():
+            self._start(current_app._get_current_object())
+        return self._trie
+    
+    def _start(self, app):
+        """Start the background refresh thread on first use inside an app"""
+        with self._refresh_lock:
+            if self._thread:
+                return
+            self._thread = threading.Thread(target=self._run, args=(app,),
+                                            name='merchant-dictionary', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+    
+    def _run(self, app):
+        """Rebuild the trie now and then every REFRESH_SECONDS"""
+        while not self._stopping.is_set():
+            with app.app_context():
+                self.refresh()
+            self._stopping.wait(self.REFRESH_SECONDS)
+    
+    def _confirmed_entries(self) -> Dict[Tuple[str, ...], str]:
+        """Merchants whose recent saved transactions agree on one system category"""
+        since = datetime.utcnow() - timedelta(days=self.LOOKBACK_DAYS)
+        rows = db.session.query(Transaction.merchant, Category.name, Transaction.user_id, func.count(Transaction.id))\
+            .join(Category, Category.id == Transaction.category_id)\
+            .filter(Category.is_system.is_(True), Transaction.merchant.isnot(None), Transaction.merchant != '',
+                    Transaction.created_at >= since)\
+            .group_by(Transaction.merchant, Category.name, Transaction.user_id)\
+            .all()
+        
+        # Raw merchant strings that normalize alike are counted together, and
+        # a user who spells a merchant several ways still counts once
+        counts = {}
+        for merchant, category, user_id, n in rows:
+            words = tuple(self.normalize(merchant))
+            if words:
+                tally = counts.setdefault(words, {}).setdefault(category, [0, set()])
+                tally[0] += n
+                tally[1].add(user_id)
+        
+        entries = {}
+        totals = {}
+        for words, by_category in counts.items():
+            category, (n, users) = max(by_category.items(), key=lambda item: item[1][0])
+            totals[words] = sum(t for t, _ in by_category.values())
+            if len(users) >= self.MIN_USERS and n >= self.MIN_SUPPORT and n >= self.MIN_SHARE * totals[words]:
+                entries[words] = category
+        
+        return dict(sorted(entries.items(), key=lambda e: -totals[e[0]])[:self.MAX_ENTRIES])
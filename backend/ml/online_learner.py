@@ -0,0 +1,165 @@
+"""
+Online Categorizer Learning
+Feeds user category corrections to the categorizer in background batches
+"""
+import os
+import time
+import queue
+import atexit
+import threading
+from typing import Dict, Optional
+
+from ml.categorizer import categorizer as default_categorizer
+
+
+class OnlineLearner:
+    """
+    Queues category corrections and applies them in small batches
+    
+    Routes call record() when a user changes a transaction's category; the
+    call only enqueues. A daemon thread, started on the first correction,
+    applies a batch once BATCH_SIZE corrections are waiting or FLUSH_SECONDS
+    have passed, and checkpoints the model every CHECKPOINT_SECONDS and at
+    exit. Does nothing unless the categorizer runs in online mode.
+    
+    Each worker process learns from the corrections it receives and the last
+    checkpoint written wins, so with several workers a restart only keeps
+    the corrections seen by the worker that checkpointed last.
+    """
+    
+    BATCH_SIZE = int(os.getenv('ONLINE_BATCH_SIZE', 32))
+    FLUSH_SECONDS = float(os.getenv('ONLINE_FLUSH_SECONDS', 5))
+    CHECKPOINT_SECONDS = float(os.getenv('ONLINE_CHECKPOINT_SECONDS', 300))
+    MAX_PENDING = 10000
+    
+    def __init__(self, categorizer=None):
+        self.categorizer = categorizer or default_categorizer
+        self._queue = queue.Queue(maxsize=self.MAX_PENDING)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._dirty = False
+        self.learned = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.batches = 0
+        self.checkpoints = 0
+    
+    def record(self, user_id: int, description: Optional[str], merchant: Optional[str],
+               category_name: Optional[str]) -> bool:
+        """Queue a corrected category for a transaction; returns False if not queued"""
+        if not self.categorizer.online or not category_name:
+            return False
+        
+        text = self.categorizer.preprocess_text(f"{description or ''} {merchant or ''}")
+        if not text:
+            return False
+        
+        self._start()
+        try:
+            self._queue.put_nowait((user_id, text, category_name))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+    
+    def flush(self) -> int:
+        """Apply every queued correction now; returns the number learned"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return self._apply(batch)
+    
+    def checkpoint(self):
+        """Write the online model to disk if it changed since the last checkpoint"""
+        if not self._dirty:
+            return
+        try:
+            self._dirty = False
+            self.categorizer.save_checkpoint()
+            self.checkpoints += 1
+        except Exception as e:
+            self._dirty = True
+            print(f"Error saving categorizer checkpoint: {e}")
+    
+    def stop(self):
+        """Stop the background thread, applying and checkpointing pending corrections"""
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout=self.FLUSH_SECONDS + 5)
+        self.flush()
+        self.checkpoint()
+    
+    def stats(self) -> Dict:
+        """Counters for this worker process"""
+        return {
+            'online': self.categorizer.online,
+            'pending': self._queue.qsize(),
+            'learned': self.learned,
+            'skipped': self.skipped,
+            'dropped': self.dropped,
+            'batches': self.batches,
+            'checkpoints': self.checkpoints
+        }
+    
+    def _start(self):
+        """Start the background thread on first use"""
+        if self._thread:
+            return
+        with self._lock:
+            if self._thread:
+                return
+            self._thread = threading.Thread(target=self._run, name='online-learner', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+    
+    def _run(self):
+        """Collect corrections into batches and apply them"""
+        batch = []
+        deadline = time.monotonic() + self.FLUSH_SECONDS
+        last_checkpoint = time.monotonic()
+        
+        while not self._stopping.is_set():
+            try:
+                batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                pass
+            
+            now = time.monotonic()
+            if len(batch) >= self.BATCH_SIZE or (batch and now >= deadline):
+                self._apply(batch)
+                batch = []
+            if now >= deadline:
+                deadline = now + self.FLUSH_SECONDS
+            
+            if now - last_checkpoint >= self.CHECKPOINT_SECONDS:
+                self.checkpoint()
+                last_checkpoint = now
+        
+        self._apply(batch)
+    
+    def _apply(self, batch) -> int:
+        """Learn one batch of (user_id, text, category_name) corrections"""
+        if not batch:
+            return 0
+        
+        try:
+            learned = self.categorizer.learn([text for _, text, _ in batch],
+                                             [label for _, _, label in batch])
+        except Exception as e:
+            print(f"Error applying category corrections: {e}")
+            learned = 0
+        
+        self.learned += learned
+        self.skipped += len(batch) - learned
+        self.batches += 1
+        if learned:
+            self._dirty = True
+        return learned
+
+
+# Global instance
+online_learner = OnlineLearner()
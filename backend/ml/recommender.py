@@ -4,7 +4,8 @@ Generates personalized financial recommendations
 """
 from datetime import datetime, timedelta
 from sqlalchemy import func
-from database.models import Transaction, Budget, Category, db
+from database.models import Transaction, Category, db
+from services.budget_tracker import budget_tracker
 
 
 class RecommendationEngine:
@@ -98,18 +99,11 @@ class RecommendationEngine:
         recommendations = []
         
         try:
-            budgets = Budget.query.filter_by(user_id=user_id).all()
-            
-            for budget in budgets:
-                # Get actual spending
-                actual = db.session.query(func.sum(Transaction.amount)).filter(
-                    Transaction.user_id == user_id,
-                    Transaction.category_id == budget.category_id,
-                    Transaction.type == 'expense'
-                ).scalar() or 0
-                
-                budget_amount = float(budget.amount)
-                actual_amount = float(actual)
+            for budget in budget_tracker.status(user_id):
+                # Spending over the budget's current period
+                budget_amount = budget['amount']
+                actual_amount = budget['spent']
+                category_name = budget['category_name']
                 
                 # Over budget
                 if actual_amount > budget_amount * 1.1:
@@ -118,8 +112,8 @@ class RecommendationEngine:
                     
                     recommendations.append({
                         'type': 'budget_alert',
-                        'category': budget.category.name if budget.category else 'Unknown',
-                        'title': f'Over budget in {budget.category.name if budget.category else "category"}',
+                        'category': category_name or 'Unknown',
+                        'title': f'Over budget in {category_name or "category"}',
                         'message': f'You\'ve exceeded your budget by ${overage:.2f} ({percentage:.1f}%).',
                         'impact': f'Reduce spending by ${overage:.2f}',
                         'priority': 9,
@@ -131,9 +125,9 @@ class RecommendationEngine:
                     remaining = budget_amount - actual_amount
                     recommendations.append({
                         'type': 'budget_warning',
-                        'category': budget.category.name if budget.category else 'Unknown',
+                        'category': category_name or 'Unknown',
                         'title': f'Approaching budget limit',
-                        'message': f'You have ${remaining:.2f} remaining in {budget.category.name if budget.category else "category"}.',
+                        'message': f'You have ${remaining:.2f} remaining in {category_name or "category"}.',
                         'impact': 'Monitor spending carefully',
                         'priority': 5,
                         'action': 'monitor'
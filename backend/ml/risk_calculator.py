@@ -4,8 +4,9 @@ Calculates financial risk score based on multiple factors
 """
 import numpy as np
 from datetime import datetime, timedelta
-from sqlalchemy import func
-from database.models import Transaction, Budget, db
+from sqlalchemy import func, case
+from database.models import Transaction, db
+from services.budget_tracker import budget_tracker
 
 
 class RiskCalculator:
@@ -28,24 +29,25 @@ class RiskCalculator:
         # Get user data
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=90)  # Last 3 months
+        snapshot = self.load_snapshot(user_id, start_date, end_date)
         
         # 1. Spending Velocity (0-25 points)
-        velocity_score, velocity_data = self._calculate_spending_velocity(user_id, start_date, end_date)
+        velocity_score, velocity_data = self._calculate_spending_velocity(snapshot)
         score += velocity_score
         factors['spending_velocity'] = velocity_data
         
         # 2. Savings Rate (0-20 points, inverse)
-        savings_score, savings_data = self._calculate_savings_rate(user_id, start_date, end_date)
+        savings_score, savings_data = self._calculate_savings_rate(snapshot)
         score += savings_score
         factors['savings_rate'] = savings_data
         
         # 3. Budget Adherence (0-10 points)
-        budget_score, budget_data = self._calculate_budget_adherence(user_id)
+        budget_score, budget_data = self._calculate_budget_adherence(snapshot)
         score += budget_score
         factors['budget_adherence'] = budget_data
         
         # 4. Category Concentration (0-10 points)
-        concentration_score, concentration_data = self._calculate_category_concentration(user_id, start_date, end_date)
+        concentration_score, concentration_data = self._calculate_category_concentration(snapshot)
         score += concentration_score
         factors['category_concentration'] = concentration_data
         
@@ -76,24 +78,62 @@ class RiskCalculator:
             'factors': factors
         }
     
-    def _calculate_spending_velocity(self, user_id, start_date, end_date):
+    def load_snapshot(self, user_id, start_date, end_date):
+        """
+        Load everything the risk factors need in one pass over the window
+        
+        A single grouped query returns income and expense totals per day and
+        category; monthly totals are added up from those here. Budget status
+        comes from the budget tracker, which needs two queries however many
+        budgets the user has.
+        
+        Returns:
+            Dict with monthly expense totals ('YYYY-MM' -> amount, months with
+            expenses only), income and expense totals, expenses by category
+            and the budget_tracker.status() of every budget
+        """
+        rows = db.session.query(
+            Transaction.transaction_date,
+            Transaction.category_id,
+            func.sum(case((Transaction.type == 'income', Transaction.amount))).label('income'),
+            func.sum(case((Transaction.type == 'expense', Transaction.amount))).label('expense')
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.transaction_date >= start_date,
+            Transaction.transaction_date <= end_date
+        ).group_by(Transaction.transaction_date, Transaction.category_id).all()
+        
+        snapshot = {
+            'monthly_expenses': {},
+            'income': 0,
+            'expenses': 0,
+            'category_expenses': {},
+            'budgets': budget_tracker.status(user_id, end_date)
+        }
+        for row in rows:
+            if row.income is not None:
+                snapshot['income'] += row.income
+            if row.expense is not None:
+                # Dates come back as strings from some drivers
+                month = str(row.transaction_date)[:7]
+                snapshot['expenses'] += row.expense
+                monthly = snapshot['monthly_expenses']
+                monthly[month] = monthly.get(month, 0) + row.expense
+                by_category = snapshot['category_expenses']
+                by_category[row.category_id] = by_category.get(row.category_id, 0) + row.expense
+        
+        snapshot['monthly_expenses'] = dict(sorted(snapshot['monthly_expenses'].items()))
+        return snapshot
+    
+    def _calculate_spending_velocity(self, snapshot):
         """Calculate spending velocity (rate of increase)"""
         try:
-            # Get monthly expenses - MySQL compatible
-            expenses = db.session.query(
-                func.date_format(Transaction.transaction_date, '%Y-%m').label('month'),
-                func.sum(Transaction.amount).label('total')
-            ).filter(
-                Transaction.user_id == user_id,
-                Transaction.type == 'expense',
-                Transaction.transaction_date >= start_date,
-                Transaction.transaction_date <= end_date
-            ).group_by('month').order_by('month').all()
+            expenses = snapshot['monthly_expenses']
             
             if len(expenses) < 2:
                 return 5, {'score': 5, 'trend': 'insufficient_data'}
             
-            amounts = [float(exp.total) for exp in expenses]
+            amounts = [float(total) for total in expenses.values()]
             avg = np.mean(amounts)
             
             if avg == 0:
@@ -124,22 +164,11 @@ class RiskCalculator:
             print(f"Error calculating spending velocity: {e}")
             return 10, {'score': 10, 'error': str(e)}
     
-    def _calculate_savings_rate(self, user_id, start_date, end_date):
+    def _calculate_savings_rate(self, snapshot):
         """Calculate savings rate (income - expenses) / income"""
         try:
-            income = db.session.query(func.sum(Transaction.amount)).filter(
-                Transaction.user_id == user_id,
-                Transaction.type == 'income',
-                Transaction.transaction_date >= start_date,
-                Transaction.transaction_date <= end_date
-            ).scalar() or 0
-            
-            expenses = db.session.query(func.sum(Transaction.amount)).filter(
-                Transaction.user_id == user_id,
-                Transaction.type == 'expense',
-                Transaction.transaction_date >= start_date,
-                Transaction.transaction_date <= end_date
-            ).scalar() or 0
+            income = snapshot['income']
+            expenses = snapshot['expenses']
             
             if income == 0:
                 return 15, {'score': 15, 'rate': 0, 'note': 'no_income'}
@@ -170,26 +199,20 @@ class RiskCalculator:
             print(f"Error calculating savings rate: {e}")
             return 10, {'score': 10, 'error': str(e)}
     
-    def _calculate_budget_adherence(self, user_id):
+    def _calculate_budget_adherence(self, snapshot):
         """Calculate how well user adheres to budgets"""
         try:
-            budgets = Budget.query.filter_by(user_id=user_id).all()
+            budgets = snapshot['budgets']
             
             if not budgets:
                 return 5, {'score': 5, 'note': 'no_budgets_set'}
             
             variances = []
             for budget in budgets:
-                # Get actual spending for category
-                actual = db.session.query(func.sum(Transaction.amount)).filter(
-                    Transaction.user_id == user_id,
-                    Transaction.category_id == budget.category_id,
-                    Transaction.type == 'expense'
-                ).scalar() or 0
-                
-                budget_amount = float(budget.amount)
-                if budget_amount > 0:
-                    variance = ((actual - budget_amount) / budget_amount) * 100
+                # Spending over the budget's current period; not-yet-started budgets don't count
+                budget_amount = budget['amount']
+                if budget_amount > 0 and budget['status'] != 'upcoming':
+                    variance = ((budget['spent'] - budget_amount) / budget_amount) * 100
                     variances.append(variance)
             
             if not variances:
@@ -218,23 +241,15 @@ class RiskCalculator:
             print(f"Error calculating budget adherence: {e}")
             return 5, {'score': 5, 'error': str(e)}
     
-    def _calculate_category_concentration(self, user_id, start_date, end_date):
+    def _calculate_category_concentration(self, snapshot):
         """Calculate if spending is concentrated in one category"""
         try:
-            category_totals = db.session.query(
-                Transaction.category_id,
-                func.sum(Transaction.amount).label('total')
-            ).filter(
-                Transaction.user_id == user_id,
-                Transaction.type == 'expense',
-                Transaction.transaction_date >= start_date,
-                Transaction.transaction_date <= end_date
-            ).group_by(Transaction.category_id).all()
+            category_totals = snapshot['category_expenses']
             
             if not category_totals:
                 return 0, {'score': 0, 'note': 'no_expenses'}
             
-            amounts = [float(cat.total) for cat in category_totals]
+            amounts = [float(total) for total in category_totals.values()]
             total = sum(amounts)
             
             if total == 0:
@@ -0,0 +1,153 @@
+"""
+Budget Tracking Service
+Budget vs actual spending for all of a user's budgets in one query
+"""
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import select, literal, union_all, func, and_
+
+from database.models import db, Budget, Category, Transaction
+
+
+class BudgetTracker:
+    """
+    Spending against each budget over that budget's current period
+    
+    Every budget's period window is worked out in Python, then the windows
+    are joined to transactions as a derived table so one grouped query sums
+    the spending of all budgets, however many the user has.
+    
+    Periods run from the budget's start_date when it has one (a monthly
+    budget starting on the 15th runs 15th to 14th), otherwise they follow
+    the calendar. A budget past its end_date reports its last period, cut
+    off at the end_date.
+    """
+    
+    PERIODS = {
+        'weekly': relativedelta(weeks=1),
+        'monthly': relativedelta(months=1),
+        'yearly': relativedelta(years=1)
+    }
+    
+    # Share of the budget spent before a budget is reported as nearly used up
+    WARNING_SHARE = 0.9
+    
+    def period_window(self, budget: Budget, today: Optional[date] = None) -> Tuple[date, date]:
+        """First and last day of the budget's period that contains today"""
+        today = today or date.today()
+        period = budget.period if budget.period in self.PERIODS else 'monthly'
+        step = self.PERIODS[period]
+        
+        reference = min(today, budget.end_date) if budget.end_date else today
+        if budget.start_date:
+            anchor = budget.start_date
+            reference = max(reference, anchor)
+        elif period == 'weekly':
+            anchor = reference - timedelta(days=reference.weekday())
+        elif period == 'monthly':
+            anchor = reference.replace(day=1)
+        else:
+            anchor = reference.replace(month=1, day=1)
+        
+        # Whole periods between the anchor and the reference day
+        elapsed = relativedelta(reference, anchor)
+        if period == 'weekly':
+            periods = (reference - anchor).days // 7
+        elif period == 'monthly':
+            periods = elapsed.years * 12 + elapsed.months
+        else:
+            periods = elapsed.years
+        
+        start = anchor + step * periods
+        end = anchor + step * (periods + 1) - timedelta(days=1)
+        if budget.end_date:
+            end = min(end, budget.end_date)
+        return start, end
+    
+    def status(self, user_id: int, today: Optional[date] = None) -> List[Dict]:
+        """
+        Budget vs actual for every budget of a user
+        
+        Returns:
+            One dict per budget with its period window, amount, spent,
+            remaining, percent_used and status ('upcoming', 'ok', 'warning'
+            or 'over')
+        """
+        today = today or date.today()
+        budgets = db.session.query(Budget, Category.name)\
+            .outerjoin(Category, Category.id == Budget.category_id)\
+            .filter(Budget.user_id == user_id)\
+            .order_by(Budget.id)\
+            .all()
+        if not budgets:
+            return []
+        
+        windows = {budget.id: self.period_window(budget, today) for budget, _ in budgets}
+        spent = self._spending(user_id, [
+            (budget.id, budget.category_id) + windows[budget.id] for budget, _ in budgets
+        ])
+        
+        results = []
+        for budget, category_name in budgets:
+            start, end = windows[budget.id]
+            amount = float(budget.amount)
+            actual = spent.get(budget.id, 0.0)
+            
+            if start > today:
+                state = 'upcoming'
+            elif actual > amount:
+                state = 'over'
+            elif actual >= amount * self.WARNING_SHARE:
+                state = 'warning'
+            else:
+                state = 'ok'
+            
+            results.append({
+                'budget_id': budget.id,
+                'category_id': budget.category_id,
+                'category_name': category_name,
+                'period': budget.period,
+                'period_start': start.isoformat(),
+                'period_end': end.isoformat(),
+                'amount': amount,
+                'spent': round(actual, 2),
+                'remaining': round(amount - actual, 2),
+                'percent_used': round(actual / amount * 100, 2) if amount > 0 else None,
+                'status': state
+            })
+        
+        return results
+    
+    def _spending(self, user_id: int, windows: List[Tuple[int, int, date, date]]) -> Dict[int, float]:
+        """Expense total per budget id over each (budget_id, category_id, start, end) window"""
+        window_rows = union_all(*[
+            select(
+                literal(budget_id).label('budget_id'),
+                literal(category_id).label('category_id'),
+                literal(start, type_=db.Date).label('start_date'),
+                literal(end, type_=db.Date).label('end_date')
+            )
+            for budget_id, category_id, start, end in windows
+        ]).subquery('budget_windows')
+        
+        rows = db.session.query(
+            window_rows.c.budget_id,
+            func.sum(Transaction.amount)
+        ).join(
+            Transaction, and_(
+                Transaction.category_id == window_rows.c.category_id,
+                Transaction.transaction_date >= window_rows.c.start_date,
+                Transaction.transaction_date <= window_rows.c.end_date
+            )
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.type == 'expense'
+        ).group_by(window_rows.c.budget_id).all()
+        
+        return {budget_id: float(total or 0) for budget_id, total in rows}
+
+
+# Global instance
+budget_tracker = BudgetTracker()
@@ -0,0 +1,109 @@
+"""
+Category Directory Service
+In-process lookup tables for system and custom categories
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from database.models import Category
+
+
+class CategoryDirectory:
+    """
+    Name -> id and id -> dict maps for categories, loaded once per owner
+    
+    System categories are shared by every user and custom categories are
+    loaded per user on first use. categories_bp invalidates a user's entry
+    whenever it creates, updates or deletes a category. Entries also expire
+    after CATEGORY_CACHE_TTL seconds, so changes made through another worker
+    process are picked up.
+    
+    At most CATEGORY_CACHE_MAX_USERS users' entries are kept, evicting the
+    least recently used; the system entry is never evicted.
+    """
+    
+    TTL = float(os.getenv('CATEGORY_CACHE_TTL', 300))
+    MAX_USERS = int(os.getenv('CATEGORY_CACHE_MAX_USERS', 10000))
+    
+    def __init__(self, ttl: Optional[float] = None, max_users: Optional[int] = None):
+        self.ttl = self.TTL if ttl is None else ttl
+        self.max_users = self.MAX_USERS if max_users is None else max_users
+        # None -> system categories, user_id -> that user's custom categories, in LRU order
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a load racing with one isn't stored
+        self._generation = 0
+    
+    def system_id(self, name: str) -> Optional[int]:
+        """Id of the system category with this name"""
+        return self._load(None)['by_name'].get(name)
+    
+    def custom_id(self, user_id: int, name: str) -> Optional[int]:
+        """Id of a user's custom category with this name"""
+        return self._load(user_id)['by_name'].get(name)
+    
+    def get(self, category_id: int, user_id: Optional[int] = None) -> Optional[Dict]:
+        """Category dict for an id, looking in the system and the user's categories"""
+        category = self._load(None)['by_id'].get(category_id)
+        if category is None and user_id is not None:
+            category = self._load(user_id)['by_id'].get(category_id)
+        return dict(category) if category else None
+    
+    def categories(self, user_id: int) -> List[Dict]:
+        """System categories followed by the user's custom categories"""
+        system = self._load(None)['by_id'].values()
+        custom = self._load(user_id)['by_id'].values()
+        return [dict(c) for c in list(system) + list(custom)]
+    
+    def invalidate(self, user_id: Optional[int] = None):
+        """Drop a user's custom categories, or every entry when no user is given"""
+        with self._lock:
+            self._generation += 1
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+    
+    def _load(self, user_id: Optional[int]) -> Dict:
+        """Get the maps for an owner, querying them if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            generation = self._generation
+            if entry and time.monotonic() - entry['loaded_at'] < self.ttl:
+                self._entries.move_to_end(user_id)
+                return entry
+        
+        if user_id is None:
+            query = Category.query.filter_by(is_system=True, user_id=None)
+        else:
+            query = Category.query.filter_by(user_id=user_id, is_system=False)
+        
+        by_name = {}
+        by_id = {}
+        for category in query.order_by(Category.id).all():
+            by_id[category.id] = category.to_dict()
+            by_name.setdefault(category.name, category.id)
+        
+        entry = {'by_name': by_name, 'by_id': by_id, 'loaded_at': time.monotonic()}
+        with self._lock:
+            if generation == self._generation:
+                self._entries[user_id] = entry
+                self._entries.move_to_end(user_id)
+                self._evict()
+        return entry
+    
+    def _evict(self):
+        """Drop least recently used users beyond max_users (lock held)"""
+        while len(self._entries) - (None in self._entries) > self.max_users:
+            owner = next(iter(self._entries))
+            if owner is None:
+                self._entries.move_to_end(None)
+                continue
+            del self._entries[owner]
+
+
+# Global instance
+category_directory = CategoryDirectory()
@@ -0,0 +1,222 @@
+"""
+Category Overlay Service
+Per-user merchant -> category overrides layered on the shared categorizer
+"""
+import os
+import re
+import sys
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql, sqlite
+
+from database.models import db, CategoryOverride
+from services.category_directory import category_directory
+
+
+class CategoryOverlays:
+    """
+    Each user's merchant -> category_id choices, kept in an LRU cache
+    
+    The shared model only knows the system categories. When a user corrects
+    a transaction's category, the choice is stored for its merchant in
+    category_overrides, and later transactions from that merchant get the
+    user's category, custom ones included, whatever the model predicts.
+    
+    Overlays are loaded per user on first use. The cache is bounded by the
+    estimated memory of the loaded overlays (CATEGORY_OVERLAY_CACHE_MB),
+    evicting the least recently used users first, and entries expire after
+    CATEGORY_CACHE_TTL seconds so other workers' changes are picked up.
+    A worker's own choices reach its cache once their transaction commits.
+    """
+    
+    # session.info key of the choices learned in the current transaction
+    PENDING = 'category_overlays.pending'
+    
+    MAX_BYTES = int(float(os.getenv('CATEGORY_OVERLAY_CACHE_MB', 32)) * 1024 * 1024)
+    TTL = float(os.getenv('CATEGORY_CACHE_TTL', 300))
+    KEY_LENGTH = 100
+    
+    def __init__(self, max_bytes: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_bytes = self.MAX_BYTES if max_bytes is None else max_bytes
+        self.ttl = self.TTL if ttl is None else ttl
+        # user_id -> {'overrides': {merchant_key: category_id}, 'size': bytes, 'loaded_at': t}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        event.listen(db.session, 'after_commit', self._publish)
+        event.listen(db.session, 'after_soft_rollback', self._discard)
+    
+    def merchant_key(self, description: Optional[str], merchant: Optional[str]) -> Optional[str]:
+        """Merchant name (or description) lowercased, letters only"""
+        text = re.sub(r'[^a-z]+', ' ', str(merchant or description or '').lower()).strip()
+        return text[:self.KEY_LENGTH].strip() or None
+    
+    def category_for(self, user_id: int, description: Optional[str],
+                     merchant: Optional[str]) -> Optional[Dict]:
+        """The user's category for this merchant, if they have chosen one"""
+        key = self.merchant_key(description, merchant)
+        category_id = self._load(user_id).get(key) if key else None
+        return category_directory.get(category_id, user_id) if category_id else None
+    
+    def apply(self, user_id: int, transactions: List[Dict]) -> int:
+        """
+        Replace suggested categories with the user's overrides, in place
+        
+        Returns:
+            Number of transactions overridden
+        """
+        overrides = self._load(user_id)
+        if not overrides:
+            return 0
+        
+        applied = 0
+        for trans in transactions:
+            key = self.merchant_key(trans.get('description'), trans.get('merchant'))
+            category_id = overrides.get(key) if key else None
+            category = category_directory.get(category_id, user_id) if category_id else None
+            if category:
+                trans['category_id'] = category['id']
+                trans['suggested_category'] = category['name']
+                trans['category_confidence'] = 1.0
+                applied += 1
+        
+        return applied
+    
+    def learn(self, user_id: int, corrections: Iterable[Tuple]):
+        """
+        Store (description, merchant, category_id) choices of a user
+        
+        Rows are upserted in the session's transaction; the caller commits,
+        and the choices reach the cached overlay when it does.
+        """
+        choices = {}
+        for description, merchant, category_id in corrections:
+            key = self.merchant_key(description, merchant)
+            if key and category_id:
+                choices[key] = category_id
+        if not choices:
+            return
+        
+        # An upsert, so concurrent corrections of one merchant don't collide
+        # on the (user_id, merchant_key) unique constraint
+        now = datetime.utcnow()
+        db.session.execute(self._upsert([
+            {'user_id': user_id, 'merchant_key': key, 'category_id': category_id, 'updated_at': now}
+            for key, category_id in choices.items()
+        ]))
+        
+        db.session.info.setdefault(self.PENDING, {}).setdefault(user_id, {}).update(choices)
+    
+    def invalidate(self, user_id: Optional[int] = None):
+        """Drop a user's overlay, or every overlay when no user is given"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+                self._bytes = 0
+            elif user_id in self._entries:
+                self._bytes -= self._entries.pop(user_id)['size']
+    
+    def stats(self) -> Dict:
+        """Cache counters for this worker process"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'evictions': self.evictions,
+                'users': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes
+            }
+    
+    def _load(self, user_id: int) -> Dict[str, int]:
+        """Get a user's overrides, querying them if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and time.monotonic() - entry['loaded_at'] < self.ttl:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry['overrides']
+            self.misses += 1
+        
+        rows = db.session.query(CategoryOverride.merchant_key, CategoryOverride.category_id)\
+            .filter(CategoryOverride.user_id == user_id)\
+            .all()
+        overrides = {key: category_id for key, category_id in rows}
+        
+        with self._lock:
+            if user_id in self._entries:
+                self._bytes -= self._entries.pop(user_id)['size']
+            entry = {'overrides': overrides, 'size': 0, 'loaded_at': time.monotonic()}
+            self._entries[user_id] = entry
+            self._resize(user_id, entry)
+        return overrides
+    
+    def _upsert(self, rows: List[Dict]):
+        """INSERT of category_overrides rows that updates the category of existing ones"""
+        table = CategoryOverride.__table__
+        if db.session.get_bind().dialect.name == 'mysql':
+            statement = mysql.insert(table).values(rows)
+            return statement.on_duplicate_key_update(
+                category_id=statement.inserted.category_id,
+                updated_at=statement.inserted.updated_at
+            )
+        
+        statement = sqlite.insert(table).values(rows)
+        return statement.on_conflict_do_update(
+            index_elements=['user_id', 'merchant_key'],
+            set_={'category_id': statement.excluded.category_id, 'updated_at': statement.excluded.updated_at}
+        )
+    
+    def _publish(self, session):
+        """Apply the choices of a committed transaction to loaded overlays"""
+        # Fired for released savepoints too; only the outer commit makes choices visible
+        if session.in_nested_transaction():
+            return
+        pending = session.info.pop(self.PENDING, None)
+        if not pending:
+            return
+        
+        # Update a loaded overlay in place instead of reloading it
+        with self._lock:
+            for user_id, choices in pending.items():
+                entry = self._entries.get(user_id)
+                if entry:
+                    entry['overrides'].update(choices)
+                    self._resize(user_id, entry)
+    
+    def _discard(self, session, previous_transaction):
+        """Forget choices learned in a transaction that was rolled back"""
+        if not previous_transaction.nested:
+            session.info.pop(self.PENDING, None)
+    
+    def _resize(self, user_id: int, entry: Dict):
+        """Re-estimate an overlay's memory and evict LRU users beyond max_bytes (lock held)"""
+        overrides = entry['overrides']
+        size = sys.getsizeof(overrides) + sum(sys.getsizeof(key) for key in overrides)
+        self._bytes += size - entry['size']
+        entry['size'] = size
+        
+        # The overlay just used stays, even if it alone exceeds the budget
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            evicted_id, evicted = next(iter(self._entries.items()))
+            if evicted_id == user_id:
+                self._entries.move_to_end(user_id)
+                continue
+            del self._entries[evicted_id]
+            self._bytes -= evicted['size']
+            self.evictions += 1
+
+
+# Global instance
+category_overlays = CategoryOverlays()
@@ -3,40 +3,91 @@ Data Cleaning Service
 Handles AI-powered preprocessing and cleaning of extracted transaction data
 """
 import re
+import numpy as np
+import pandas as pd
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from collections import Counter
 
+from services.keyword_matcher import TRANSACTION_KEYWORDS, transaction_keywords
+from services.memo_cache import MemoCache
+
+
+class KeyDigests:
+    """
+    Duplicate keys seen in earlier chunks of a streamed file, as 8-byte digests
+    
+    Only the 64-bit hash of each (date, amount, description) key is kept, in
+    sorted uint64 runs searched with np.searchsorted, so a file costs 8 bytes
+    per unique row instead of a tuple of strings. A run is merged into the one
+    before it while it is at least half that size, which keeps the number of
+    runs logarithmic. Two different keys with the same digest would drop the
+    later row as a duplicate; at ten million rows the odds are about 1 in 400,000.
+    """
+    
+    def __init__(self):
+        self._runs = []
+    
+    def __len__(self):
+        return sum(len(run) for run in self._runs)
+    
+    def first_seen(self, keys: List[tuple]) -> np.ndarray:
+        """Mask of the keys not seen before, first occurrence only, and remember them"""
+        digests = np.fromiter((hash(key) & 0xFFFFFFFFFFFFFFFF for key in keys), dtype=np.uint64, count=len(keys))
+        unique, first = np.unique(digests, return_index=True)
+        
+        known = np.zeros(len(unique), dtype=bool)
+        for run in self._runs:
+            positions = np.searchsorted(run, unique).clip(max=len(run) - 1)
+            known |= run[positions] == unique
+        
+        mask = np.zeros(len(keys), dtype=bool)
+        mask[first[~known]] = True
+        self._add(unique[~known])
+        return mask
+    
+    def _add(self, digests: np.ndarray):
+        """Store sorted new digests as a run, merging runs of similar size"""
+        if not len(digests):
+            return
+        self._runs.append(digests)
+        while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+            last = self._runs.pop()
+            self._runs[-1] = np.union1d(self._runs[-1], last)
+
 
 class DataCleaner:
     """Handles data cleaning and preprocessing for transactions"""
     
-    # Common noise words to remove from descriptions
-    NOISE_WORDS = [
-        'ref', 'reference', 'txn', 'transaction', 'neft', 'imps', 'upi', 'rtgs',
-        'atm', 'ach', 'ecs', 'nach', 'mmt', 'iob', 'sbi', 'hdfc', 'icici', 'axis',
-        'transfer', 'payment', 'paid', 'received', 'debit', 'credit', 'card',
-        'pos', 'ecom', 'online', 'net', 'banking', 'mobile', 'app'
-    ]
+    # Keyword lists live with the shared matcher so every service scans the same lists
+    NOISE_WORDS = TRANSACTION_KEYWORDS['noise']
+    INCOME_KEYWORDS = TRANSACTION_KEYWORDS['income']
+    EXPENSE_KEYWORDS = TRANSACTION_KEYWORDS['expense']
     
-    # Keywords for income identification
-    INCOME_KEYWORDS = [
-        'salary', 'wages', 'income', 'credit', 'deposit', 'refund', 'cashback',
-        'dividend', 'interest', 'bonus', 'reimbursement', 'received', 'credited',
-        'from', 'reversal', 'return', 'inward'
+    # Precompiled patterns for the vectorized cleaning passes. A whole column is
+    # joined into one string with TEXT_SEPARATOR in front of every value, so
+    # these match what the per-row regexes match within each value.
+    TEXT_SEPARATOR = '\x00'
+    WHITESPACE_PATTERN = re.compile(r'\s+')
+    DESCRIPTION_REF_PATTERN = re.compile(r'\b\d{10,}\b')
+    DESCRIPTION_PREFIX_PATTERN = re.compile(
+        r'\x00(?:UPI|NEFT|IMPS|RTGS|ATM|POS|ECS)[/-]?\s*', re.IGNORECASE
+    )
+    DESCRIPTION_ID_PATTERN = re.compile(r'\b[A-Z0-9]{15,}\b')
+    MERCHANT_REF_PATTERN = re.compile(r'\b\d{8,}\b')
+    MERCHANT_PATTERNS = [
+        re.compile(r'(?:to|from|at|@)\s+([A-Za-z][A-Za-z0-9\s&\'\.]+)', re.IGNORECASE),
+        re.compile(r'^([A-Za-z][A-Za-z0-9\s&\'\.]{2,30}?)(?:\s+\d|$|-)', re.IGNORECASE),
     ]
     
-    # Keywords for expense identification
-    EXPENSE_KEYWORDS = [
-        'payment', 'purchase', 'buy', 'bought', 'paid', 'debit', 'withdrawal',
-        'transfer', 'to', 'bill', 'fee', 'charge', 'subscription', 'order',
-        'spent', 'expense', 'outward'
-    ]
-
-    def __init__(self):
-        pass
+    def __init__(self, use_vectorized: bool = True, cache_size: Optional[int] = None,
+                 cache_policy: Optional[str] = None):
+        self.use_vectorized = use_vectorized
+        # Normalized descriptions and merchants, keyed by their raw strings
+        self.description_cache = MemoCache(cache_size, cache_policy)
+        self.merchant_cache = MemoCache(cache_size, cache_policy)
     
-    def clean_transactions(self, transactions: List[Dict]) -> List[Dict]:
+    def clean_transactions(self, transactions: List[Dict], seen_keys: Optional[KeyDigests] = None) -> List[Dict]:
         """
         Clean and preprocess a list of transactions
         
@@ -46,12 +97,21 @@ class DataCleaner:
         3. Clean descriptions
         4. Validate transaction types
         5. Fill missing fields
+        
+        Args:
+            seen_keys: Duplicate keys from earlier batches of the same file.
+                Pass the same KeyDigests for every chunk of a streamed upload
+                so duplicates are removed across chunks; it is updated in place.
         """
         if not transactions:
             return []
         
+        df = self._build_frame(transactions) if self.use_vectorized else None
+        if df is not None:
+            return self._clean_vectorized(transactions, df, seen_keys)
+        
         # Step 1: Remove duplicates
-        cleaned = self._remove_duplicates(transactions)
+        cleaned = self._remove_duplicates(transactions, seen_keys)
         
         # Step 2-5: Clean each transaction
         cleaned = [self._clean_transaction(t) for t in cleaned]
@@ -64,21 +124,196 @@ class DataCleaner:
         
         return cleaned
     
-    def _remove_duplicates(self, transactions: List[Dict]) -> List[Dict]:
-        """Remove duplicate transactions"""
-        seen = set()
-        unique = []
+    def _build_frame(self, transactions: List[Dict]) -> Optional[pd.DataFrame]:
+        """
+        Collect the fields the cleaning steps read into columns
+        
+        Returns None when a field has a type the vectorized passes would not
+        treat exactly like the per-row path; those batches are cleaned row by row.
+        """
+        df = pd.DataFrame({
+            'date': pd.Series([t.get('transaction_date', '') for t in transactions], dtype=object),
+            'amount': pd.Series([t.get('amount', 0) for t in transactions], dtype=object),
+            'description': pd.Series([t.get('description', '') for t in transactions], dtype=object),
+            'merchant': pd.Series([t.get('merchant') or '' for t in transactions], dtype=object),
+        })
+        
+        if pd.api.types.infer_dtype(df['date'], skipna=True) not in ('string', 'empty'):
+            return None
+        if pd.api.types.infer_dtype(df['amount'], skipna=True) not in ('integer', 'floating',
+                                                                     'mixed-integer-float', 'empty'):
+            return None
+        # None amounts are simply invalid, NaN or infinite ones are not handled here
+        present = ~np.array([a is None for a in df['amount']], dtype=bool)
+        if not np.isfinite(df['amount'].to_numpy(dtype=float)[present]).all():
+            return None
+        for column in ['description', 'merchant']:
+            if pd.api.types.infer_dtype(df[column], skipna=False) != 'string':
+                return None
+            # The joined text passes need a separator that never occurs in the values
+            if self.TEXT_SEPARATOR.join(df[column]).count(self.TEXT_SEPARATOR) != len(df) - 1:
+                return None
+        
+        return df
+    
+    def _clean_vectorized(self, transactions: List[Dict], df: pd.DataFrame,
+                          seen: Optional[KeyDigests] = None) -> List[Dict]:
+        """
+        Column-wise equivalent of the per-row cleaning steps
+        
+        Deduplication uses drop_duplicates on the key columns, descriptions and
+        merchants are normalized one pattern at a time over the whole column,
+        and the result is sorted once. Output matches the per-row path exactly.
+        """
+        # Step 1: Remove duplicates on (date, amount, description[:50])
+        df['description_key'] = [d.lower().strip()[:50] for d in df['description']]
+        df = df.drop_duplicates(subset=['date', 'amount', 'description_key'])
+        
+        if seen is not None and not df.empty:
+            df = df[seen.first_seen(list(zip(df['date'], df['amount'], df['description_key'])))]
+        
+        # Step 2: Drop rows without a date or a positive amount
+        amounts = df['amount'].to_numpy(dtype=float)
+        df = df[df['date'].fillna('').astype(bool).to_numpy() & (amounts > 0)]
+        if df.empty:
+            return []
+        
+        # Steps 3-5: Normalize fields
+        codes, uniques = pd.factorize(df['date'])
+        dates = np.array([d[:10] for d in uniques], dtype=object)[codes]
+        amounts = [round(float(a), 2) for a in df['amount']]
+        descriptions = self._clean_description_column(df['description'])
+        merchants = self._clean_merchant_column(df['merchant'], descriptions)
+        
+        cleaned = []
+        for idx, date_val, amount, description, merchant in zip(
+            df.index, dates, amounts, descriptions, merchants
+        ):
+            trans = {
+                **transactions[idx],
+                'transaction_date': date_val,
+                'amount': amount,
+                'description': description,
+                'merchant': merchant
+            }
+            if trans.get('type', '') not in ['income', 'expense']:
+                trans['type'] = self._infer_transaction_type(trans)
+            cleaned.append(trans)
         
-        for trans in transactions:
-            # Create a unique key from date + amount + description
-            key = (
+        # Sort by date
+        cleaned.sort(key=lambda x: x.get('transaction_date', ''), reverse=True)
+        
+        return cleaned
+    
+    def _join_text(self, values) -> str:
+        """
+        Join text values into one string, each value wrapped in TEXT_SEPARATOR
+        
+        The separator is neither whitespace nor a word character, so a regex
+        run once over the joined text sees every value's own boundaries.
+        """
+        sep = self.TEXT_SEPARATOR
+        return sep + sep.join(values) + sep
+    
+    def _split_text(self, text: str) -> List[str]:
+        """Inverse of _join_text"""
+        return text[1:-1].split(self.TEXT_SEPARATOR)
+    
+    def _squeeze_whitespace(self, text: str) -> str:
+        """Collapse whitespace runs and strip every value of joined text"""
+        sep = self.TEXT_SEPARATOR
+        return ' '.join(text.split()).replace(sep + ' ', sep).replace(' ' + sep, sep)
+    
+    def _clean_description_column(self, descriptions: pd.Series) -> pd.Series:
+        """Vectorized _clean_description, run once per distinct uncached description"""
+        codes, uniques = pd.factorize(descriptions)
+        
+        cleaned = np.empty(len(uniques), dtype=object)
+        cleaned[:] = self.description_cache.get_many(list(uniques), self._normalize_descriptions)
+        return pd.Series(cleaned[codes], index=descriptions.index, dtype=object)
+    
+    def _normalize_descriptions(self, descriptions: List[str]) -> List[str]:
+        """_normalize_description over a list, one pattern at a time"""
+        text = self._squeeze_whitespace(self._join_text(descriptions))
+        text = self.DESCRIPTION_REF_PATTERN.sub('', text)
+        text = self.DESCRIPTION_PREFIX_PATTERN.sub(self.TEXT_SEPARATOR, text)
+        text = self.DESCRIPTION_ID_PATTERN.sub('', text)
+        text = self._squeeze_whitespace(text)
+        
+        # Capitalize all-upper and all-lower descriptions
+        return [(d.title() if d.isupper() or d.islower() else d)[:255] for d in self._split_text(text)]
+    
+    def _clean_merchant_column(self, merchants: pd.Series, descriptions: pd.Series) -> pd.Series:
+        """Vectorized _clean_merchant, run once per distinct uncached (merchant, description)"""
+        codes, uniques = pd.factorize(pd.Series(list(zip(merchants, descriptions)), dtype=object))
+        
+        cleaned = np.empty(len(uniques), dtype=object)
+        cleaned[:] = self.merchant_cache.get_many(list(uniques), self._normalize_merchants)
+        return pd.Series(cleaned[codes], index=merchants.index, dtype=object)
+    
+    def _normalize_merchants(self, pairs: List[tuple]) -> List[str]:
+        """_normalize_merchant over a list of (merchant, description) pairs"""
+        merchants = pd.Series([m for m, _ in pairs], dtype=object)
+        descriptions = pd.Series([d for _, d in pairs], dtype=object)
+        codes, uniques = pd.factorize(merchants)
+        
+        text = self._squeeze_whitespace(self._join_text(uniques))
+        text = self.MERCHANT_REF_PATTERN.sub('', text)
+        text = self._squeeze_whitespace(text)
+        
+        cleaned = np.array(
+            [m[:100] if len(m) > 2 else '' for m in self._split_text(text)],
+            dtype=object
+        )
+        result = pd.Series(cleaned[codes], index=merchants.index, dtype=object)
+        
+        # Extract the rest from the cleaned description, one pattern at a time
+        pending = (result == '') & (descriptions != '')
+        for pattern in self.MERCHANT_PATTERNS:
+            if not pending.any():
+                break
+            
+            extracted = descriptions[pending].str.extract(pattern, expand=False).dropna()
+            extracted = extracted.str.strip().str.replace(self.WHITESPACE_PATTERN, ' ', regex=True)
+            extracted = extracted[(extracted.str.len() > 2) & (extracted.str.len() < 50)]
+            
+            # Remove noise words from end
+            found = pd.Series(
+                [self._strip_trailing_noise(text) for text in extracted],
+                index=extracted.index,
+                dtype=object
+            )
+            found = found[found != '']
+            
+            result.loc[found.index] = found
+            pending.loc[found.index] = False
+        
+        return result.tolist()
+    
+    def _strip_trailing_noise(self, text: str) -> str:
+        """Drop NOISE_WORDS from the end of an extracted merchant name"""
+        return ' '.join(transaction_keywords.strip_trailing('noise', text.split()))
+    
+    def _remove_duplicates(self, transactions: List[Dict], seen: Optional[KeyDigests] = None) -> List[Dict]:
+        """Remove duplicate transactions"""
+        # Create a unique key from date + amount + description
+        keys = [
+            (
                 trans.get('transaction_date', ''),
                 trans.get('amount', 0),
                 trans.get('description', '').lower().strip()[:50]
             )
-            
-            if key not in seen:
-                seen.add(key)
+            for trans in transactions
+        ]
+        
+        if seen is not None:
+            return [trans for trans, new in zip(transactions, seen.first_seen(keys)) if new]
+        
+        unique = []
+        local = set()
+        for trans, key in zip(transactions, keys):
+            if key not in local:
+                local.add(key)
                 unique.append(trans)
         
         return unique
@@ -134,6 +369,12 @@ class DataCleaner:
         return date_value[:10] if isinstance(date_value, str) else None
     
     def _clean_description(self, description: str) -> str:
+        """Clean transaction description, memoized by the raw string"""
+        if isinstance(description, str):
+            return self.description_cache.get(description, self._normalize_description, description)
+        return self._normalize_description(description)
+    
+    def _normalize_description(self, description: str) -> str:
         """Clean transaction description"""
         if not description:
             return ''
@@ -165,6 +406,13 @@ class DataCleaner:
         return desc[:255]  # Limit length
     
     def _clean_merchant(self, merchant: str, description: str) -> str:
+        """Clean and extract merchant name, memoized by the raw strings"""
+        if isinstance(merchant, (str, type(None))) and isinstance(description, (str, type(None))):
+            return self.merchant_cache.get((merchant, description), self._normalize_merchant,
+                                           merchant, description)
+        return self._normalize_merchant(merchant, description)
+    
+    def _normalize_merchant(self, merchant: str, description: str) -> str:
         """Clean and extract merchant name"""
         if merchant:
             merchant = str(merchant).strip()
@@ -190,9 +438,7 @@ class DataCleaner:
                     extracted = re.sub(r'\s+', ' ', extracted)
                     if 2 < len(extracted) < 50:
                         # Remove noise words from end
-                        words = extracted.split()
-                        while words and words[-1].lower() in self.NOISE_WORDS:
-                            words.pop()
+                        words = transaction_keywords.strip_trailing('noise', extracted.split())
                         if words:
                             return ' '.join(words)
         
@@ -203,9 +449,10 @@ class DataCleaner:
         description = (transaction.get('description', '') + ' ' + 
                       transaction.get('merchant', '')).lower()
         
-        # Count keyword matches
-        income_score = sum(1 for kw in self.INCOME_KEYWORDS if kw in description)
-        expense_score = sum(1 for kw in self.EXPENSE_KEYWORDS if kw in description)
+        # Count keyword matches, all lists in one scan
+        scores = transaction_keywords.scores(description)
+        income_score = scores['income']
+        expense_score = scores['expense']
         
         # Check amount sign if preserved
         amount = transaction.get('original_amount', transaction.get('amount', 0))
@@ -232,6 +479,34 @@ class DataCleaner:
             'total_expenses': sum(t.get('amount', 0) for t in cleaned if t.get('type') == 'expense'),
         }
     
+    def merge_cleaning_summaries(self, summaries: List[Dict]) -> Dict:
+        """Combine per-chunk cleaning summaries into one for the whole file"""
+        merged = {
+            'original_count': 0,
+            'cleaned_count': 0,
+            'duplicates_removed': 0,
+            'income_count': 0,
+            'expense_count': 0,
+            'date_range': {'start': None, 'end': None},
+            'total_income': 0,
+            'total_expenses': 0,
+        }
+        
+        for summary in summaries:
+            for key in ['original_count', 'cleaned_count', 'duplicates_removed', 'income_count',
+                        'expense_count', 'total_income', 'total_expenses']:
+                merged[key] += summary.get(key, 0)
+            
+            date_range = summary.get('date_range') or {}
+            if date_range.get('start'):
+                start = merged['date_range']['start']
+                merged['date_range']['start'] = min(start, date_range['start']) if start else date_range['start']
+            if date_range.get('end'):
+                end = merged['date_range']['end']
+                merged['date_range']['end'] = max(end, date_range['end']) if end else date_range['end']
+        
+        return merged
+    
     def _get_date_range(self, transactions: List[Dict]) -> Dict:
         """Get date range of transactions"""
         if not transactions:
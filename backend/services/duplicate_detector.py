@@ -0,0 +1,61 @@
+"""
+Duplicate Detection Service
+Finds incoming transactions that were already imported
+"""
+from typing import Dict, Iterable, List, Set
+
+from database.models import Transaction, transaction_fingerprint
+
+
+class DuplicateDetector:
+    """
+    Batch lookups against the indexed Transaction.fingerprint column
+    
+    Overlapping statement periods contain the same rows twice. A batch is
+    checked with one IN query per chunk instead of one query per row.
+    """
+    
+    QUERY_CHUNK_SIZE = 500
+    
+    def fingerprint(self, user_id: int, transaction: Dict) -> str:
+        """Fingerprint of a transaction dict"""
+        return transaction_fingerprint(
+            user_id,
+            transaction.get('transaction_date'),
+            transaction.get('amount', 0),
+            transaction.get('description')
+        )
+    
+    def existing_fingerprints(self, user_id: int, fingerprints: Iterable[str]) -> Set[str]:
+        """Subset of fingerprints the user already has transactions for"""
+        unique = list(set(fingerprints))
+        existing = set()
+        
+        for start in range(0, len(unique), self.QUERY_CHUNK_SIZE):
+            chunk = unique[start:start + self.QUERY_CHUNK_SIZE]
+            rows = Transaction.query\
+                .with_entities(Transaction.fingerprint)\
+                .filter(Transaction.user_id == user_id, Transaction.fingerprint.in_(chunk))\
+                .all()
+            existing.update(row.fingerprint for row in rows)
+        
+        return existing
+    
+    def flag(self, user_id: int, transactions: List[Dict]) -> int:
+        """
+        Mark each transaction with is_duplicate
+        
+        Returns:
+            Number of transactions that already exist
+        """
+        fingerprints = [self.fingerprint(user_id, t) for t in transactions]
+        existing = self.existing_fingerprints(user_id, fingerprints)
+        
+        for trans, fingerprint in zip(transactions, fingerprints):
+            trans['is_duplicate'] = fingerprint in existing
+        
+        return sum(1 for fingerprint in fingerprints if fingerprint in existing)
+
+
+# Global instance
+duplicate_detector = DuplicateDetector()
@@ -4,12 +4,21 @@ Handles extraction of transaction data from CSV, Excel, and PDF files
 """
 import os
 import re
+import time
+import codecs
+import threading
+import multiprocessing
+import numpy as np
 import pandas as pd
 import pdfplumber
-import chardet
+from chardet.universaldetector import UniversalDetector
 from datetime import datetime
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterator, BinaryIO
 from io import BytesIO
+from multiprocessing import TimeoutError as PoolTimeoutError
+
+from services.layout_registry import layout_registry
+from services.memo_cache import MemoCache
 
 
 class FileProcessor:
@@ -24,6 +33,31 @@ class FileProcessor:
         '%Y%m%d',
     ]
     
+    # Number of distinct values sampled when inferring a column's date format
+    DATE_SAMPLE_SIZE = 200
+    
+    # Number of distinct values sampled when detecting an amount column's decimal separator
+    AMOUNT_SAMPLE_SIZE = 200
+    
+    # Currency symbols and whitespace stripped from amounts
+    AMOUNT_STRIP_PATTERN = re.compile(r'[₹$€£¥\s]')
+    
+    # Amounts that are only valid with a decimal comma / decimal point
+    DECIMAL_COMMA_PATTERN = re.compile(r'^(?:\d{1,3}(?:\.\d{3})+|\d+),\d{1,2}$')
+    DECIMAL_POINT_PATTERN = re.compile(r'^(?:\d{1,3}(?:,\d{3})+|\d+)\.\d{1,2}$')
+    
+    # Rows per chunk when streaming large CSV files
+    CSV_CHUNK_SIZE = int(os.getenv('CSV_CHUNK_SIZE', 50000))
+    
+    # Encoding detection reads blocks of ENCODING_SAMPLE_SIZE bytes, at most ENCODING_DETECT_LIMIT
+    ENCODING_SAMPLE_SIZE = 64 * 1024
+    ENCODING_DETECT_LIMIT = 1024 * 1024
+    BOM_ENCODINGS = [
+        (codecs.BOM_UTF8, 'utf-8-sig'),
+        (codecs.BOM_UTF16_LE, 'utf-16'),
+        (codecs.BOM_UTF16_BE, 'utf-16'),
+    ]
+    
     # Column name mappings for auto-detection
     COLUMN_MAPPINGS = {
         'date': ['date', 'transaction date', 'txn date', 'value date', 'posting date', 
@@ -42,8 +76,27 @@ class FileProcessor:
         'category': ['category', 'type', 'transaction type', 'txn type']
     }
 
-    def __init__(self):
+    # Parallel PDF extraction (PDF_WORKERS <= 1 keeps the serial path)
+    PDF_WORKERS = int(os.getenv('PDF_WORKERS', 0))
+    PDF_PAGE_TIMEOUT = float(os.getenv('PDF_PAGE_TIMEOUT', 30))
+    PDF_PARALLEL_MIN_PAGES = 8
+    
+    def __init__(self, use_vectorized: bool = True, pdf_workers: Optional[int] = None,
+                 pdf_page_timeout: Optional[float] = None, layout_registry=None):
         self.supported_extensions = ['.csv', '.xlsx', '.xls', '.pdf']
+        # Columnar extraction is the default; the per-row path remains as a
+        # fallback for layouts the vectorized engine cannot handle
+        self.use_vectorized = use_vectorized
+        self.pdf_workers = self.PDF_WORKERS if pdf_workers is None else pdf_workers
+        # Seconds allowed per page; a file's budget scales with its largest page range
+        self.pdf_page_timeout = self.PDF_PAGE_TIMEOUT if pdf_page_timeout is None else pdf_page_timeout
+        # Worker processes for PDF pages, started on first use (see _pdf_workers_pool)
+        self._pdf_pool = None
+        self._pdf_pool_lock = threading.Lock()
+        # Known layouts skip column detection and format inference (see LayoutRegistry)
+        self.layout_registry = layout_registry
+        # Merchants extracted from descriptions, keyed by the raw description
+        self.merchant_cache = MemoCache()
     
     def get_file_type(self, filename: str) -> str:
         """Determine file type from extension"""
@@ -80,24 +133,26 @@ class FileProcessor:
         details = {'file_type': 'csv', 'rows_read': 0, 'rows_processed': 0}
         
         # Detect encoding
-        detected = chardet.detect(file_content)
-        encoding = detected.get('encoding', 'utf-8')
-        details['encoding'] = encoding
+        encoding = self._detect_encoding(BytesIO(file_content), details)
         
         try:
             # Try reading with detected encoding
             df = pd.read_csv(BytesIO(file_content), encoding=encoding)
-        except Exception:
-            # Fallback to common encodings
+        except UnicodeDecodeError:
+            # Detection only sees a prefix, fall back to common encodings for the rest
             for enc in ['utf-8', 'latin-1', 'cp1252']:
+                if enc == encoding:
+                    continue
                 try:
                     df = pd.read_csv(BytesIO(file_content), encoding=enc)
                     details['encoding'] = enc
                     break
-                except Exception:
+                except UnicodeDecodeError:
                     continue
             else:
                 raise ValueError("Could not decode CSV file with any known encoding")
+        except Exception as e:
+            raise ValueError(f"Error reading CSV file: {str(e)}")
         
         details['rows_read'] = len(df)
         details['columns_found'] = list(df.columns)
@@ -105,6 +160,114 @@ class FileProcessor:
         transactions = self._extract_transactions_from_dataframe(df, details)
         return transactions, details
     
+    def _detect_encoding(self, stream: BinaryIO, details: Dict) -> str:
+        """
+        Detect the text encoding of a file from a bounded prefix
+        
+        Checks for a byte order mark, then tries UTF-8 on the first
+        ENCODING_SAMPLE_SIZE bytes. Only if that fails is chardet's incremental
+        detector fed block by block, stopping as soon as it is confident or
+        ENCODING_DETECT_LIMIT bytes have been read.
+        """
+        started = time.perf_counter()
+        sample = stream.read(self.ENCODING_SAMPLE_SIZE)
+        encoding, method = None, None
+        
+        for bom, bom_encoding in self.BOM_ENCODINGS:
+            if sample.startswith(bom):
+                encoding, method = bom_encoding, 'bom'
+                break
+        
+        if not encoding:
+            try:
+                # A short read is the whole file, otherwise allow a split character at the end
+                complete = len(sample) < self.ENCODING_SAMPLE_SIZE
+                codecs.getincrementaldecoder('utf-8')().decode(sample, final=complete)
+                encoding, method = 'utf-8', 'utf-8'
+            except UnicodeDecodeError:
+                pass
+        
+        if not encoding:
+            detector = UniversalDetector()
+            block, bytes_read = sample, 0
+            while block:
+                detector.feed(block)
+                bytes_read += len(block)
+                if detector.done or bytes_read >= self.ENCODING_DETECT_LIMIT:
+                    break
+                block = stream.read(self.ENCODING_SAMPLE_SIZE)
+            detector.close()
+            
+            encoding, method = detector.result.get('encoding') or 'cp1252', 'chardet'
+            try:
+                codecs.lookup(encoding)
+            except LookupError:
+                encoding = 'cp1252'
+        
+        details['encoding'] = encoding
+        details['encoding_method'] = method
+        details['encoding_detection_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return encoding
+    
+    def process_csv_stream(self, file_path: str,
+                           chunksize: Optional[int] = None) -> Iterator[Tuple[List[Dict], Dict]]:
+        """
+        Stream a CSV file from disk in fixed-size chunks
+        
+        Column detection and date-format inference run once, on the first
+        chunk; later chunks reuse that parsing plan so every chunk is read the
+        same way. Only one chunk is held in memory at a time.
+        
+        Yields:
+            Tuple of (chunk_transactions, processing_details) per chunk. The
+            details dict is shared and accumulates totals across chunks.
+        """
+        details = {'file_type': 'csv', 'rows_read': 0, 'rows_processed': 0,
+                   'chunks': 0, 'streamed': True}
+        
+        # Detect encoding from a bounded prefix, the whole file may not fit in memory
+        with open(file_path, 'rb') as f:
+            encoding = self._detect_encoding(f, details)
+        
+        plan = None
+        details['file_size'] = os.path.getsize(file_path)
+        with open(file_path, 'rb') as f:
+            reader = pd.read_csv(
+                f,
+                encoding=encoding,
+                # Undecodable bytes past the sample must not abort a half-imported stream
+                encoding_errors='replace',
+                chunksize=chunksize or self.CSV_CHUNK_SIZE
+            )
+            
+            with reader:
+                for df in reader:
+                    chunk_details = {'encoding': encoding}
+                    transactions = self._extract_transactions_from_dataframe(df, chunk_details, plan)
+                    
+                    if plan is not None and not plan.get('date_format') and chunk_details.get('date_format_settled'):
+                        # The first chunks left day/month order open; later chunks follow this one
+                        plan['date_format'] = chunk_details['date_format']
+                        details['date_format'] = plan['date_format']
+                    
+                    if plan is None:
+                        if 'layout' in chunk_details:
+                            details['layout'] = chunk_details['layout']
+                        details['columns_found'] = list(df.columns)
+                        details['column_mapping'] = chunk_details['column_mapping']
+                        details['date_format'] = chunk_details.get('date_format')
+                        details['decimal_separator'] = chunk_details.get('decimal_separator')
+                        plan = self._plan_from_details(chunk_details)
+                    
+                    details['extraction_engine'] = chunk_details.get('extraction_engine')
+                    details['rows_read'] += len(df)
+                    details['rows_processed'] += len(transactions)
+                    details['chunks'] += 1
+                    # Approximate - the parser reads ahead in blocks
+                    details['bytes_read'] = f.tell()
+                    
+                    yield transactions, details
+    
     def _process_excel(self, file_content: bytes) -> Tuple[List[Dict], Dict]:
         """Process Excel file"""
         details = {'file_type': 'excel', 'rows_read': 0, 'rows_processed': 0}
@@ -125,40 +288,20 @@ class FileProcessor:
         details = {'file_type': 'pdf', 'pages_read': 0, 'rows_read': 0, 'rows_processed': 0}
         
         try:
-            all_data = []
-            
             with pdfplumber.open(BytesIO(file_content)) as pdf:
-                details['pages_read'] = len(pdf.pages)
+                page_count = len(pdf.pages)
+                details['pages_read'] = page_count
                 
-                for page_num, page in enumerate(pdf.pages):
-                    # Try to extract tables
-                    tables = page.extract_tables()
-                    
-                    for table in tables:
-                        if table and len(table) > 1:
-                            # First row is likely header
-                            headers = [str(h).strip() if h else f'col_{i}' 
-                                       for i, h in enumerate(table[0])]
-                            
-                            for row in table[1:]:
-                                if row and any(cell for cell in row):
-                                    row_dict = {}
-                                    for i, cell in enumerate(row):
-                                        if i < len(headers):
-                                            row_dict[headers[i]] = str(cell).strip() if cell else ''
-                                    all_data.append(row_dict)
-                    
-                    # If no tables found, try text extraction
-                    if not tables:
-                        text = page.extract_text()
-                        if text:
-                            # Try to parse structured text
-                            lines = text.split('\n')
-                            for line in lines:
-                                parsed = self._parse_text_line(line)
-                                if parsed:
-                                    all_data.append(parsed)
+                parallel = self.pdf_workers > 1 and page_count >= self.PDF_PARALLEL_MIN_PAGES
+                if not parallel:
+                    page_rows = [self._extract_page_rows(page) for page in pdf.pages]
+            
+            if parallel:
+                page_rows = self._extract_pdf_pages_parallel(file_content, page_count)
+                details['pdf_workers'] = self.pdf_workers
             
+            # Merge in page order
+            all_data = [row for rows in page_rows for row in rows]
             details['rows_read'] = len(all_data)
             
             if not all_data:
@@ -175,7 +318,91 @@ class FileProcessor:
         except Exception as e:
             raise ValueError(f"Error reading PDF file: {str(e)}")
     
-    def _parse_text_line(self, line: str) -> Optional[Dict]:
+    def _extract_pdf_pages_parallel(self, file_content: bytes, page_count: int) -> List[List[Dict]]:
+        """
+        Extract PDF pages across a process pool
+        
+        Pages are split into one contiguous range per worker; each worker opens
+        the document itself and extracts its range with the same code as the
+        serial path. Results are returned per page, in page order.
+        
+        The whole file must finish within pdf_page_timeout seconds per page of
+        its largest range, counted from submit. On timeout the pool is
+        terminated so stuck workers stop using CPU; extractions of other files
+        running on it at that moment fail too, and the next file starts a new pool.
+        """
+        workers = min(self.pdf_workers, page_count)
+        range_size = -(-page_count // workers)
+        ranges = [(start, min(start + range_size, page_count))
+                  for start in range(0, page_count, range_size)]
+        
+        pool = self._pdf_workers_pool()
+        results = [pool.apply_async(_extract_pdf_page_range, (file_content, start, stop))
+                   for start, stop in ranges]
+        deadline = time.monotonic() + self.pdf_page_timeout * range_size
+        
+        page_rows = []
+        for (start, stop), result in zip(ranges, results):
+            try:
+                page_rows.extend(result.get(timeout=max(0.0, deadline - time.monotonic())))
+            except PoolTimeoutError:
+                self._terminate_pdf_pool(pool)
+                raise ValueError(f"Timed out extracting pages {start + 1}-{stop}")
+        return page_rows
+    
+    def _pdf_workers_pool(self):
+        """The shared PDF worker pool, started on first use"""
+        with self._pdf_pool_lock:
+            if self._pdf_pool is None:
+                # Spawned, not forked: uploads run on threads and forking a
+                # threaded process can copy held locks into the children
+                self._pdf_pool = multiprocessing.get_context('spawn').Pool(self.pdf_workers)
+            return self._pdf_pool
+    
+    def _terminate_pdf_pool(self, pool):
+        """Kill the pool's worker processes; the next file starts a new pool"""
+        with self._pdf_pool_lock:
+            if self._pdf_pool is pool:
+                self._pdf_pool = None
+        pool.terminate()
+    
+    @staticmethod
+    def _extract_page_rows(page) -> List[Dict]:
+        """Extract row dicts from a single PDF page (tables, else text lines)"""
+        rows = []
+        
+        # Try to extract tables
+        tables = page.extract_tables()
+        
+        for table in tables:
+            if table and len(table) > 1:
+                # First row is likely header
+                headers = [str(h).strip() if h else f'col_{i}' 
+                           for i, h in enumerate(table[0])]
+                
+                for row in table[1:]:
+                    if row and any(cell for cell in row):
+                        row_dict = {}
+                        for i, cell in enumerate(row):
+                            if i < len(headers):
+                                row_dict[headers[i]] = str(cell).strip() if cell else ''
+                        rows.append(row_dict)
+        
+        # If no tables found, try text extraction
+        if not tables:
+            text = page.extract_text()
+            if text:
+                # Try to parse structured text
+                lines = text.split('\n')
+                for line in lines:
+                    parsed = FileProcessor._parse_text_line(line)
+                    if parsed:
+                        rows.append(parsed)
+        
+        return rows
+    
+    @staticmethod
+    def _parse_text_line(line: str) -> Optional[Dict]:
         """Try to parse a text line as a transaction"""
         # Pattern: Date Description Amount
         date_pattern = r'(\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4}|\d{4}[-/\.]\d{1,2}[-/\.]\d{1,2})'
@@ -208,10 +435,25 @@ class FileProcessor:
             'amount': first_amount
         }
     
-    def _extract_transactions_from_dataframe(self, df: pd.DataFrame, details: Dict) -> List[Dict]:
-        """Extract and normalize transactions from a DataFrame"""
+    def _extract_transactions_from_dataframe(self, df: pd.DataFrame, details: Dict,
+                                             plan: Optional[Dict] = None) -> List[Dict]:
+        """
+        Extract and normalize transactions from a DataFrame
+        
+        Args:
+            plan: Parsing plan from an earlier frame of the same layout (see
+                _plan_from_details). When given, column detection and date
+                format inference are skipped. Without one, the layout registry
+                is asked for a plan stored from an earlier upload.
+        """
+        fingerprint = None
+        if plan is None and self.layout_registry is not None:
+            fingerprint = self.layout_registry.fingerprint(df)
+            plan = self.layout_registry.lookup(fingerprint)
+            details['layout'] = {'fingerprint': fingerprint, 'cache': 'hit' if plan else 'miss'}
+        
         # Map columns
-        column_map = self._detect_columns(df)
+        column_map = dict(plan['column_mapping']) if plan else self._detect_columns(df)
         details['column_mapping'] = column_map
         
         if not column_map.get('date'):
@@ -219,6 +461,50 @@ class FileProcessor:
             if len(df.columns) > 0:
                 column_map['date'] = df.columns[0]
         
+        transactions = None
+        
+        if self.use_vectorized and self._supports_vectorized(df, column_map):
+            try:
+                transactions = self._extract_vectorized(df, column_map, details, plan)
+                details['extraction_engine'] = 'vectorized'
+            except Exception as e:
+                details['vectorized_error'] = str(e)
+                transactions = None
+        
+        if transactions is None:
+            transactions = self._extract_by_row(df, column_map)
+            details['extraction_engine'] = 'row'
+        
+        details['rows_processed'] = len(transactions)
+        
+        # Remember newly resolved layouts once they have produced transactions
+        if fingerprint and plan is None and transactions:
+            self.layout_registry.record(fingerprint, self._plan_from_details(details))
+        elif fingerprint and plan and not plan.get('date_format') and details.get('date_format_settled'):
+            # Known layout saved without a date format; this upload settled it
+            self.layout_registry.record_date_format(fingerprint, details['date_format'])
+        
+        return transactions
+    
+    def _plan_from_details(self, details: Dict) -> Dict:
+        """
+        Build a reusable parsing plan from the details of a processed frame
+        
+        A date format that was only a guess between day-first and month-first
+        is left out, so later frames infer it again.
+        """
+        column_mapping = dict(details.get('column_mapping') or {})
+        return {
+            'column_mapping': column_mapping,
+            'date_format': details.get('date_format') if details.get('date_format_settled') else None,
+            'decimal_separator': details.get('decimal_separator'),
+            'amount_convention': 'debit_credit' if column_mapping.get('debit') or column_mapping.get('credit')
+                                 else 'signed_amount',
+            'encoding': details.get('encoding'),
+        }
+    
+    def _extract_by_row(self, df: pd.DataFrame, column_map: Dict[str, str]) -> List[Dict]:
+        """Extract transactions one row at a time (fallback path)"""
         transactions = []
         
         for idx, row in df.iterrows():
@@ -229,9 +515,260 @@ class FileProcessor:
             except Exception as e:
                 continue
         
-        details['rows_processed'] = len(transactions)
         return transactions
     
+    def _supports_vectorized(self, df: pd.DataFrame, column_map: Dict[str, str]) -> bool:
+        """Check whether the columnar engine can handle this layout"""
+        if not column_map.get('date'):
+            return False
+        
+        # Duplicate headers make df[col] return a DataFrame, leave those to the row path
+        duplicated = set(df.columns[df.columns.duplicated()])
+        return not any(col in duplicated for col in column_map.values())
+    
+    def _extract_vectorized(self, df: pd.DataFrame, column_map: Dict[str, str],
+                            details: Dict, plan: Optional[Dict] = None) -> List[Dict]:
+        """
+        Extract transactions column by column
+        
+        Produces the same transaction dicts as the per-row path, but parses each
+        mapped column once as a whole instead of once per row.
+        """
+        if df.empty:
+            return []
+        
+        plan = plan or {}
+        dates, date_format, settled = self._parse_date_column(df[column_map['date']], plan.get('date_format'))
+        details['date_format'] = date_format
+        details['date_format_settled'] = settled
+        
+        n = len(df)
+        amounts = np.zeros(n, dtype='float64')
+        is_income = np.zeros(n, dtype=bool)
+        decimal_separators = set()
+        
+        debit_col = column_map.get('debit')
+        if debit_col:
+            debit, debit_valid, decimal = self._parse_amount_column(
+                df[debit_col], plan.get('decimal_separator')
+            )
+            decimal_separators.add(decimal)
+            has_debit = debit_valid & (debit > 0)
+            amounts = np.where(has_debit, debit, amounts)
+        
+        credit_col = column_map.get('credit')
+        if credit_col:
+            credit, credit_valid, decimal = self._parse_amount_column(
+                df[credit_col], plan.get('decimal_separator')
+            )
+            decimal_separators.add(decimal)
+            has_credit = credit_valid & (credit > 0)
+            amounts = np.where(has_credit, credit, amounts)
+            is_income = has_credit
+        
+        # If no debit/credit, use amount column (negative usually means expense)
+        amount_col = column_map.get('amount')
+        if amount_col:
+            signed, signed_valid, decimal = self._parse_amount_column(
+                df[amount_col], plan.get('decimal_separator')
+            )
+            decimal_separators.add(decimal)
+            use_signed = (amounts == 0) & signed_valid & (signed != 0)
+            amounts = np.where(use_signed, np.abs(signed), amounts)
+            is_income = np.where(use_signed, signed > 0, is_income)
+        
+        details['decimal_separator'] = ',' if ',' in decimal_separators else '.'
+        
+        valid = dates.notna().to_numpy() & (amounts != 0)
+        if not valid.any():
+            return []
+        
+        descriptions = self._text_column(df, column_map.get('description'))
+        merchants = self._text_column(df, column_map.get('merchant'))
+        
+        transactions = []
+        for date_iso, amount, income, description, merchant in zip(
+            dates.to_numpy()[valid],
+            amounts[valid],
+            is_income[valid],
+            descriptions[valid],
+            merchants[valid],
+        ):
+            transactions.append({
+                'transaction_date': date_iso,
+                'type': 'income' if income else 'expense',
+                'amount': round(float(amount), 2),
+                'description': description,
+                'merchant': merchant or self._extract_merchant(description),
+            })
+        
+        return transactions
+    
+    def _parse_date_column(self, series: pd.Series,
+                           date_format: Optional[str] = None) -> Tuple[pd.Series, Optional[str], bool]:
+        """
+        Parse a date column into ISO strings (None where unparseable)
+        
+        Text columns get their format inferred from a sample (unless one is
+        given) and are converted with a single pd.to_datetime call; only values
+        that do not match the format go through the per-value _parse_date
+        fallback.
+        
+        Returns:
+            Tuple of (iso_dates, inferred_format, settled). settled is False when
+            the inferred format is a guess between day-first and month-first.
+        """
+        result = pd.Series([None] * len(series), index=series.index, dtype=object)
+        present = series.notna()
+        settled = date_format is not None
+        if not present.any():
+            return result, date_format, settled
+        
+        # Statements repeat the same dates many times, parse each distinct value once
+        codes, uniques = pd.factorize(series[present])
+        parsed = np.full(len(uniques), None, dtype=object)
+        pending = np.ones(len(uniques), dtype=bool)
+        
+        if pd.api.types.is_datetime64_any_dtype(uniques):
+            date_format = None
+        else:
+            text = pd.Series(uniques, dtype=object).astype(str).str.strip()
+            if not date_format:
+                date_format = self._infer_date_format(text)
+                settled = bool(date_format) and self._date_order_settled(text, date_format)
+            
+            if date_format:
+                converted = pd.to_datetime(text, format=date_format, errors='coerce')
+                matched = converted.notna().to_numpy()
+                # strptime formats carry no time part, so this equals datetime.isoformat()
+                parsed[matched] = converted[matched].dt.strftime('%Y-%m-%dT%H:%M:%S').to_numpy(dtype=object)
+                pending = ~matched
+        
+        for i in np.flatnonzero(pending):
+            date_val = self._parse_date(uniques[i])
+            parsed[i] = date_val.isoformat() if date_val else None
+        
+        result[present] = parsed[codes]
+        return result, date_format, settled
+    
+    def _infer_date_format(self, text: pd.Series) -> Optional[str]:
+        """
+        Pick the DATE_FORMATS entry that parses most of a sample of the column
+        
+        The sample is spread across the column's distinct values, so a day
+        above 12 anywhere in it settles day-first vs month-first. When the
+        sample is ambiguous the earlier (day-first) format wins, matching the
+        order _parse_date tries them in.
+        """
+        uniques = self._date_sample(text)
+        best_format, best_count = None, 0
+        for fmt in self.DATE_FORMATS:
+            count = int(pd.to_datetime(uniques, format=fmt, errors='coerce').notna().sum())
+            if count > best_count:
+                best_format, best_count = fmt, count
+                if count == len(uniques):
+                    break
+        
+        return best_format
+    
+    def _date_order_settled(self, text: pd.Series, date_format: str) -> bool:
+        """
+        Check whether a column's sample rules out reading it with day and month swapped
+        
+        A sample without a day above 12 parses equally well either way, so the
+        inferred format is only a guess.
+        """
+        swapped = date_format.replace('%d', '%_').replace('%m', '%d').replace('%_', '%m')
+        if swapped == date_format or swapped not in self.DATE_FORMATS:
+            return True
+        
+        uniques = self._date_sample(text)
+        counts = [
+            int(pd.to_datetime(uniques, format=fmt, errors='coerce').notna().sum())
+            for fmt in (date_format, swapped)
+        ]
+        return counts[0] > counts[1]
+    
+    def _date_sample(self, text: pd.Series) -> pd.Series:
+        """Up to DATE_SAMPLE_SIZE distinct values, spread across the column"""
+        uniques = text.drop_duplicates()
+        if len(uniques) > self.DATE_SAMPLE_SIZE:
+            positions = np.linspace(0, len(uniques) - 1, self.DATE_SAMPLE_SIZE).astype(int)
+            uniques = uniques.iloc[positions]
+        return uniques
+    
+    def _parse_amount_column(self, series: pd.Series,
+                             decimal_separator: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, str]:
+        """
+        Parse an amount column as a whole
+        
+        Handles the same formats as _parse_amount (currency symbols, accounting
+        parentheses, leading minus, thousands separators) with vectorized string
+        operations over the column's distinct values. European decimal commas
+        are detected from a sample of the column unless a separator is given.
+        
+        Returns:
+            Tuple of (float64 amounts, validity mask, decimal_separator)
+        """
+        values = np.full(len(series), np.nan, dtype='float64')
+        present = series.notna().to_numpy()
+        detect_separator = decimal_separator is None
+        decimal_separator = decimal_separator or '.'
+        
+        if not present.any():
+            return values, present, decimal_separator
+        
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            values[present] = series[present].to_numpy(dtype='float64')
+            return values, present, decimal_separator
+        
+        codes, uniques = pd.factorize(series[present])
+        uniques = pd.Series(uniques, dtype=object)
+        text = uniques.astype(str).str.replace(self.AMOUNT_STRIP_PATTERN, '', regex=True)
+        
+        # Handle parentheses for negative (accounting format), then minus sign
+        in_parens = text.str.startswith('(') & text.str.endswith(')')
+        text = text.where(~in_parens, text.str[1:-1])
+        has_minus = text.str.startswith('-')
+        text = text.where(~has_minus, text.str[1:])
+        
+        # Numbers stored as numbers must not be read with a decimal comma
+        is_text = (uniques.map(type) == str).to_numpy()
+        
+        if detect_separator and is_text.any():
+            decimal_separator = self._detect_decimal_separator(text[is_text])
+        
+        if decimal_separator == ',':
+            european = text.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+            text = text.where(~is_text, european)
+        else:
+            text = text.str.replace(',', '', regex=False)
+        
+        parsed = pd.to_numeric(text, errors='coerce').to_numpy(dtype='float64')
+        parsed = np.where(in_parens.to_numpy() | has_minus.to_numpy(), -parsed, parsed)
+        
+        values[present] = parsed[codes]
+        return values, ~np.isnan(values), decimal_separator
+    
+    def _detect_decimal_separator(self, text: pd.Series) -> str:
+        """Detect a decimal comma ('1.234,56', '12,50') from a sample of amounts"""
+        sample = text.head(self.AMOUNT_SAMPLE_SIZE)
+        comma_count = int(sample.str.match(self.DECIMAL_COMMA_PATTERN).sum())
+        point_count = int(sample.str.match(self.DECIMAL_POINT_PATTERN).sum())
+        return ',' if comma_count > point_count else '.'
+    
+    def _text_column(self, df: pd.DataFrame, column: Optional[str]) -> np.ndarray:
+        """Stringify and strip a text column ('' for missing values)"""
+        result = np.full(len(df), '', dtype=object)
+        if not column:
+            return result
+        
+        series = df[column]
+        present = series.notna()
+        if present.any():
+            result[present.to_numpy()] = series[present].map(str).str.strip().to_numpy(dtype=object)
+        return result
+    
     def _detect_columns(self, df: pd.DataFrame) -> Dict[str, str]:
         """Auto-detect column mappings"""
         column_map = {}
@@ -337,7 +874,7 @@ class FileProcessor:
         value_str = str(value).strip()
         
         # Remove currency symbols and whitespace
-        value_str = re.sub(r'[₹$€£¥\s]', '', value_str)
+        value_str = self.AMOUNT_STRIP_PATTERN.sub('', value_str)
         
         # Handle parentheses for negative (accounting format)
         is_negative = value_str.startswith('(') and value_str.endswith(')')
@@ -359,6 +896,12 @@ class FileProcessor:
             return None
     
     def _extract_merchant(self, description: str) -> str:
+        """Extract merchant name from description, memoized by the raw string"""
+        if isinstance(description, str):
+            return self.merchant_cache.get(description, self._parse_merchant, description)
+        return self._parse_merchant(description)
+    
+    def _parse_merchant(self, description: str) -> str:
         """Extract merchant name from description"""
         if not description:
             return ''
@@ -382,5 +925,11 @@ class FileProcessor:
         return ' '.join(words)
 
 
+def _extract_pdf_page_range(file_content: bytes, start: int, stop: int) -> List[List[Dict]]:
+    """Extract row dicts for pages [start, stop) of a PDF - runs in a worker process"""
+    with pdfplumber.open(BytesIO(file_content)) as pdf:
+        return [FileProcessor._extract_page_rows(pdf.pages[i]) for i in range(start, stop)]
+
+
 # Global instance
-file_processor = FileProcessor()
+file_processor = FileProcessor(layout_registry=layout_registry)
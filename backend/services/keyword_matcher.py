@@ -0,0 +1,117 @@
+"""
+Keyword Matching Service
+Finds every keyword from several keyword lists in one scan of a text
+"""
+import re
+from typing import Dict, Iterable, List, Set
+
+
+# Keyword lists shared by the cleaner and the categorizer
+TRANSACTION_KEYWORDS = {
+    # Common noise words to remove from descriptions
+    'noise': [
+        'ref', 'reference', 'txn', 'transaction', 'neft', 'imps', 'upi', 'rtgs',
+        'atm', 'ach', 'ecs', 'nach', 'mmt', 'iob', 'sbi', 'hdfc', 'icici', 'axis',
+        'transfer', 'payment', 'paid', 'received', 'debit', 'credit', 'card',
+        'pos', 'ecom', 'online', 'net', 'banking', 'mobile', 'app'
+    ],
+    
+    # Keywords for income identification
+    'income': [
+        'salary', 'wages', 'income', 'credit', 'deposit', 'refund', 'cashback',
+        'dividend', 'interest', 'bonus', 'reimbursement', 'received', 'credited',
+        'from', 'reversal', 'return', 'inward'
+    ],
+    
+    # Keywords for expense identification
+    'expense': [
+        'payment', 'purchase', 'buy', 'bought', 'paid', 'debit', 'withdrawal',
+        'transfer', 'to', 'bill', 'fee', 'charge', 'subscription', 'order',
+        'spent', 'expense', 'outward'
+    ],
+}
+
+
+class KeywordMatcher:
+    """
+    Multi-list substring matcher compiled once at startup
+    
+    All keywords go into one regex built from a prefix trie, wrapped in a
+    lookahead so it is tried at every position of the text. The trie shares
+    common prefixes, so a scan costs about the same for ten keywords or a
+    few hundred. At each position the regex reports the longest keyword;
+    the shorter keywords that are its prefixes are added from a precomputed
+    table, so every occurrence a plain `keyword in text` test would find is
+    reported.
+    """
+    
+    def __init__(self, keyword_lists: Dict[str, Iterable[str]]):
+        self.groups = {
+            group: frozenset(keyword.lower() for keyword in keywords)
+            for group, keywords in keyword_lists.items()
+        }
+        
+        keywords = set().union(*self.groups.values()) if self.groups else set()
+        keywords.discard('')
+        
+        # Every keyword that is a prefix of a keyword, itself included
+        self._prefixes = {
+            keyword: frozenset(keyword[:i] for i in range(1, len(keyword) + 1) if keyword[:i] in keywords)
+            for keyword in keywords
+        }
+        self._pattern = re.compile(f"(?=({self._trie_regex(keywords)}))") if keywords else None
+    
+    def find(self, text: str) -> Set[str]:
+        """All keywords occurring anywhere in text (case-insensitive)"""
+        if not text or self._pattern is None:
+            return set()
+        
+        found = set()
+        for match in self._pattern.finditer(text.lower()):
+            found.update(self._prefixes[match.group(1)])
+        return found
+    
+    def scores(self, text: str) -> Dict[str, int]:
+        """Number of distinct keywords from each list occurring in text"""
+        found = self.find(text)
+        return {group: len(found & keywords) for group, keywords in self.groups.items()}
+    
+    def contains(self, group: str, word: str) -> bool:
+        """Check if a word is one of the keywords of a list"""
+        return word.lower() in self.groups.get(group, ())
+    
+    def strip_trailing(self, group: str, words: List[str]) -> List[str]:
+        """Remove keywords of a list from the end of a word list"""
+        keywords = self.groups.get(group, ())
+        end = len(words)
+        while end and words[end - 1].lower() in keywords:
+            end -= 1
+        return words[:end]
+    
+    def _trie_regex(self, keywords: Iterable[str]) -> str:
+        """Build a regex matching any keyword, longest alternative first"""
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        
+        def to_regex(node):
+            terminal = '' in node
+            branches = [re.escape(char) + to_regex(child)
+                        for char, child in sorted(node.items()) if char]
+            
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+            # Greedy optional keeps the longest keyword when a shorter one ends here
+            if terminal:
+                return f"(?:{body})?"
+            return body
+        
+        return to_regex(trie)
+
+
+# Global instance
+transaction_keywords = KeywordMatcher(TRANSACTION_KEYWORDS)
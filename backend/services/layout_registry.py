@@ -0,0 +1,169 @@
+"""
+Statement Layout Registry
+Remembers resolved parsing plans for known bank statement layouts
+"""
+import os
+import time
+import hashlib
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+import pandas as pd
+from flask import has_app_context
+from sqlalchemy import func
+
+from database.models import db, StatementLayout
+
+
+class LayoutRegistry:
+    """
+    Parsing plans keyed by a fingerprint of the header row and column types
+    
+    Users upload the same few bank layouts every month. Once a layout has been
+    parsed, its column mapping, date format, decimal separator and encoding are
+    stored so later uploads of that layout skip detection and go straight to
+    extraction. Plans are cached in process and persisted in statement_layouts.
+    A date format is only stored once an upload has settled day vs month
+    order; until then each upload infers it again.
+    
+    Only a layout missing from the process cache is read from the database.
+    Hits are counted in memory and added to hit_count/last_used_at at most
+    every HIT_FLUSH_SECONDS, inside the transaction of the upload that flushes.
+    """
+    
+    HIT_FLUSH_SECONDS = float(os.getenv('LAYOUT_HIT_FLUSH_SECONDS', 60))
+    
+    def __init__(self):
+        self._plans = {}
+        self._lock = threading.Lock()
+        # fingerprint -> [hits, last used at] not yet written to the database
+        self._pending_hits = {}
+        self._flushed_at = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+    
+    def fingerprint(self, df: pd.DataFrame) -> str:
+        """Hash the normalized header row together with each column's type"""
+        parts = []
+        for col in df.columns:
+            values = df[col].dropna()
+            if values.empty:
+                kind = 'empty'
+            elif pd.api.types.is_datetime64_any_dtype(values):
+                kind = 'date'
+            elif pd.api.types.is_numeric_dtype(values):
+                kind = 'number'
+            else:
+                kind = 'text'
+            parts.append(f"{str(col).strip().lower()}:{kind}")
+        
+        return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+    
+    def lookup(self, fingerprint: str) -> Optional[Dict]:
+        """Get the parsing plan for a layout, or None if it is not known yet"""
+        with self._lock:
+            plan = self._plans.get(fingerprint)
+        
+        if plan is None and has_app_context():
+            try:
+                layout = StatementLayout.query.filter_by(fingerprint=fingerprint).first()
+                if layout:
+                    plan = layout.to_plan()
+            except Exception as e:
+                print(f"Error looking up statement layout: {e}")
+        
+        with self._lock:
+            if plan:
+                plan = self._plans.setdefault(fingerprint, plan)
+                pending = self._pending_hits.setdefault(fingerprint, [0, None])
+                pending[0] += 1
+                pending[1] = datetime.utcnow()
+                self.hits += 1
+            else:
+                self.misses += 1
+        
+        self._flush_hits()
+        return dict(plan) if plan else None
+    
+    def record(self, fingerprint: str, plan: Dict):
+        """Store the parsing plan resolved for a new layout"""
+        # Plans are persisted as JSON, so every mapped column must be a plain string
+        if not all(isinstance(col, str) for col in plan.get('column_mapping', {}).values()):
+            return
+        
+        with self._lock:
+            self._plans[fingerprint] = dict(plan)
+        
+        if not has_app_context():
+            return
+        
+        try:
+            if not StatementLayout.query.filter_by(fingerprint=fingerprint).first():
+                # Savepoint, so losing an insert race doesn't break the caller's transaction
+                with db.session.begin_nested():
+                    db.session.add(StatementLayout(
+                        fingerprint=fingerprint,
+                        column_mapping=plan['column_mapping'],
+                        date_format=plan.get('date_format'),
+                        decimal_separator=plan.get('decimal_separator'),
+                        amount_convention=plan.get('amount_convention'),
+                        encoding=plan.get('encoding'),
+                        hit_count=0
+                    ))
+        except Exception as e:
+            print(f"Error saving statement layout: {e}")
+    
+    def record_date_format(self, fingerprint: str, date_format: str):
+        """Store a date format settled by a later upload of a layout saved without one"""
+        with self._lock:
+            plan = self._plans.get(fingerprint)
+            if plan and not plan.get('date_format'):
+                plan['date_format'] = date_format
+        
+        if not has_app_context():
+            return
+        
+        try:
+            StatementLayout.query\
+                .filter_by(fingerprint=fingerprint, date_format=None)\
+                .update({'date_format': date_format}, synchronize_session=False)
+        except Exception as e:
+            print(f"Error saving statement layout date format: {e}")
+    
+    def _flush_hits(self):
+        """Write the hits counted since the last flush, once HIT_FLUSH_SECONDS have passed"""
+        if not has_app_context():
+            return
+        
+        with self._lock:
+            if not self._pending_hits or time.monotonic() - self._flushed_at < self.HIT_FLUSH_SECONDS:
+                return
+            pending, self._pending_hits = self._pending_hits, {}
+            self._flushed_at = time.monotonic()
+        
+        try:
+            # Savepoint, so a failed update doesn't break the caller's transaction
+            with db.session.begin_nested():
+                for fingerprint, (hits, last_used_at) in pending.items():
+                    StatementLayout.query.filter_by(fingerprint=fingerprint).update({
+                        'hit_count': func.coalesce(StatementLayout.hit_count, 0) + hits,
+                        'last_used_at': last_used_at
+                    }, synchronize_session=False)
+        except Exception as e:
+            print(f"Error saving statement layout hits: {e}")
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters for this worker process"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'cached_layouts': len(self._plans)
+            }
+
+
+# Global instance
+layout_registry = LayoutRegistry()
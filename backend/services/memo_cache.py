@@ -0,0 +1,113 @@
+"""
+Memo Cache Service
+Bounded, thread-safe memoization for string normalization results
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List
+
+
+class MemoCache:
+    """
+    Bounded cache of computed values with hit/miss counters
+    
+    Statements repeat the same descriptions and merchants every month, so the
+    normalization services keep their results here, one cache per service
+    instance, shared by every upload handled by the worker process.
+    
+    Eviction policies:
+        lru  - evict the least recently used entry (hits refresh an entry)
+        fifo - evict the oldest entry (hits don't reorder, slightly cheaper)
+    A max_size of 0 disables caching.
+    """
+    
+    POLICIES = ['lru', 'fifo']
+    MISSING = object()
+    
+    # Defaults for the normalization caches
+    DEFAULT_SIZE = int(os.getenv('NORMALIZATION_CACHE_SIZE', 20000))
+    DEFAULT_POLICY = os.getenv('NORMALIZATION_CACHE_POLICY', 'lru').lower()
+    
+    def __init__(self, max_size: int = None, policy: str = None):
+        self.max_size = self.DEFAULT_SIZE if max_size is None else max(0, int(max_size))
+        self.policy = (policy or self.DEFAULT_POLICY).lower()
+        if self.policy not in self.POLICIES:
+            raise ValueError(f"Unknown cache policy '{self.policy}', expected one of {self.POLICIES}")
+        
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def lookup(self, key: Hashable) -> Any:
+        """Get a cached value, or MemoCache.MISSING if it is not cached"""
+        with self._lock:
+            value = self._entries.get(key, self.MISSING)
+            if value is self.MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+                if self.policy == 'lru':
+                    self._entries.move_to_end(key)
+            return value
+    
+    def store(self, key: Hashable, value: Any):
+        """Cache a value, evicting entries beyond max_size"""
+        if not self.max_size:
+            return
+        
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def get(self, key: Hashable, compute: Callable, *args) -> Any:
+        """Get a cached value, computing and caching it with compute(*args) on a miss"""
+        value = self.lookup(key)
+        if value is self.MISSING:
+            value = compute(*args)
+            self.store(key, value)
+        return value
+    
+    def get_many(self, keys: List[Hashable], compute: Callable[[List[Hashable]], List[Any]]) -> List[Any]:
+        """
+        Get cached values for a list of keys
+        
+        Keys not cached are computed together with a single compute(missing_keys)
+        call, which must return their values in the same order.
+        """
+        values = [self.lookup(key) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is self.MISSING]
+        
+        if missing:
+            computed = compute([keys[i] for i in missing])
+            for i, value in zip(missing, computed):
+                values[i] = value
+                self.store(keys[i], value)
+        
+        return values
+    
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters for this worker process"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'policy': self.policy
+            }
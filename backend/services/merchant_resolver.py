@@ -0,0 +1,396 @@
+"""
+Merchant Resolution Service
+Maps raw merchant strings to canonical merchants with a MinHash LSH index
+"""
+import os
+import re
+import zlib
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from flask import has_app_context
+from sqlalchemy import event, insert
+
+from database.models import db, Merchant
+from services.memo_cache import MemoCache
+
+
+class MinHashIndex:
+    """
+    Near-duplicate lookup over character shingles of merchant keys
+    
+    Each key is reduced to a MinHash signature of NUM_PERM values. Signatures
+    are split into BANDS bands and every band is hashed into its own bucket
+    table, so a query only compares against keys that share at least one
+    band with it instead of scanning the whole index. A candidate matches
+    when the share of equal signature values, an estimate of the shingle
+    Jaccard similarity, reaches the threshold. Keys indexed as they are
+    resolve from a dict without hashing.
+    
+    The bucket tables of all bands share one sorted array, searched with
+    np.searchsorted, which keeps an indexed key at a few hundred bytes. Keys
+    added since the array was last sorted wait in a dict until there are
+    enough of them to merge.
+    """
+    
+    SHINGLE_SIZE = 3
+    NUM_PERM = 64
+    BANDS = 16
+    
+    # Keys hashed together by add_many; bounds the (shingles x NUM_PERM) work array
+    HASH_CHUNK_SIZE = 2048
+    
+    # Unsorted keys allowed before a merge, at least this many or a quarter of the sorted ones
+    MERGE_MIN = 4096
+    
+    def __init__(self, threshold: float = 0.6, seed: int = 1):
+        self.threshold = threshold
+        rng = np.random.RandomState(seed)
+        # Multiply-shift hashing of CRC32 shingle hashes, one (a, b) pair per permutation;
+        # uint64 arithmetic wraps around, which the scheme relies on
+        self._a = rng.randint(0, 2 ** 63, size=self.NUM_PERM, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.randint(0, 2 ** 63, size=self.NUM_PERM, dtype=np.uint64)
+        self._band_weights = rng.randint(0, 2 ** 63, size=self.NUM_PERM // self.BANDS, dtype=np.uint64) | np.uint64(1)
+        # Added per band so equal values in different bands land in different buckets
+        self._band_salts = rng.randint(0, 2 ** 63, size=self.BANDS, dtype=np.uint64)
+        
+        self.keys = {}
+        self._size = 0
+        self._ids = np.empty(1024, dtype=np.int64)
+        self._signatures = np.empty((1024, self.NUM_PERM), dtype=np.uint32)
+        self._band_keys = np.empty((1024, self.BANDS), dtype=np.uint64)
+        
+        # Rows below _sorted are in the sorted array, the rest in _recent
+        self._sorted = 0
+        self._sorted_keys = np.empty(0, dtype=np.uint64)
+        self._sorted_rows = np.empty(0, dtype=np.int64)
+        self._recent = {}
+    
+    def __len__(self):
+        return self._size
+    
+    def signature(self, key: str) -> np.ndarray:
+        """MinHash signature of a key's character shingles"""
+        return self.signatures([key])[0]
+    
+    def signatures(self, keys: List[str]) -> np.ndarray:
+        """MinHash signatures of many keys, hashed in one pass"""
+        size = self.SHINGLE_SIZE
+        hashes = []
+        offsets = []
+        for key in keys:
+            offsets.append(len(hashes))
+            hashes.extend({
+                zlib.crc32(key[i:i + size].encode('utf-8'))
+                for i in range(max(len(key) - size + 1, 1))
+            })
+        values = (np.outer(np.array(hashes, dtype=np.uint64), self._a) + self._b) >> np.uint64(32)
+        return np.minimum.reduceat(values, offsets, axis=0).astype(np.uint32)
+    
+    def add(self, item_id: int, key: str, signature: Optional[np.ndarray] = None):
+        """Index a key under an id"""
+        signature = self.signature(key) if signature is None else signature
+        self._append([item_id], [key], signature[np.newaxis])
+    
+    def add_many(self, item_ids: List[int], keys: List[str]):
+        """Index many keys, hashing them a chunk at a time"""
+        for start in range(0, len(keys), self.HASH_CHUNK_SIZE):
+            chunk_keys = keys[start:start + self.HASH_CHUNK_SIZE]
+            self._append(item_ids[start:start + self.HASH_CHUNK_SIZE], chunk_keys, self.signatures(chunk_keys))
+    
+    def query(self, key: str, signature: Optional[np.ndarray] = None) -> Optional[int]:
+        """Id of the most similar indexed key above the threshold, or None"""
+        if key in self.keys:
+            return self.keys[key]
+        
+        signature = self.signature(key) if signature is None else signature
+        bands = self._bands(signature[np.newaxis])[0]
+        candidates = set()
+        
+        if self._sorted:
+            lows = np.searchsorted(self._sorted_keys, bands, 'left').tolist()
+            highs = np.searchsorted(self._sorted_keys, bands, 'right').tolist()
+            for low, high in zip(lows, highs):
+                if high > low:
+                    candidates.update(self._sorted_rows[low:high].tolist())
+        
+        for band in bands.tolist():
+            candidates.update(self._recent.get(band, ()))
+        
+        if not candidates:
+            return None
+        
+        rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarity = (self._signatures[rows] == signature).mean(axis=1)
+        best = int(np.argmax(similarity))
+        return int(self._ids[rows[best]]) if similarity[best] >= self.threshold else None
+    
+    def _append(self, item_ids: List[int], keys: List[str], signatures: np.ndarray):
+        """Store signatures and bucket keys, merging into the sorted array when due"""
+        start, end = self._size, self._size + len(keys)
+        if end > len(self._ids):
+            capacity = max(end, 2 * len(self._ids))
+            self._ids = np.resize(self._ids, capacity)
+            self._signatures = np.resize(self._signatures, (capacity, self.NUM_PERM))
+            self._band_keys = np.resize(self._band_keys, (capacity, self.BANDS))
+        
+        band_keys = self._bands(signatures)
+        self._ids[start:end] = item_ids
+        self._signatures[start:end] = signatures
+        self._band_keys[start:end] = band_keys
+        self._size = end
+        for key, item_id in zip(keys, item_ids):
+            self.keys[key] = item_id
+        
+        if end - self._sorted >= max(self.MERGE_MIN, self._sorted // 4):
+            self._merge()
+            return
+        
+        for row, bands in zip(range(start, end), band_keys.tolist()):
+            for band in bands:
+                self._recent.setdefault(band, []).append(row)
+    
+    def _merge(self):
+        """Rebuild the sorted bucket array over every row"""
+        band_keys = self._band_keys[:self._size].ravel()
+        order = np.argsort(band_keys, kind='stable')
+        self._sorted_keys = band_keys[order]
+        self._sorted_rows = order // self.BANDS
+        self._sorted = self._size
+        self._recent = {}
+    
+    def _bands(self, signatures: np.ndarray) -> np.ndarray:
+        """Bucket key of each band of each signature"""
+        bands = signatures.reshape(len(signatures), self.BANDS, -1).astype(np.uint64)
+        return (bands * self._band_weights).sum(axis=2) + self._band_salts
+
+
+class MerchantResolver:
+    """
+    Canonical merchant ids for raw merchant strings
+    
+    "AMAZON PAY INDIA" and "Amazon Pay*In 1234" are different strings but the
+    same merchant. Raw strings are normalized to a key; a key seen before
+    resolves from a dict, anything else goes through the MinHash index of
+    canonical merchants, and a merchant with no close match is created.
+    Only canonical merchants are indexed, and resolved variants are kept in a
+    bounded cache, so memory grows with merchants rather than raw strings.
+    
+    Merchants are created in the caller's transaction, a batch at a time, and
+    only indexed once it commits, so a rolled back upload never leaves ids
+    behind that point at missing rows. Merchants other workers created are
+    picked up on a miss. The lock guards the in-memory index only; database
+    round trips happen outside it.
+    """
+    
+    THRESHOLD = float(os.getenv('MERCHANT_MATCH_THRESHOLD', 0.6))
+    ALIAS_CACHE_SIZE = int(os.getenv('MERCHANT_ALIAS_CACHE_SIZE', 100000))
+    LOAD_BATCH_SIZE = 10000
+    INSERT_CHUNK_SIZE = 1000
+    
+    # Session.info key for merchants created in the current transaction
+    PENDING = 'merchant_resolver.pending'
+    
+    def __init__(self, threshold: float = None, alias_cache_size: int = None):
+        self.threshold = self.THRESHOLD if threshold is None else threshold
+        self.aliases = MemoCache(self.ALIAS_CACHE_SIZE if alias_cache_size is None else alias_cache_size)
+        self._index = MinHashIndex(self.threshold)
+        self._last_id = 0
+        self._lock = threading.RLock()
+        self.created = 0
+        
+        event.listen(db.session, 'after_commit', self._publish)
+        event.listen(db.session, 'after_soft_rollback', self._discard)
+    
+    def merchant_key(self, merchant: Optional[str]) -> str:
+        """Lowercased letters of a merchant string, words separated by single spaces"""
+        return ' '.join(re.sub(r'[^a-z]+', ' ', str(merchant or '').lower()).split())[:255]
+    
+    def resolve(self, merchant: Optional[str]) -> Optional[int]:
+        """Canonical merchant id of a raw merchant string"""
+        return self.resolve_many([merchant])[0]
+    
+    def resolve_many(self, merchants: List[Optional[str]]) -> List[Optional[int]]:
+        """
+        Canonical merchant ids for a list of raw merchant strings
+        
+        Returns None for blank merchants, or for all of them outside an app
+        context. New merchants are added to the current session, which the
+        caller commits.
+        """
+        if not has_app_context():
+            return [None] * len(merchants)
+        
+        keys = [self.merchant_key(merchant) for merchant in merchants]
+        names = {}
+        for key, merchant in zip(keys, merchants):
+            if key and key not in names:
+                names[key] = merchant
+        
+        resolved, misses = self._find_many(names)
+        if misses:
+            # Other workers may have created these merchants since our last load
+            if self._load(self._pending(db.session)):
+                found, misses = self._find_many(misses)
+                resolved.update(found)
+            resolved.update(self._create_many({key: names[key] for key in misses}))
+        
+        return [resolved.get(key) for key in keys]
+    
+    def stats(self) -> Dict:
+        """Index size and alias cache counters for this worker process"""
+        with self._lock:
+            return {
+                'merchants': len(self._index),
+                'created': self.created,
+                'aliases': self.aliases.stats()
+            }
+    
+    def _find_many(self, keys) -> Tuple[Dict[str, int], List[str]]:
+        """Ids of the keys known to the index, and the keys it has no match for"""
+        found = {}
+        misses = []
+        with self._lock:
+            for key in keys:
+                merchant_id = self._find(self._index, key)
+                if merchant_id is None:
+                    misses.append(key)
+                else:
+                    found[key] = merchant_id
+        return found, misses
+    
+    def _find(self, index: MinHashIndex, key: str) -> Optional[int]:
+        """Id of a known merchant for a key: exact, cached alias, then nearest neighbour"""
+        if key in index.keys:
+            return index.keys[key]
+        
+        merchant_id = self.aliases.lookup(key)
+        if merchant_id is not MemoCache.MISSING:
+            return merchant_id
+        
+        merchant_id = index.query(key)
+        if merchant_id is not None:
+            self.aliases.store(key, merchant_id)
+        return merchant_id
+    
+    def _create_many(self, names: Dict[str, str]) -> Dict[str, Optional[int]]:
+        """
+        Ids for keys no committed merchant matches, inserting new merchants in the current session
+        
+        Keys close to a merchant created earlier in this transaction, or to
+        another key of the batch, share its id. The remaining keys are
+        inserted with one multi-row INSERT per chunk that skips keys another
+        worker inserted first, and their ids are read back by key.
+        """
+        pending = self._pending(db.session)
+        resolved = {}
+        batch = MinHashIndex(self.threshold)
+        new_keys = []
+        positions = {}
+        
+        for key in names:
+            merchant_id = pending.query(key)
+            if merchant_id is not None:
+                resolved[key] = merchant_id
+                continue
+            position = batch.query(key)
+            if position is None:
+                position = len(new_keys)
+                batch.add(position, key)
+                new_keys.append(key)
+            positions[key] = position
+        
+        if not new_keys:
+            return resolved
+        
+        now = datetime.utcnow()
+        statement = insert(Merchant.__table__)\
+            .prefix_with('IGNORE', dialect='mysql')\
+            .prefix_with('OR IGNORE', dialect='sqlite')
+        ids = {}
+        for start in range(0, len(new_keys), self.INSERT_CHUNK_SIZE):
+            chunk = new_keys[start:start + self.INSERT_CHUNK_SIZE]
+            result = db.session.execute(statement, [
+                {'name': str(names[key]).strip()[:255], 'key': key, 'created_at': now}
+                for key in chunk
+            ])
+            with self._lock:
+                self.created += max(result.rowcount, 0)
+            # Locking read, so keys another worker committed while we waited are visible
+            ids.update(
+                db.session.query(Merchant.key, Merchant.id)
+                .filter(Merchant.key.in_(chunk))
+                .with_for_update(read=True)
+                .all()
+            )
+        
+        created = [key for key in new_keys if key in ids]
+        pending.add_many([ids[key] for key in created], created)
+        for key, position in positions.items():
+            resolved[key] = ids.get(new_keys[position])
+        return resolved
+    
+    def _pending(self, session) -> MinHashIndex:
+        """Merchants created in the session's current transaction, not indexed yet"""
+        if self.PENDING not in session.info:
+            session.info[self.PENDING] = MinHashIndex(self.threshold)
+        return session.info[self.PENDING]
+    
+    def _load(self, pending: MinHashIndex) -> int:
+        """Index merchants committed since the last load; returns how many were added"""
+        added = 0
+        query = db.session.query(Merchant.id, Merchant.key)\
+            .filter(Merchant.id > self._last_id)\
+            .order_by(Merchant.id)\
+            .yield_per(self.LOAD_BATCH_SIZE)
+        batch = []
+        for row in query:
+            batch.append(row)
+            if len(batch) == self.LOAD_BATCH_SIZE:
+                added += self._index_loaded(batch, pending)
+                batch = []
+        
+        if batch:
+            added += self._index_loaded(batch, pending)
+        return added
+    
+    def _index_loaded(self, rows: List[Tuple[int, str]], pending: MinHashIndex) -> int:
+        """Add a batch of loaded merchants to the index; the lock is only held for the update"""
+        with self._lock:
+            # The session sees its own uncommitted merchants; those wait for the commit
+            new = [(merchant_id, key) for merchant_id, key in rows
+                   if key not in pending.keys and key not in self._index.keys]
+            if new:
+                self._index.add_many(*map(list, zip(*new)))
+            self._last_id = max(self._last_id, rows[-1][0])
+        return len(new)
+    
+    def _add(self, index: MinHashIndex, merchant_id: int, key: str) -> int:
+        """Index one canonical merchant, unless its key is known already"""
+        if key in index.keys:
+            return 0
+        index.add(merchant_id, key)
+        return 1
+    
+    def _publish(self, session):
+        """Index the merchants a committed transaction created"""
+        # Fired for released savepoints too; only the outer commit makes merchants visible
+        if session.in_nested_transaction():
+            return
+        pending = session.info.pop(self.PENDING, None)
+        if not pending or not pending.keys:
+            return
+        with self._lock:
+            for key, merchant_id in pending.keys.items():
+                self._add(self._index, merchant_id, key)
+    
+    def _discard(self, session, previous_transaction):
+        """Forget merchants created in a transaction that was rolled back"""
+        if not previous_transaction.nested:
+            session.info.pop(self.PENDING, None)
+
+
+# Global instance
+merchant_resolver = MerchantResolver()
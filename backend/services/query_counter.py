@@ -0,0 +1,45 @@
+"""
+Query Counter
+Counts the SQL statements an operation sends to the database
+"""
+import threading
+from typing import List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryCounter:
+    """
+    Context manager counting statements executed on an engine
+    
+    Only statements run on the thread that entered the block are counted, so
+    concurrent requests don't inflate each other's numbers.
+    
+    Usage:
+        with QueryCounter(db.engine) as counter:
+            risk_calculator.calculate_risk_score(user_id)
+        print(counter.count)
+    """
+    
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.statements: List[str] = []
+        self._thread = None
+    
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+    
+    def __enter__(self):
+        self._thread = threading.get_ident()
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        return False
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self._thread:
+            self.statements.append(statement)
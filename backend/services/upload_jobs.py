@@ -0,0 +1,180 @@
+"""
+Upload Job Service
+Runs uploaded statements through the pipeline and tracks their status
+"""
+import os
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from database.models import db, FileUpload
+from services.upload_store import upload_store
+from services.upload_pipeline import upload_pipeline
+from services.upload_staging import upload_staging
+from services.duplicate_detector import duplicate_detector
+from services.category_overlays import category_overlays
+
+
+class UploadJobs:
+    """
+    Processes uploads inline or on a local worker pool
+    
+    In async mode the request only stores the file and queues its id; a
+    worker thread then runs the pipeline inside its own app context and
+    records status and progress on the FileUpload row, where the status
+    endpoint picks them up. Jobs live in this process only - an upload
+    queued when the server stops stays 'pending'.
+    """
+    
+    # Minimum progress step (in percent) worth a database write
+    PROGRESS_STEP = 5
+    
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv('UPLOAD_WORKERS', 2))
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def process(self, file_upload: FileUpload, file_content: Optional[bytes] = None,
+                stream: bool = False, track_progress: bool = False) -> Dict:
+        """
+        Run an upload through the pipeline and record the outcome on it
+        
+        Args:
+            file_upload: Upload record; its stored file is read if no content is given
+            file_content: File bytes already held in memory
+            stream: Parse the stored CSV chunk by chunk
+            track_progress: Commit progress updates while processing
+        
+        Returns:
+            Pipeline result. file_upload.status is 'completed' or 'failed' afterwards.
+        """
+        upload_id = file_upload.id
+        file_upload.status = 'processing'
+        file_upload.progress = 0
+        db.session.commit()
+        
+        progress = self._progress_recorder(file_upload) if track_progress else None
+        
+        try:
+            if stream:
+                # Parse chunk by chunk from the stored copy, staging each chunk as it
+                # is done. The whole file is never held, so no result is cached for it
+                duplicates = []
+                upload_staging.clear(upload_id)
+                result = upload_pipeline.process_csv_stream(
+                    upload_store.path(file_upload.filename), progress,
+                    self._chunk_stager(file_upload, duplicates)
+                )
+                result['existing_duplicates'] = sum(duplicates)
+            else:
+                if file_content is None:
+                    with open(upload_store.path(file_upload.filename), 'rb') as f:
+                        file_content = f.read()
+                result = upload_pipeline.process_content(
+                    file_content, file_upload.original_filename, progress
+                )
+                result['staged_count'] = len(result['transactions'])
+            
+            processing_details = result['processing']
+            cleaning_summary = result['cleaning']
+            categorized_transactions = result['transactions']
+            file_upload.layout_fingerprint = (processing_details.get('layout') or {}).get('fingerprint')
+            
+            if not result['raw_count']:
+                file_upload.status = 'failed'
+                file_upload.error_message = 'No transactions found in file'
+                file_upload.processing_details = processing_details
+            elif not result['staged_count']:
+                file_upload.status = 'failed'
+                file_upload.error_message = 'No valid transactions after cleaning'
+                file_upload.processing_details = {
+                    'processing': processing_details,
+                    'cleaning': cleaning_summary
+                }
+            else:
+                if not stream:
+                    # Cache and stage the result before the upload is reported as completed.
+                    # The cached result is shared by identical files, so it is saved before
+                    # the user's duplicate flags and merchant overrides are applied
+                    upload_store.save_result(file_upload.filename, {
+                        'transactions': categorized_transactions,
+                        'cleaning': cleaning_summary
+                    })
+                    
+                    # Flag rows imported before, e.g. from an overlapping statement period
+                    result['existing_duplicates'] = duplicate_detector.flag(
+                        file_upload.user_id, categorized_transactions
+                    )
+                    category_overlays.apply(file_upload.user_id, categorized_transactions)
+                    upload_staging.stage(file_upload.id, file_upload.user_id, categorized_transactions)
+                
+                file_upload.status = 'completed'
+                file_upload.transactions_count = result['staged_count']
+                file_upload.processed_at = datetime.utcnow()
+                file_upload.processing_details = {
+                    'processing': processing_details,
+                    'cleaning': cleaning_summary
+                }
+            
+            file_upload.progress = 100
+            db.session.commit()
+            return result
+        
+        except Exception as e:
+            # A failed statement leaves the session unusable until it is rolled back
+            db.session.rollback()
+            file_upload = FileUpload.query.get(upload_id)
+            if file_upload:
+                # Streamed chunks committed along with progress updates are dropped
+                upload_staging.clear(upload_id)
+                file_upload.status = 'failed'
+                file_upload.error_message = str(e)
+                db.session.commit()
+            raise
+    
+    def submit(self, app, upload_id: int, stream: bool = False):
+        """Queue an upload for processing on the worker pool"""
+        return self._get_executor().submit(self._run, app, upload_id, stream)
+    
+    def _run(self, app, upload_id: int, stream: bool):
+        """Worker entry point - processes one upload in its own app context"""
+        with app.app_context():
+            try:
+                file_upload = FileUpload.query.get(upload_id)
+                if file_upload:
+                    self.process(file_upload, stream=stream, track_progress=True)
+            except Exception as e:
+                print(f"Error processing upload {upload_id}: {e}")
+            finally:
+                db.session.remove()
+    
+    def _progress_recorder(self, file_upload: FileUpload) -> Callable[[int], None]:
+        """Callback that saves progress in steps of PROGRESS_STEP percent"""
+        def record(percent: int):
+            if percent - (file_upload.progress or 0) >= self.PROGRESS_STEP:
+                file_upload.progress = percent
+                db.session.commit()
+        return record
+    
+    def _chunk_stager(self, file_upload: FileUpload, duplicates: List[int]) -> Callable[[List[Dict]], None]:
+        """Callback that flags and stages each chunk of a streamed upload, counting duplicates"""
+        def stage(transactions: List[Dict]):
+            duplicates.append(duplicate_detector.flag(file_upload.user_id, transactions))
+            category_overlays.apply(file_upload.user_id, transactions)
+            upload_staging.append(file_upload.id, file_upload.user_id, transactions)
+        return stage
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the worker pool on first use"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='upload-worker'
+                )
+            return self._executor
+
+
+# Global instance
+upload_jobs = UploadJobs()
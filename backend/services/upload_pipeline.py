@@ -0,0 +1,135 @@
+"""
+Upload Processing Pipeline
+Runs uploaded statements through extraction, cleaning and categorization
+"""
+from typing import Callable, List, Dict, Optional
+
+from services.file_processor import file_processor
+from services.data_cleaner import data_cleaner, KeyDigests
+from services.category_directory import category_directory
+from ml.categorizer import categorizer
+
+
+class UploadPipeline:
+    """Extract -> clean -> categorize pipeline for uploaded statement files"""
+    
+    # Rows of a streamed file returned inline; the rest are read back from staging
+    PREVIEW_ROWS = 50
+    
+    def process_content(self, file_content: bytes, filename: str,
+                        progress: Optional[Callable[[int], None]] = None) -> Dict:
+        """
+        Process a statement held in memory
+        
+        Args:
+            progress: Optional callback receiving a completion percentage
+        
+        Returns:
+            Dict with raw_count, transactions (categorized, numbered by row),
+            processing and cleaning details
+        """
+        raw_transactions, processing_details = file_processor.process_file(file_content, filename)
+        self._report(progress, 60)
+        
+        cleaned_transactions = data_cleaner.clean_transactions(raw_transactions)
+        cleaning_summary = data_cleaner.get_cleaning_summary(raw_transactions, cleaned_transactions)
+        self._report(progress, 70)
+        
+        categorized_transactions = self.number_rows(self.categorize(cleaned_transactions))
+        self._report(progress, 95)
+        
+        return {
+            'raw_count': len(raw_transactions),
+            'transactions': categorized_transactions,
+            'processing': processing_details,
+            'cleaning': cleaning_summary
+        }
+    
+    def process_csv_stream(self, file_path: str,
+                           progress: Optional[Callable[[int], None]] = None,
+                           stage: Optional[Callable[[List[Dict]], None]] = None) -> Dict:
+        """
+        Process a CSV statement from disk one chunk at a time
+        
+        Each chunk is extracted, cleaned, categorized and handed to the stage
+        callback before the next one is read, so only one chunk of rows is
+        held at a time. Duplicates are removed across chunks by keeping an
+        8-byte digest per unique row (KeyDigests), the only state that grows
+        with the file. Rows are numbered in file order; each chunk is sorted
+        by date on its own.
+        
+        Args:
+            progress: Optional callback receiving a completion percentage
+            stage: Callback receiving each chunk of categorized transactions
+        
+        Returns:
+            Same shape as process_content, except that transactions holds only
+            the first PREVIEW_ROWS rows and staged_count the number of rows
+            passed to stage
+        """
+        seen_keys = KeyDigests()
+        summaries = []
+        preview = []
+        staged_count = 0
+        raw_count = 0
+        processing_details = {}
+        
+        for raw_transactions, processing_details in file_processor.process_csv_stream(file_path):
+            raw_count += len(raw_transactions)
+            
+            cleaned_transactions = data_cleaner.clean_transactions(raw_transactions, seen_keys)
+            summaries.append(data_cleaner.get_cleaning_summary(raw_transactions, cleaned_transactions))
+            categorized_transactions = self.number_rows(self.categorize(cleaned_transactions), staged_count)
+            
+            if stage and categorized_transactions:
+                stage(categorized_transactions)
+            staged_count += len(categorized_transactions)
+            if len(preview) < self.PREVIEW_ROWS:
+                preview.extend(categorized_transactions[:self.PREVIEW_ROWS - len(preview)])
+            
+            if processing_details.get('file_size'):
+                fraction = processing_details['bytes_read'] / processing_details['file_size']
+                self._report(progress, int(95 * min(fraction, 1.0)))
+        
+        return {
+            'raw_count': raw_count,
+            'transactions': preview,
+            'staged_count': staged_count,
+            'processing': processing_details,
+            'cleaning': data_cleaner.merge_cleaning_summaries(summaries)
+        }
+    
+    def categorize(self, cleaned_transactions: List[Dict]) -> List[Dict]:
+        """Attach a suggested category to each cleaned transaction"""
+        categorized_transactions = []
+        
+        # Auto-categorize the whole batch in one model call
+        predictions = categorizer.batch_categorize(cleaned_transactions)
+        
+        for trans, prediction in zip(cleaned_transactions, predictions):
+            category_name = prediction['category']
+            confidence = prediction['confidence']
+            
+            categorized_transactions.append({
+                **trans,
+                'suggested_category': category_name,
+                'category_id': category_directory.system_id(category_name),
+                'category_confidence': round(confidence, 2)
+            })
+        
+        return categorized_transactions
+    
+    def number_rows(self, transactions: List[Dict], start: int = 0) -> List[Dict]:
+        """Give each transaction its row index, used to stage and confirm it"""
+        for idx, trans in enumerate(transactions, start):
+            trans['row'] = idx
+        return transactions
+    
+    def _report(self, progress: Optional[Callable[[int], None]], percent: int):
+        """Pass a completion percentage to the progress callback, if any"""
+        if progress:
+            progress(percent)
+
+
+# Global instance
+upload_pipeline = UploadPipeline()
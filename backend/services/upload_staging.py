@@ -0,0 +1,275 @@
+"""
+Upload Staging Service
+Keeps extracted transactions server-side between upload and confirm
+"""
+from datetime import datetime, date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select, literal, exists, func
+
+from database.models import db, Transaction, Category, StagedTransaction, transaction_fingerprint
+from services.merchant_resolver import merchant_resolver
+
+
+class UploadStaging:
+    """
+    Extracted rows of an upload, keyed by upload_id and row index
+    
+    The extracted list no longer has to make a round trip through the client.
+    Confirm names only the rows the user excluded or edited, and the rest are
+    copied into transactions with a single INSERT ... SELECT.
+    """
+    
+    INSERT_CHUNK_SIZE = 1000
+    
+    # Fields a confirm edit may change
+    EDITABLE_FIELDS = {
+        'transaction_date', 'type', 'amount', 'description', 'merchant',
+        'category_id', 'payment_method', 'is_recurring'
+    }
+    
+    def stage(self, upload_id: int, user_id: int, transactions: List[Dict]) -> int:
+        """Replace the staged rows of an upload with its extracted transactions"""
+        self.clear(upload_id)
+        return self.append(upload_id, user_id, transactions)
+    
+    def append(self, upload_id: int, user_id: int, transactions: List[Dict]) -> int:
+        """Add extracted transactions to an upload's staged rows, e.g. one chunk of a streamed file"""
+        merchant_ids = merchant_resolver.resolve_many([trans.get('merchant') for trans in transactions])
+        
+        rows = [
+            {
+                'upload_id': upload_id,
+                'row_index': trans.get('row', idx),
+                'type': trans.get('type', 'expense'),
+                'amount': trans['amount'],
+                'category_id': trans.get('category_id'),
+                'suggested_category': trans.get('suggested_category'),
+                'category_confidence': trans.get('category_confidence'),
+                'description': trans.get('description', ''),
+                'transaction_date': self._parse_date(trans['transaction_date']),
+                'merchant': trans.get('merchant', ''),
+                'merchant_id': merchant_id,
+                'payment_method': trans.get('payment_method', 'bank_transfer'),
+                'is_recurring': trans.get('is_recurring', False),
+                'fingerprint': transaction_fingerprint(
+                    user_id, trans['transaction_date'], trans['amount'], trans.get('description')
+                ),
+                'is_duplicate': trans.get('is_duplicate', False)
+            }
+            for idx, (trans, merchant_id) in enumerate(zip(transactions, merchant_ids))
+        ]
+        
+        for start in range(0, len(rows), self.INSERT_CHUNK_SIZE):
+            db.session.execute(insert(StagedTransaction), rows[start:start + self.INSERT_CHUNK_SIZE])
+        
+        return len(rows)
+    
+    def copy(self, source_upload_id: int, upload_id: int, user_id: int) -> int:
+        """
+        Stage another upload's rows for a new upload of the same file
+        
+        Rows are copied with a single INSERT ... SELECT and flagged again
+        against the user's transactions, so a re-upload needs no reprocessing.
+        """
+        columns = [
+            'upload_id', 'row_index', 'type', 'amount', 'category_id', 'suggested_category',
+            'category_confidence', 'description', 'transaction_date', 'merchant', 'merchant_id',
+            'payment_method', 'is_recurring', 'fingerprint', 'is_duplicate'
+        ]
+        
+        already_imported = exists().where(
+            Transaction.user_id == user_id,
+            Transaction.fingerprint == StagedTransaction.fingerprint
+        )
+        source = select(
+            literal(upload_id),
+            StagedTransaction.row_index,
+            StagedTransaction.type,
+            StagedTransaction.amount,
+            StagedTransaction.category_id,
+            StagedTransaction.suggested_category,
+            StagedTransaction.category_confidence,
+            StagedTransaction.description,
+            StagedTransaction.transaction_date,
+            StagedTransaction.merchant,
+            StagedTransaction.merchant_id,
+            StagedTransaction.payment_method,
+            StagedTransaction.is_recurring,
+            StagedTransaction.fingerprint,
+            already_imported
+        ).where(StagedTransaction.upload_id == source_upload_id)
+        
+        result = db.session.execute(
+            insert(StagedTransaction.__table__).from_select(columns, source)
+        )
+        return result.rowcount
+    
+    def count(self, upload_id: int) -> int:
+        """Number of rows staged for an upload"""
+        return StagedTransaction.query.filter_by(upload_id=upload_id).count()
+    
+    def duplicate_count(self, upload_id: int) -> int:
+        """Number of an upload's staged rows the user had already imported when it was staged"""
+        return StagedTransaction.query.filter_by(upload_id=upload_id, is_duplicate=True).count()
+    
+    def preview(self, upload_id: int, page: int = 1, per_page: int = 50):
+        """Page of staged rows in extraction order"""
+        return StagedTransaction.query\
+            .filter_by(upload_id=upload_id)\
+            .order_by(StagedTransaction.row_index)\
+            .paginate(page=page, per_page=per_page, error_out=False)
+    
+    def apply_edits(self, upload_id: int, user_id: int, edits: List[Dict]) -> List[str]:
+        """
+        Update staged rows with the user's corrections
+        
+        Args:
+            edits: [{row: int, <field>: value, ...}] using EDITABLE_FIELDS
+        
+        Returns:
+            Error messages for edits that could not be applied
+        """
+        errors = []
+        
+        for edit in edits:
+            row = edit.get('row')
+            label = f"Row {row + 1}" if isinstance(row, int) else "Row ?"
+            
+            try:
+                if not isinstance(row, int):
+                    raise ValueError('Missing row')
+                
+                values = {k: v for k, v in edit.items() if k in self.EDITABLE_FIELDS}
+                if not values:
+                    continue
+                
+                if 'amount' in values:
+                    if not values['amount']:
+                        raise ValueError('Missing amount')
+                    values['amount'] = float(values['amount'])
+                if 'transaction_date' in values:
+                    if not values['transaction_date']:
+                        raise ValueError('Missing transaction_date')
+                    values['transaction_date'] = self._parse_date(values['transaction_date'])
+                if 'type' in values and values['type'] not in ('income', 'expense'):
+                    raise ValueError(f"Invalid type '{values['type']}'")
+                if 'merchant' in values:
+                    values['merchant_id'] = merchant_resolver.resolve(values['merchant'])
+                
+                staged = StagedTransaction.query.filter_by(upload_id=upload_id, row_index=row).first()
+                if not staged:
+                    errors.append(f"{label}: Not found")
+                    continue
+                
+                for field, value in values.items():
+                    setattr(staged, field, value)
+                staged.fingerprint = transaction_fingerprint(
+                    user_id, staged.transaction_date, staged.amount, staged.description
+                )
+            
+            except Exception as e:
+                errors.append(f"{label}: {str(e)}")
+        
+        return errors
+    
+    def corrections(self, upload_id: int, exclude: Optional[List[int]] = None) -> List[Tuple]:
+        """
+        Staged rows whose category differs from the suggested one
+        
+        Returns:
+            List of (description, merchant, category_id, category name) tuples
+        """
+        query = db.session.query(
+            StagedTransaction.description,
+            StagedTransaction.merchant,
+            StagedTransaction.category_id,
+            Category.name
+        ).join(
+            Category, Category.id == StagedTransaction.category_id
+        ).filter(
+            StagedTransaction.upload_id == upload_id,
+            StagedTransaction.suggested_category.isnot(None),
+            Category.name != StagedTransaction.suggested_category
+        )
+        
+        if exclude:
+            query = query.filter(StagedTransaction.row_index.not_in(exclude))
+        
+        return [tuple(row) for row in query.all()]
+    
+    def promote(self, upload_id: int, user_id: int, exclude: Optional[List[int]] = None,
+                skip_duplicates: bool = True, allow_rows: Optional[List[int]] = None) -> Tuple[int, int]:
+        """
+        Copy staged rows into transactions and clear the staging area
+        
+        Args:
+            exclude: Row indexes the user deselected
+            skip_duplicates: Leave out rows whose fingerprint the user already has
+            allow_rows: Row indexes imported even if they are duplicates, e.g.
+                flagged rows the user selected again
+        
+        Returns:
+            Tuple of (transactions created, duplicates skipped)
+        """
+        now = datetime.utcnow()
+        columns = [
+            'user_id', 'type', 'amount', 'category_id', 'description', 'transaction_date',
+            'merchant', 'merchant_id', 'payment_method', 'is_recurring', 'fingerprint', 'created_at', 'updated_at'
+        ]
+        
+        source = select(
+            literal(user_id),
+            StagedTransaction.type,
+            StagedTransaction.amount,
+            StagedTransaction.category_id,
+            StagedTransaction.description,
+            StagedTransaction.transaction_date,
+            StagedTransaction.merchant,
+            StagedTransaction.merchant_id,
+            StagedTransaction.payment_method,
+            StagedTransaction.is_recurring,
+            StagedTransaction.fingerprint,
+            literal(now),
+            literal(now)
+        ).where(StagedTransaction.upload_id == upload_id)
+        
+        if exclude:
+            source = source.where(StagedTransaction.row_index.not_in(exclude))
+        
+        candidates = db.session.execute(
+            select(func.count()).select_from(source.subquery())
+        ).scalar()
+        
+        if skip_duplicates:
+            # Checked at confirm time, rows may have been imported since staging
+            is_new = ~exists().where(
+                Transaction.user_id == user_id,
+                Transaction.fingerprint == StagedTransaction.fingerprint
+            )
+            if allow_rows:
+                is_new = is_new | StagedTransaction.row_index.in_(allow_rows)
+            source = source.where(is_new)
+        
+        result = db.session.execute(
+            insert(Transaction.__table__).from_select(columns, source)
+        )
+        self.clear(upload_id)
+        
+        return result.rowcount, candidates - result.rowcount
+    
+    def clear(self, upload_id: int):
+        """Remove all staged rows of an upload"""
+        StagedTransaction.query.filter_by(upload_id=upload_id).delete(synchronize_session=False)
+    
+    def _parse_date(self, value) -> date:
+        """Parse an ISO date or datetime string"""
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return datetime.fromisoformat(str(value).replace('Z', '')).date()
+
+
+# Global instance
+upload_staging = UploadStaging()
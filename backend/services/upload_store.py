@@ -0,0 +1,122 @@
+"""
+Upload Storage Service
+Content-addressed storage for uploaded statement files and their parse results
+"""
+import os
+import json
+import uuid
+import hashlib
+from typing import BinaryIO, Dict, Optional, Tuple
+
+
+class UploadStore:
+    """
+    Stores uploaded files under their SHA-256 content hash
+    
+    Identical bytes are stored once, at <root>/<hash[:2]>/<hash>.<ext>, no matter
+    how often or by whom they are uploaded. The categorized parse result of a
+    file is cached next to it so a re-upload can be answered without
+    reprocessing.
+    """
+    
+    BLOCK_SIZE = 1024 * 1024
+    
+    def __init__(self, root: str = 'uploads'):
+        self.root = root
+    
+    def relative_path(self, content_hash: str, ext: str) -> str:
+        """Storage path of a file, relative to the store root"""
+        return os.path.join(content_hash[:2], f"{content_hash}.{ext}")
+    
+    def path(self, relative_path: str) -> str:
+        """Absolute path of a stored file"""
+        return os.path.join(self.root, relative_path)
+    
+    def save_bytes(self, file_content: bytes, ext: str) -> Tuple[str, str]:
+        """
+        Store file content held in memory
+        
+        Returns:
+            Tuple of (content_hash, relative_path)
+        """
+        content_hash = hashlib.sha256(file_content).hexdigest()
+        relative_path = self.relative_path(content_hash, ext)
+        file_path = self.path(relative_path)
+        
+        if not os.path.exists(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            tmp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(file_content)
+            os.replace(tmp_path, file_path)
+        
+        return content_hash, relative_path
+    
+    def save_stream(self, stream: BinaryIO, ext: str) -> Tuple[str, str]:
+        """
+        Store a file stream block by block, hashing it on the way
+        
+        Returns:
+            Tuple of (content_hash, relative_path)
+        """
+        tmp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(tmp_dir, f"{uuid.uuid4().hex}.tmp")
+        
+        digest = hashlib.sha256()
+        try:
+            with open(tmp_path, 'wb') as f:
+                for block in iter(lambda: stream.read(self.BLOCK_SIZE), b''):
+                    digest.update(block)
+                    f.write(block)
+            
+            content_hash = digest.hexdigest()
+            relative_path = self.relative_path(content_hash, ext)
+            file_path = self.path(relative_path)
+            
+            if os.path.exists(file_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                os.replace(tmp_path, file_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        
+        return content_hash, relative_path
+    
+    def delete(self, relative_path: str):
+        """Delete a stored file and its cached result"""
+        for file_path in [self.path(relative_path), self._result_path(relative_path)]:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+    
+    def save_result(self, relative_path: str, result: Dict):
+        """Cache the parse result of a stored file"""
+        result_path = self._result_path(relative_path)
+        tmp_path = f"{result_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, result_path)
+    
+    def load_result(self, relative_path: str) -> Optional[Dict]:
+        """Get the cached parse result of a stored file, if any"""
+        result_path = self._result_path(relative_path)
+        if not os.path.exists(result_path):
+            return None
+        
+        try:
+            with open(result_path, encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error reading cached result: {e}")
+            return None
+    
+    def _result_path(self, relative_path: str) -> str:
+        """Path of the cached parse result for a stored file"""
+        return f"{self.path(relative_path)}.result.json"
+
+
+# Global instance
+upload_store = UploadStore(os.getenv('UPLOAD_FOLDER', 'uploads'))
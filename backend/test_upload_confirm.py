@@ -0,0 +1,117 @@
+"""
+Test confirming staged upload rows that are flagged as already imported
+Uploads a statement, confirms it, then uploads an overlapping one and checks
+that flagged rows are skipped unless the user selected them again
+Uses an in-memory SQLite database and a temporary upload folder
+Run: python test_upload_confirm.py
+"""
+import sys
+import os
+import io
+import shutil
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['UPLOAD_FOLDER'] = tempfile.mkdtemp(prefix='test_upload_confirm_')
+
+from flask_jwt_extended import create_access_token
+from app import create_app
+from database.models import db, User, Transaction
+
+FIRST_STATEMENT = b"""Date,Description,Amount
+2024-03-01,STARBUCKS COFFEE,-5.50
+2024-03-02,UBER RIDE,-12.00
+2024-03-03,WALMART GROCERIES,-64.20
+"""
+
+# Overlaps the first statement and adds one new row
+SECOND_STATEMENT = b"""Date,Description,Amount
+2024-03-01,STARBUCKS COFFEE,-5.50
+2024-03-02,UBER RIDE,-12.00
+2024-03-03,WALMART GROCERIES,-64.20
+2024-03-04,NETFLIX SUBSCRIPTION,-15.99
+"""
+
+
+def check(label, passed, detail=''):
+    """Print one check result"""
+    print(f"  {label:<44} {'[OK]' if passed else '[FAIL]'} {detail}")
+    return passed
+
+
+def upload(client, headers, content, name):
+    """Upload a CSV statement and return the response body"""
+    response = client.post(
+        '/api/upload',
+        headers=headers,
+        data={'file': (io.BytesIO(content), name)},
+        content_type='multipart/form-data'
+    )
+    return response.get_json()
+
+
+def run_test():
+    """Upload, confirm, re-upload and confirm with a re-selected duplicate"""
+    print("=" * 60)
+    print("Staged Confirm Duplicate Test")
+    print("=" * 60)
+    
+    app = create_app()
+    client = app.test_client()
+    results = []
+    
+    with app.app_context():
+        user = User(email='confirm@example.com', full_name='Confirm Test')
+        user.set_password('confirm')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+        
+        first = upload(client, headers, FIRST_STATEMENT, 'march.csv')
+        response = client.post('/api/upload/confirm', headers=headers, json={'upload_id': first['upload_id']})
+        results.append(check('First statement saved', response.get_json().get('saved_count') == 3,
+                             f"(saved {response.get_json().get('saved_count')})"))
+        
+        second = upload(client, headers, SECOND_STATEMENT, 'march_full.csv')
+        rows = {t['description'].upper(): t for t in second['transactions']}
+        flagged = sorted(d for d, t in rows.items() if t.get('is_duplicate'))
+        results.append(check('Overlapping rows flagged as duplicates', len(flagged) == 3, f"({len(flagged)} flagged)"))
+        
+        # The user re-selects one flagged row, deselects another and leaves the third flagged
+        reselected = rows['STARBUCKS COFFEE']['row']
+        deselected = rows['UBER RIDE']['row']
+        response = client.post('/api/upload/confirm', headers=headers, json={
+            'upload_id': second['upload_id'],
+            'exclude': [deselected],
+            'allow_duplicate_rows': [reselected]
+        })
+        body = response.get_json()
+        results.append(check('Re-selected duplicate and new row saved', body.get('saved_count') == 2,
+                             f"(saved {body.get('saved_count')})"))
+        results.append(check('Unselected duplicate skipped', body.get('skipped_duplicates') == 1,
+                             f"(skipped {body.get('skipped_duplicates')})"))
+        
+        counts = {
+            description: Transaction.query.filter_by(user_id=user_id, description=description).count()
+            for description in ['Starbucks Coffee', 'Uber Ride', 'Walmart Groceries', 'Netflix Subscription']
+        }
+        results.append(check('Stored transactions', counts == {
+            'Starbucks Coffee': 2, 'Uber Ride': 1, 'Walmart Groceries': 1, 'Netflix Subscription': 1
+        }, str(counts)))
+    
+    passed = all(results)
+    print(f"\n  Result: {'[OK]' if passed else '[FAIL]'}")
+    print("\n" + "=" * 60)
+    return passed
+
+
+if __name__ == "__main__":
+    try:
+        passed = run_test()
+    finally:
+        shutil.rmtree(os.environ['UPLOAD_FOLDER'], ignore_errors=True)
+    sys.exit(0 if passed else 1)
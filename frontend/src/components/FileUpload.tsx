@@ -51,7 +51,10 @@ interface ExtractedTransaction {
   suggested_category: string;
   category_id: number | null;
   category_confidence: number;
+  row: number;
+  is_duplicate?: boolean;
   selected?: boolean;
+  edited?: boolean;
 }
 
 interface UploadSummary {
@@ -122,10 +125,10 @@ function FileUpload({ onTransactionsImported }: FileUploadProps) {
       setUploadId(data.upload_id);
       setSummary(data.summary);
       
-      // Mark all transactions as selected by default
+      // Select all transactions by default, except ones already imported
       const transactionsWithSelection = data.transactions.map((t: ExtractedTransaction) => ({
         ...t,
-        selected: true,
+        selected: !t.is_duplicate,
       }));
       setTransactions(transactionsWithSelection);
       setStatus('preview');
@@ -182,7 +185,14 @@ function FileUpload({ onTransactionsImported }: FileUploadProps) {
     setError(null);
 
     try {
-      await uploadAPI.confirmTransactions(uploadId!, selectedTransactions as unknown as Record<string, unknown>[]);
+      // Rows are staged server-side, so only send what the user changed
+      const excludedRows = transactions.filter(t => !t.selected).map(t => t.row);
+      const edits = selectedTransactions
+        .filter(t => t.edited)
+        .map(t => ({ row: t.row, type: t.type, category_id: t.category_id }));
+      // Rows flagged as already imported are skipped unless the user selected them again
+      const allowedDuplicateRows = selectedTransactions.filter(t => t.is_duplicate).map(t => t.row);
+      await uploadAPI.confirmStagedTransactions(uploadId!, excludedRows, edits, allowedDuplicateRows);
       setStatus('success');
       
       if (onTransactionsImported) {
@@ -232,7 +242,7 @@ function FileUpload({ onTransactionsImported }: FileUploadProps) {
   const updateTransaction = (index: number, field: keyof ExtractedTransaction, value: unknown) => {
     setTransactions(prev => {
       const updated = [...prev];
-      updated[index] = { ...updated[index], [field]: value };
+      updated[index] = { ...updated[index], [field]: value, edited: true };
       
       // If category changed, update category_id
       if (field === 'category_id') {
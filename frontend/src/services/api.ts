@@ -120,6 +120,20 @@ export const uploadAPI = {
   },
   confirmTransactions: (uploadId: number, transactions: Record<string, unknown>[]) =>
     api.post('/upload/confirm', { upload_id: uploadId, transactions }),
+  confirmStagedTransactions: (
+    uploadId: number,
+    exclude: number[],
+    edits: Record<string, unknown>[],
+    allowDuplicateRows: number[] = []
+  ) =>
+    api.post('/upload/confirm', {
+      upload_id: uploadId,
+      exclude,
+      edits,
+      allow_duplicate_rows: allowDuplicateRows,
+    }),
+  getUploadPreview: (id: number, params?: Record<string, unknown>) =>
+    api.get(`/upload/${id}/preview`, { params }),
   getUploadHistory: () => api.get('/upload/history'),
   deleteUpload: (id: number) => api.delete(`/upload/${id}`),
 };